@@ -81,7 +81,7 @@ setup(
     #
     # Similar to `install_requires` above, these must be valid existing
     # projects.
-    extras_require={"dev": [], "test": []},
+    extras_require={"dev": [], "test": [], "pettingzoo": ["pettingzoo"]},
     # If there are data files included in your packages that need to be
     # installed, specify them here.
     #
@@ -106,6 +106,7 @@ setup(
     entry_points={  # Optional
         'console_scripts': [
             'zombpyg=zombpyg.play:main',
+            'zombpyg-bench=zombpyg.bench:main',
         ],
     },
     project_urls={
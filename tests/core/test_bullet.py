@@ -0,0 +1,75 @@
+# tests/core/test_bullet.py
+import numpy as np
+from zombpyg.world import World
+from zombpyg.map.map import MapFactory
+from zombpyg.agent import AgentBuilder
+from zombpyg.core.zombie import Zombie
+from zombpyg.core.bullet import Bullet, step_bullets
+from zombpyg.utils.surroundings import Color
+
+
+def create_world():
+    world = World(MapFactory.build_map("open_room", 640, 480), 0.02)
+    agent = AgentBuilder(10, Color.BLUE, 250).build(0, 100, 240, "rifle", world)
+    world.agents.append(agent)
+    world.add_fighter(agent)
+    return world, agent
+
+def add_zombie(world, x, y, life):
+    zombie = Zombie(x, y, 10, world)
+    zombie.life = life
+    world.zombies.append(zombie)
+    world.add_fighter(zombie)
+    return zombie
+
+def create_bullet(world, agent, start, max_total_damage=1000):
+    return Bullet(start, (1.0, 0.0), (50, 50), max_total_damage, 20000, agent, world)
+
+def test_bullet_stops_at_wall():
+    world, agent = create_world()
+    bullet = create_bullet(world, agent, (600, 100))
+    step_bullets([bullet], world)
+    assert not bullet.active
+    assert bullet.current_location == (639, 100)
+
+def test_bullet_hits_fighters_in_path_order():
+    world, agent = create_world()
+    near = add_zombie(world, 200, 240, 100)
+    far = add_zombie(world, 300, 240, 100)
+    # A central hit does 100 damage, which exhausts the bullet at the first zombie
+    bullet = create_bullet(world, agent, (115, 240), max_total_damage=100)
+    step_bullets([bullet], world)
+    assert near.life <= 0
+    assert far.life == 100
+    assert not bullet.active
+    assert agent.zombies_killed == 1
+    assert agent.attack_hits == 1
+
+def test_later_bullets_skip_killed_fighters():
+    world, agent = create_world()
+    near = add_zombie(world, 200, 240, 100)
+    far = add_zombie(world, 300, 240, 100)
+    bullets = [
+        create_bullet(world, agent, (115, 240), max_total_damage=100),
+        create_bullet(world, agent, (115, 240), max_total_damage=100)
+    ]
+    step_bullets(bullets, world)
+    # The first bullet kills the nearest zombie, so the second passes it and kills the other
+    assert near.life == 0
+    assert far.life == 0
+    assert agent.zombies_killed == 2
+    assert agent.attack_hits == 2
+
+def test_fighters_at_the_same_distance_are_hit_agents_first():
+    world, agent = create_world()
+    # The zombie is added to the fighter table before the other agent
+    zombie = add_zombie(world, 200, 242, 100)
+    other = AgentBuilder(10, Color.BLUE, 250).build(1, 200, 238, "rifle", world)
+    world.agents.append(other)
+    world.add_fighter(other)
+    other_life = other.life
+    bullet = create_bullet(world, agent, (115, 240), max_total_damage=100)
+    step_bullets([bullet], world)
+    assert other.life == other_life - 100
+    assert zombie.life == 100
+    assert agent.zombies_killed == 0
@@ -0,0 +1,90 @@
+# tests/core/test_fighter_table.py
+import random
+import numpy as np
+import pytest
+from zombpyg.core.fighter_table import FighterTable
+from zombpyg.core.player import Player
+from zombpyg.core.weapons import Knife
+from zombpyg.utils.surroundings import Color
+from zombpyg.utils.spatial_hash import SpatialHash
+
+
+def create_player(x, y, radius=10):
+    return Player(x, y, radius, "player", Color.BLUE, weapon=Knife())
+
+def test_detached_fighter_has_own_table():
+    player = create_player(10, 20)
+    assert len(player.fighter_table) == 1
+    assert player.get_position() == (10, 20)
+    assert player.r == 10
+    assert player.life == Player.MAX_LIFE
+
+def test_attach_moves_state():
+    table = FighterTable(capacity=1)
+    players = [create_player(i, 2 * i) for i in range(5)]
+    for player in players:
+        table.attach(player)
+    assert len(table) == 5
+    assert table.get_capacity() >= 5
+    assert table.x[:5].tolist() == [0, 1, 2, 3, 4]
+
+    players[3].set_position(100, 200)
+    players[3].life -= 30
+    assert (table.x[3], table.y[3], table.life[3]) == (100, 200, Player.MAX_LIFE - 30)
+
+    FighterTable(capacity=1).attach(players[1])
+    assert len(table) == 4
+    assert players[1].get_position() == (1, 2)
+    assert table.get_rows().tolist() == [0, 2, 3, 4]
+
+    # The freed row is reused
+    player = create_player(7, 7)
+    table.attach(player)
+    assert player.fighter_row == 1
+
+@pytest.mark.parametrize("cell_size", [None, 8, 32])
+def test_query_radius_matches_brute_force(cell_size):
+    rng = random.Random(0)
+    spatial_hash = SpatialHash(cell_size) if cell_size is not None else None
+    table = FighterTable(spatial_hash=spatial_hash)
+    players = [create_player(rng.randint(0, 200), rng.randint(0, 200), rng.uniform(1, 10)) for _ in range(100)]
+    for player in players:
+        table.attach(player)
+        if spatial_hash is not None:
+            player.spatial_hash = spatial_hash
+            spatial_hash.insert(player)
+    for player in players[::5]:
+        player.set_position(rng.randint(0, 200), rng.randint(0, 200))
+    for player in players[::7]:
+        player.life = 0
+    for _ in range(50):
+        point = (rng.uniform(0, 200), rng.uniform(0, 200))
+        radius = rng.uniform(0, 50)
+        rows, distances = table.query_radius(point, radius, exclude=players[0])
+        expected = [
+            player for player in players[1:]
+            if (player.life > 0) and np.hypot(player.x - point[0], player.y - point[1]) < radius + player.r
+        ]
+        assert table.get_fighters(rows) == expected
+        assert np.allclose(distances, [np.hypot(p.x - point[0], p.y - point[1]) for p in expected])
+        assert table.any_within_radius(point, radius, exclude=players[0]) == (len(expected) > 0)
+        rows, _ = table.query_radius(point, radius, fighter_types=('zombie',))
+        assert len(rows) == 0
+
+def test_living_rows_by_type():
+    table = FighterTable()
+    players = [create_player(0, 0) for _ in range(3)]
+    for player in players:
+        table.attach(player)
+    players[1].life = -5
+    assert table.get_living_rows().tolist() == [0, 2]
+    assert table.get_living_rows(fighter_types=('player',)).tolist() == [0, 2]
+    assert table.get_living_rows(fighter_types=('zombie',)).tolist() == []
+
+def test_positions_are_integers():
+    table = FighterTable()
+    player = create_player(10, 20)
+    table.attach(player)
+    player.set_position(player.x + 3, player.y - 4)
+    assert player.get_position() == (13, 16)
+    assert all(type(value) is int for value in player.get_position())
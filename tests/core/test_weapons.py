@@ -1,4 +1,5 @@
 # tests/weapons/agent.py
+import random
 import pytest
 from zombpyg.core.weapons import WeaponFactory
 
@@ -14,7 +15,9 @@ def test_weapon_factory(weapon_name):
     assert weapon.name.lower() == weapon_name
 
 def test_weapon_factory_for_random():
-    weapon = WeaponFactory.create_weapon("random")
+    weapon = WeaponFactory.create_weapon("random", rng=random.Random(0))
     assert weapon is not None
     assert weapon.name.lower() in weapon_names
+    with pytest.raises(ValueError):
+        WeaponFactory.create_weapon("random")
 
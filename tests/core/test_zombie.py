@@ -0,0 +1,115 @@
+# tests/core/test_zombie.py
+import pytest
+from zombpyg.world import World, check_lod_bands
+from zombpyg.map.map import MapFactory
+from zombpyg.agent import AgentBuilder
+from zombpyg.core.zombie import Zombie, seek_targets
+from zombpyg.utils.surroundings import Color
+from tests import helpers
+
+
+def play(map_id, batched_zombie_targeting, lod_bands=None):
+    game = helpers.build_game(
+        map_id, initial_zombies=40, minimum_zombies=40, agent_ids=["a", "b", "c"], agent_weapons="knife",
+        batched_zombie_targeting=batched_zombie_targeting, lod_bands=lod_bands, seed=9
+    )
+    return helpers.play(
+        game, 150, lambda step: [step % 14, (5 * step) % 14, 0],
+        lambda game, outcome: [
+            (fighter.get_position(), fighter.orientation, fighter.life)
+            for fighter in game.world.agents + game.world.zombies
+        ]
+    )
+
+@pytest.mark.parametrize("map_id", ["open_room", "catacombs"])
+def test_batched_targeting_matches_zombie_by_zombie_targeting(map_id):
+    # Without players moving during the fighters' turn, the targets are the same
+    assert play(map_id, True) == play(map_id, False)
+
+def test_seek_targets_matches_seek_target():
+    world = World(MapFactory.build_map("demo", 640, 480), 0.02)
+    builder = AgentBuilder(10, Color.BLUE, 250)
+    for idx, (x, y) in enumerate([(100, 240), (180, 200), (400, 240), (330, 140)]):
+        agent = builder.build(idx, x, y, "rifle", world)
+        world.agents.append(agent)
+        world.add_fighter(agent)
+    for x in range(20, 620, 40):
+        for y in range(20, 460, 40):
+            for orientation in [-135, -45, 0, 90, 180]:
+                zombie = Zombie(x, y, 10, world, orientation=orientation)
+                world.zombies.append(zombie)
+                world.add_fighter(zombie)
+    seek_targets(world.zombies, world)
+    found = 0
+    for zombie in world.zombies:
+        sought_target = zombie.sought_target
+        zombie.sought_target = None
+        assert sought_target == zombie.seek_target()
+        found += sought_target[0] is not None
+    assert found > 0
+
+def test_check_lod_bands():
+    assert check_lod_bands(None) is None
+    assert check_lod_bands([(300, 4), (150, 2)]) == ((150.0, 2), (300.0, 4))
+    with pytest.raises(ValueError):
+        check_lod_bands([(-1, 2)])
+    with pytest.raises(ValueError):
+        check_lod_bands([(100, 0)])
+    with pytest.raises(ValueError):
+        check_lod_bands([(100, 1.5)])
+
+def build_lod_world(lod_bands):
+    world = World(MapFactory.build_map("open_room", 640, 480), 0.02, lod_bands=lod_bands)
+    agent = AgentBuilder(10, Color.BLUE, 250).build(0, 100, 240, "rifle", world)
+    world.agents.append(agent)
+    world.add_fighter(agent)
+    for x, y in [(160, 240), (100, 300), (450, 150), (500, 240), (450, 330)]:
+        zombie = Zombie(x, y, 10, world, orientation=90)
+        world.zombies.append(zombie)
+        world.add_fighter(zombie)
+    return world
+
+def test_distant_zombies_step_every_interval(monkeypatch):
+    world = build_lod_world([(200, 4)])
+    steps = {zombie: 0 for zombie in world.zombies}
+    def next_step(zombie):
+        steps[zombie] += 1
+    monkeypatch.setattr(Zombie, "next_step", next_step)
+    for _ in range(8):
+        world.step_count += 1
+        world.execute_fighter_actions()
+    # The zombies near the agent step every step, the others every 4th step, spread over the steps
+    assert [steps[zombie] for zombie in world.zombies] == [8, 8, 2, 2, 2]
+    assert len(set(zombie.fighter_row % 4 for zombie in world.zombies[2:])) == 3
+
+def test_zombies_near_an_agent_attack_every_step(monkeypatch):
+    world = build_lod_world([(10, 4)])
+    zombie = Zombie(125, 240, 10, world, orientation=-90)
+    world.zombies.append(zombie)
+    world.add_fighter(zombie)
+    attacks = []
+    monkeypatch.setattr(Zombie, "attack", lambda zombie: attacks.append(zombie))
+    for _ in range(8):
+        world.step_count += 1
+        world.execute_fighter_actions()
+    # Within the band, but the agent is within its vision distance
+    assert attacks.count(zombie) == 8
+    assert zombie.step_scale == 1
+
+def test_distant_zombies_moves_are_scaled():
+    world = build_lod_world([(200, 4)])
+    near, far = world.zombies[0], world.zombies[3]
+    world.step_count = -far.fighter_row
+    skipped = world.schedule_zombie_steps()
+    assert (near not in skipped) and (far not in skipped)
+    assert (near.step_scale, far.step_scale) == (1, 4)
+    x, y = far.get_position()
+    far.move_forward()
+    assert far.get_position() == (x + 4 * far.step_forward[0], y + 4 * far.step_forward[1])
+
+def test_zombies_within_the_bands_play_as_without_bands():
+    trace = play("open_room", False, lod_bands=[(1000, 4)])
+    # Once all the agents are dead, all the zombies are far from them
+    n_steps = [any(life > 0 for _, _, life in step[:3]) for step in trace].index(False)
+    assert n_steps > 50
+    assert trace[:n_steps] == play("open_room", False)[:n_steps]
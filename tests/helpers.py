@@ -1,6 +1,8 @@
 # tests/helpers.py
 from contextlib import contextmanager
+import numpy as np
 import pytest
+from zombpyg.game import Game
 
 
 @contextmanager
@@ -11,3 +13,34 @@ def not_raises(exception):
         raise pytest.fail("DID RAISE {0}".format(ex))
 
 
+def build_game(map_id="demo", initial_zombies=10, minimum_zombies=5, initialize_game=True, **kwargs):
+    """A game on a 640x480 map without rendering.  The other keyword arguments are passed to Game."""
+    return Game(
+        world_config={
+            "tag": "SingleMap",
+            "parameters": {
+                "map_id": map_id, "w": 640, "h": 480,
+                "initial_zombies": initial_zombies, "minimum_zombies": minimum_zombies
+            }
+        },
+        initialize_game=initialize_game,
+        enable_rendering=False,
+        **kwargs,
+    )
+
+def play(game, steps, get_actions, record):
+    """Play the actions get_actions(step) for the given steps, and return the trace of what
+       record(game, outcome) makes of each step, where outcome is returned by play_actions.
+    """
+    trace = []
+    for step in range(steps):
+        outcome = game.play_actions(get_actions(step))
+        trace.append(record(game, outcome))
+    return trace
+
+def assert_same_trace(trace, other):
+    """Compare traces whose steps start with the stacked observations of the agents."""
+    assert len(trace) == len(other)
+    for (observations, *rest), (other_observations, *other_rest) in zip(trace, other):
+        assert np.array_equal(observations, other_observations)
+        assert rest == other_rest
@@ -0,0 +1,81 @@
+# tests/map/test_flow_field.py
+import numpy as np
+import pytest
+from zombpyg.map.map import MapFactory
+from zombpyg.map.flow_field import FlowField
+from tests import helpers
+
+
+def follow(field, point, steps=200):
+    """The cells visited by following the field from the point, one cell at a time."""
+    cells = [field.get_cell(point)]
+    for _ in range(steps):
+        direction = field.get_direction(point)
+        if direction is None:
+            break
+        angle = np.deg2rad(direction)
+        point = (point[0] + field.cell_size * np.sin(angle), point[1] - field.cell_size * np.cos(angle))
+        point = tuple(field.centers[field.get_cell(point)])
+        cells.append(field.get_cell(point))
+    return cells
+
+def test_flow_field_goes_around_walls():
+    game_map = MapFactory.build_map("demo", 640, 480)
+    field = FlowField(game_map.wall_grid, game_map.size)
+    # Behind the wall from (512, 96) to (512, 384)
+    target = (580, 240)
+    field.update([target])
+    start = (440, 240)
+    cells = follow(field, start)
+    assert field.get_cell(target) in cells
+    # The path goes around an end of the wall, so it's much longer than the straight line
+    assert field.distances[field.get_cell(start)] * field.cell_size > 2 * (target[0] - start[0])
+    for cell, next_cell in zip(cells, cells[1:]):
+        assert not game_map.wall_grid.segment_collides(tuple(field.centers[cell]), tuple(field.centers[next_cell]))
+
+def test_flow_field_heads_for_the_nearest_target():
+    game_map = MapFactory.build_map("open_room", 640, 480)
+    field = FlowField(game_map.wall_grid, game_map.size, update_interval=3)
+    targets = [(100, 100), (500, 400)]
+    field.step(targets)
+    assert field.updates == 1
+    assert field.get_cell(targets[0]) in follow(field, (200, 150))
+    assert field.get_cell(targets[1]) in follow(field, (420, 300))
+    field.step([(300, 300)])
+    field.step([(300, 300)])
+    assert field.updates == 1
+    field.step([(300, 300)])
+    assert field.updates == 2
+    with pytest.raises(ValueError):
+        FlowField(game_map.wall_grid, game_map.size, update_interval=0)
+
+def build_game(map_id, horde_mode):
+    return helpers.build_game(
+        map_id, initial_zombies=60, minimum_zombies=60, agent_ids=["a"], agent_weapons="knife",
+        horde_mode=horde_mode, seed=0
+    )
+
+def get_zombie_poses(game, outcome):
+    return [(zombie.get_position(), zombie.orientation) for zombie in game.world.zombies]
+
+def get_survival_steps(game, steps):
+    for step in range(steps):
+        game.play_actions([12])
+        if game.world.agents[0].life <= 0:
+            return step
+    return steps
+
+@pytest.mark.parametrize("map_id", ["narrow_hallway", "catacombs"])
+def test_horde_hunts_down_the_agent(map_id):
+    steps = get_survival_steps(build_game(map_id, True), 500)
+    assert steps < 500
+    assert get_survival_steps(build_game(map_id, False), steps) == steps
+
+def test_horde_mode_snapshots():
+    game = build_game("catacombs", True)
+    for _ in range(7):
+        game.play_actions([12])
+    snapshot = game.world.snapshot()
+    trace = helpers.play(game, 30, lambda step: [12], get_zombie_poses)
+    game.world.restore(snapshot)
+    assert helpers.play(game, 30, lambda step: [12], get_zombie_poses) == trace
@@ -0,0 +1,58 @@
+# tests/map/test_visibility.py
+import os
+import numpy as np
+import pytest
+from zombpyg.map.map import MapFactory
+from zombpyg.map.visibility import VisibilityTable
+from tests import helpers
+
+
+@pytest.mark.parametrize("map_id", ["demo", "catacombs", "tiny_space_v1"])
+def test_lookups_match_wall_tests(map_id):
+    game_map = MapFactory.build_map(map_id, 640, 480)
+    table = VisibilityTable.build(game_map.walls, game_map.size, cell_size=16)
+    rng = np.random.default_rng(1)
+    starts = rng.uniform(-10, [650, 490], size=(3000, 2))
+    ends = starts + rng.uniform(-120, 120, size=(3000, 2))
+    # Integer points, on the edges of the cells and on the walls
+    starts[:1000] = np.floor(starts[:1000] / 8) * 8
+    ends[:1000] = np.floor(ends[:1000])
+    looked_up = table.lookup_batch(starts, ends)
+    assert np.mean(looked_up >= 0) > 0.2
+    for start, end, visible in zip(starts.tolist(), ends.tolist(), looked_up.tolist()):
+        assert table.lookup(start, end) == {1: True, 0: False, -1: None}[visible]
+        if visible >= 0:
+            assert bool(visible) == (not game_map.wall_grid.segment_collides(start, end))
+
+def test_tables_are_saved_and_reused(tmp_path):
+    game_map = MapFactory.build_map("demo", 640, 480)
+    assert game_map.map_id == "demo"
+    table = game_map.load_visibility_table(cell_size=32, cache_dir=tmp_path)
+    paths = os.listdir(tmp_path)
+    assert len(paths) == 1 and paths[0].startswith("visibility-demo-640x480-32-")
+    loaded = VisibilityTable.load(os.path.join(tmp_path, paths[0]))
+    assert (loaded.size, loaded.cell_size, loaded.digest) == (table.size, table.cell_size, table.digest)
+    assert np.array_equal(loaded.visible, table.visible) and np.array_equal(loaded.blocked, table.blocked)
+
+    other_map = MapFactory.build_map("demo", 640, 480)
+    assert other_map.load_visibility_table(cell_size=32, cache_dir=tmp_path).digest == table.digest
+    assert len(os.listdir(tmp_path)) == 1
+    # Maps with other walls get tables of their own
+    MapFactory.build_map("open_room", 640, 480).load_visibility_table(cell_size=32, cache_dir=tmp_path)
+    assert len(os.listdir(tmp_path)) == 2
+
+def play(visibility_cell_size, visibility_cache_dir=None):
+    game = helpers.build_game(
+        initial_zombies=30, minimum_zombies=30, agent_ids=["a", "b"], player_specs="terminator:shotgun:2",
+        visibility_cell_size=visibility_cell_size, visibility_cache_dir=visibility_cache_dir, seed=4
+    )
+    return helpers.play(
+        game, 100, lambda step: [step % 14, (3 * step) % 14],
+        lambda game, outcome: [
+            (fighter.get_position(), fighter.life) for fighter in game.world.zombies + game.world.players
+        ]
+    )
+
+def test_games_with_visibility_tables_are_unchanged(tmp_path):
+    assert play(16, visibility_cache_dir=tmp_path) == play(None)
+    assert len(os.listdir(tmp_path)) == 1
@@ -0,0 +1,58 @@
+# tests/map/test_wall_grid.py
+import random
+import pytest
+import numpy as np
+from zombpyg.map.map import MapFactory
+from zombpyg.map.wall_grid import WallGrid
+from zombpyg.core.wall import Wall
+from zombpyg.utils.raycast import cast_rays
+
+
+map_ids = ["demo", "catacombs", "narrow_hallway", "tiny_space_v0"]
+
+@pytest.mark.parametrize("map_id", map_ids)
+def test_segment_candidates_contain_colliding_walls(map_id):
+    map = MapFactory.build_map(map_id, 640, 480)
+    grid = map.wall_grid
+    rng = random.Random(0)
+    for _ in range(500):
+        start = (rng.randint(0, 640), rng.randint(0, 480))
+        end = (start[0] + rng.randint(-200, 200), start[1] + rng.randint(-200, 200))
+        candidates = set(grid.get_candidates_for_segment(start, end).tolist())
+        batch = set(grid.get_candidates_for_segments([start], [end]).tolist())
+        colliding = set(
+            idx for idx in range(len(map.walls))
+            if cast_rays([start], [end], grid.wall_starts[idx:idx + 1], grid.wall_ends[idx:idx + 1])[2][0]
+        )
+        assert colliding <= candidates
+        assert colliding <= batch
+        if colliding:
+            assert grid.segment_collides(start, end)
+
+def test_circle_candidates_contain_nearby_walls():
+    map = MapFactory.build_map("catacombs", 640, 480)
+    grid = map.wall_grid
+    rng = random.Random(1)
+    for _ in range(500):
+        center = np.array([rng.uniform(0, 640), rng.uniform(0, 480)])
+        radius = rng.uniform(0, 100)
+        candidates = set(grid.get_candidates_for_circle(center, radius).tolist())
+        for idx in range(len(map.walls)):
+            start, end = grid.wall_starts[idx], grid.wall_ends[idx]
+            d = end - start
+            a = np.clip(np.dot(center - start, d) / np.dot(d, d), 0.0, 1.0)
+            if np.linalg.norm(center - start - a * d) <= radius:
+                assert idx in candidates
+
+def test_empty_grid():
+    grid = WallGrid([])
+    assert len(grid.get_candidates_for_segment((0, 0), (500, 500))) == 0
+    assert len(grid.get_candidates_for_segments([[0, 0]], [[500, 500]])) == 0
+    assert not grid.segment_collides((0, 0), (10, 10))
+
+def test_rays_use_all_walls_below_threshold():
+    walls = [Wall(start=(0, 0), end=(100, 0)), Wall(start=(0, 200), end=(100, 200))]
+    grid = WallGrid(walls, vectorized_query_threshold=0)
+    assert grid.get_candidates_for_rays([[50, 10]], [[50, -10]]).tolist() == [0]
+    grid = WallGrid(walls)
+    assert grid.get_candidates_for_rays([[50, 10]], [[50, -10]]).tolist() == [0, 1]
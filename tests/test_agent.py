@@ -1,14 +1,21 @@
 # tests/agent.py
+import random
 import pytest
 from zombpyg.utils.surroundings import Color
 from zombpyg.agent import AgentBuilder
 from zombpyg.core.weapons import WeaponFactory
+from zombpyg.map.wall_grid import WallGrid
+from zombpyg.utils.pose_cache import PoseCache
 
 
 class DummyWorld(object):
     def __init__(self):
         # self.map = DummyMap()
         self.walls = []
+        self.wall_grid = WallGrid(self.walls)
+        self.sensor_cache = PoseCache()
+        self.profiler = None
+        self.rng = random.Random(0)
 
 
 # The following mostly just tests that we can instantiate an agent.
@@ -0,0 +1,71 @@
+# tests/test_array_multiagent_env.py
+import pytest
+import numpy as np
+from zombpyg.array_multiagent_env import ArrayMultiagentZombpygEnv
+from zombpyg.multiagent_env import MultiagentZombpygEnv
+
+
+world_config = {
+    "tag": "SingleMap",
+    "parameters": {"map_id": "open_room", "w": 640, "h": 480, "initial_zombies": 10, "minimum_zombies": 5}
+}
+
+def test_array_env_matches_dict_env():
+    agent_ids = ["a", "b", "c"]
+    array_env = ArrayMultiagentZombpygEnv(world_config=world_config, agent_ids=agent_ids)
+    dict_env = MultiagentZombpygEnv(world_config=world_config, agent_ids=agent_ids, render_mode=None)
+    observations, alive = array_env.reset(seed=2)
+    dict_observations, _ = dict_env.reset(seed=2)
+    assert observations.shape == (3, array_env.obs_dim) and observations.dtype == np.float32
+    assert np.all(alive)
+    assert array_env.observation_space.contains(observations)
+
+    for step in range(20):
+        actions = np.array([step % 14, (step + 3) % 14, (step + 7) % 14])
+        observations, rewards, terminations, truncations, alive = array_env.step(actions)
+        dict_observations, dict_rewards, _, _, _ = dict_env.step(dict(zip(agent_ids, actions.tolist())))
+        for idx, agent_id in enumerate(agent_ids):
+            if alive[idx]:
+                assert np.array_equal(observations[idx], dict_observations[agent_id].ravel())
+                assert rewards[idx] == dict_rewards[agent_id]
+        assert rewards.shape == terminations.shape == truncations.shape == (3,)
+
+def test_array_env_dead_agents():
+    env = ArrayMultiagentZombpygEnv(world_config=world_config, agent_ids=[0, 1])
+    env.reset(seed=0)
+    agent = env.game.world.agents[1]
+    agent.life = 0
+    observations, _, terminations, truncations, alive = env.step(np.array([0, 0]))
+    assert list(alive) == [True, False]
+    assert list(terminations) == [False, True]
+    assert not np.any(truncations)
+    assert np.all(observations[1] == 0.0) and np.any(observations[0] != 0.0)
+    # The actions of dead agents are ignored
+    position = agent.get_position()
+    env.step(np.array([0, 0]))
+    assert agent.get_position() == position
+
+def test_array_env_observation_encoding():
+    env = ArrayMultiagentZombpygEnv(world_config=world_config, agent_ids=["a", "b"], observation_encoding="uint8")
+    float_env = ArrayMultiagentZombpygEnv(world_config=world_config, agent_ids=["a", "b"])
+    observations, _ = env.reset(seed=3)
+    float_observations, _ = float_env.reset(seed=3)
+    assert observations.dtype == np.uint8
+    assert env.observation_space.contains(observations)
+    for _ in range(5):
+        observations, *_ = env.step(np.array([0, 5]))
+        float_observations, *_ = float_env.step(np.array([0, 5]))
+        assert np.allclose(observations / 127.5, float_observations, atol=1 / 127.5)
+
+def test_array_env_action_shape():
+    env = ArrayMultiagentZombpygEnv(world_config=world_config, agent_ids=[0, 1])
+    env.reset()
+    with pytest.raises(ValueError):
+        env.step(np.array([0]))
+
+def test_pettingzoo_parallel_api():
+    pytest.importorskip("pettingzoo")
+    from pettingzoo.test import parallel_api_test
+    from zombpyg.pettingzoo_env import ParallelZombpygEnv
+    env = ParallelZombpygEnv(world_config=world_config, agent_ids=["a", "b"], agent_weapons="knife")
+    parallel_api_test(env, num_cycles=200)
@@ -0,0 +1,75 @@
+# tests/test_async_vector_env.py
+import numpy as np
+import pytest
+from zombpyg.async_vector_env import AsyncVectorZombpygEnv
+
+
+world_config = {
+    "tag": "SingleMap",
+    "parameters": {"map_id": "demo", "w": 640, "h": 480, "initial_zombies": 5, "minimum_zombies": 2}
+}
+
+def test_async_vector_env_step_async_and_wait():
+    env = AsyncVectorZombpygEnv(num_envs=3, num_workers=2, world_config=world_config)
+    try:
+        observations, _ = env.reset(seed=0)
+        assert observations.shape == (3, 1, 312, 1)
+        assert env.observation_space.contains(observations)
+
+        env.step_async(np.array([0, 1, 2]))
+        with pytest.raises(RuntimeError):
+            env.step_async(np.array([0, 1, 2]))
+        observations, rewards, terminations, truncations, infos = env.step_wait()
+        assert observations.shape == (3, 1, 312, 1)
+        assert rewards.shape == terminations.shape == truncations.shape == (3,)
+        # The returned arrays are copies of the shared buffers
+        observations[:] = -1
+        assert np.all(env.buffers.arrays["observations"] >= 0)
+    finally:
+        env.close()
+    assert env.closed
+
+def test_async_vector_env_is_seedable():
+    def play(seed):
+        env = AsyncVectorZombpygEnv(num_envs=2, num_workers=2, world_config=world_config)
+        try:
+            observations = [env.reset(seed=seed)[0]]
+            for step in range(10):
+                observations.append(env.step(np.array([step % 14, (step + 5) % 14]))[0])
+        finally:
+            env.close()
+        return np.stack(observations)
+
+    assert np.array_equal(play(7), play(7))
+
+def test_async_vector_env_autoreset():
+    env = AsyncVectorZombpygEnv(num_envs=2, num_workers=1, world_config=world_config, max_episode_steps=2)
+    try:
+        env.reset()
+        _, _, _, truncations, infos = env.step(np.zeros((2,), dtype=int))
+        assert not np.any(truncations) and infos == {}
+        observations, _, _, truncations, infos = env.step(np.zeros((2,), dtype=int))
+        assert np.all(truncations)
+        assert list(infos["_final_obs"]) == [True, True]
+        assert infos["final_obs"][0].shape == observations[0].shape
+    finally:
+        env.close()
+
+def test_async_vector_env_worker_error():
+    env = AsyncVectorZombpygEnv(num_envs=1, world_config=world_config)
+    env.reset()
+    # A negative action raises in the worker, which is reported by the pool
+    with pytest.raises(RuntimeError, match="Error in a worker"):
+        env.step(np.array([-1]))
+    assert env.closed
+
+def test_async_vector_env_observation_encoding():
+    env = AsyncVectorZombpygEnv(num_envs=2, num_workers=2, world_config=world_config, observation_encoding="float16")
+    try:
+        observations, _ = env.reset(seed=0)
+        assert observations.dtype == np.float16
+        assert env.buffers.arrays["observations"].dtype == np.float16
+        observations, *_ = env.step(np.array([0, 1]))
+        assert env.observation_space.contains(observations)
+    finally:
+        env.close()
@@ -0,0 +1,33 @@
+# tests/test_bench.py
+import json
+from zombpyg.bench import BenchmarkScenario, build_scenarios, run_benchmark, parse_zombie_counts
+
+
+def test_build_scenarios():
+    scenarios = build_scenarios(
+        ["demo", "catacombs"], ["survival"], parse_zombie_counts(["5:0", "20:10"]), [1, 4], ["rifle"], seed=10
+    )
+    assert len(scenarios) == 8
+    assert [scenario.seed for scenario in scenarios] == list(range(10, 18))
+    assert (scenarios[-1].map_id, scenarios[-1].initial_zombies, scenarios[-1].minimum_zombies) == ("catacombs", 20, 10)
+
+def test_scenarios_are_reproducible():
+    def play(scenario):
+        game = scenario.build_game()
+        for step in range(30):
+            game.play_actions([step % 14, (3 * step) % 14])
+        return [zombie.get_position() for zombie in game.world.zombies] + [agent.get_position() for agent in game.world.agents]
+
+    scenario = BenchmarkScenario("demo", "survival", 10, 5, 2, "shotgun", seed=3)
+    assert play(scenario) == play(scenario)
+
+def test_run_benchmark_report():
+    scenarios = build_scenarios(["open_room"], ["extermination"], [(3, 0)], [2], ["axe"])
+    report = run_benchmark(scenarios, steps=5, warmup=1, trace_memory=True)
+    report = json.loads(json.dumps(report))
+    assert len(report["scenarios"]) == 1
+    result = report["scenarios"][0]
+    assert result["steps"] == 5
+    assert result["steps_per_sec"] > 0
+    assert result["latency_ms"]["p50"] <= result["latency_ms"]["p99"] <= result["latency_ms"]["max"]
+    assert result["peak_traced_kb"] > 0
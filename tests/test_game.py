@@ -0,0 +1,74 @@
+# tests/test_game.py
+import random
+import numpy as np
+import pytest
+from tests import helpers
+
+
+def build_game(seed, map_id="demo"):
+    return helpers.build_game(map_id, agent_ids=["robot0", "robot1"], agent_weapons="rifle", seed=seed)
+
+def test_frame_skip_matches_repeated_steps():
+    actions = [[0, 12], [4, 12], [5, 1], [12, 12]]
+    game = build_game(seed=4)
+    skipped = [game.play_actions(action_ids, num_frames=3) for action_ids in actions]
+
+    game = build_game(seed=4)
+    for action_ids, (rewards, observations, _, _) in zip(actions, skipped):
+        total_rewards = [0.0, 0.0]
+        for _ in range(3):
+            step_rewards, step_observations, _, _ = game.play_actions(action_ids)
+            total_rewards = [total + reward for total, reward in zip(total_rewards, step_rewards)]
+        assert np.allclose(rewards, total_rewards)
+        for observation, step_observation in zip(observations, step_observations):
+            assert np.array_equal(observation, step_observation)
+
+def test_frame_skip_stops_when_the_game_ends():
+    game = build_game(seed=0)
+    game.world.t = 300 - 1.5 * game.world.step_time_delta
+    _, observations, done, truncated = game.play_actions([0, 0], num_frames=10)
+    assert truncated and not done
+    # The game ended on the second frame
+    assert abs(game.world.t - (300 + 0.5 * game.world.step_time_delta)) < 1e-9
+    assert observations[0].shape == (1, game.feedback_size, 1)
+
+def test_frame_skip_must_be_positive():
+    game = build_game(seed=0)
+    with pytest.raises(ValueError):
+        game.play_actions([0, 0], num_frames=0)
+
+def record(game, outcome):
+    _, observations, done, truncated = outcome
+    positions = [fighter.get_position() for fighter in game.world.agents + game.world.zombies]
+    return (np.stack(observations), positions, done, truncated)
+
+def play(game, steps):
+    return helpers.play(game, steps, lambda step: [step % 14, (3 * step) % 14], record)
+
+@pytest.mark.parametrize("map_id", ["demo", "catacombs"])
+def test_games_with_the_same_seed_are_identical(map_id):
+    trace = play(build_game(seed=11, map_id=map_id), 30)
+    # The global generators play no part
+    random.seed(0)
+    np.random.seed(0)
+    helpers.assert_same_trace(play(build_game(seed=11, map_id=map_id), 30), trace)
+
+def test_reset_with_a_seed_replays_the_episode():
+    game = build_game(seed=2)
+    game.reset(seed=7)
+    trace = play(game, 30)
+    game.reset(seed=7)
+    helpers.assert_same_trace(play(game, 30), trace)
+    game.reset(seed=8)
+    assert not all(
+        np.array_equal(observations, other_observations)
+        for (observations, *_), (other_observations, *_) in zip(play(game, 30), trace)
+    )
+
+def test_games_leave_the_global_generators_alone():
+    game = build_game(seed=1)
+    state, numpy_state = random.getstate(), np.random.get_state()
+    game.reset(seed=3)
+    play(game, 20)
+    assert random.getstate() == state
+    assert np.array_equal(np.random.get_state()[1], numpy_state[1])
@@ -6,6 +6,8 @@ import gymnasium as gym
 import gymnasium.envs
 from gymnasium.utils.env_checker import check_env
 from zombpyg.gym_env import ZombpygGymEnv
+from zombpyg.multiagent_env import MultiagentZombpygEnv
+from zombpyg.utils.surroundings import Color
 
 
 def test_gym_env_observation():
@@ -44,3 +46,61 @@ def test_gym_make_env_v1():
     with not_raises(Exception):
         check_env(env.unwrapped, skip_render_check=True)
 
+
+def test_gym_env_rgb_array():
+    gym_env = ZombpygGymEnv(render_mode="rgb_array", render_scale=0.5)
+    gym_env.reset()
+    frame = gym_env.render()
+    assert frame.shape == (240, 320, 3)
+    assert frame.dtype == np.uint8
+    assert np.any(frame != frame[0, 0])
+    # The same buffer is reused for every frame
+    gym_env.step(0)
+    assert gym_env.render() is frame
+
+def test_multiagent_env_rgb_array():
+    env = MultiagentZombpygEnv(agent_ids=[0, 1], render_mode="rgb_array")
+    env.reset()
+    frame = env.render()
+    assert frame.shape == (480, 640, 3)
+    # The agents are drawn in blue
+    blue = np.all(frame == np.array(Color.BLUE[:3], dtype=np.uint8), axis=-1)
+    assert np.count_nonzero(blue) > 0
+
+def test_gym_env_frame_skip():
+    gym_env = ZombpygGymEnv(render_mode=None, frame_skip=4)
+    gym_env.reset()
+    gym_env.step(0)
+    assert abs(gym_env.game.world.t - 4 * gym_env.game.world.step_time_delta) < 1e-9
+
+def test_gym_env_reset_seed():
+    world_config = {
+        "tag": "SingleMap",
+        "parameters": {"map_id": "demo", "w": 640, "h": 480, "initial_zombies": 10, "minimum_zombies": 5}
+    }
+    def play(gym_env, seed):
+        observations = [gym_env.reset(seed=seed)[0]]
+        for step in range(20):
+            observations.append(gym_env.step(step % 14)[0])
+        return np.stack(observations)
+
+    gym_env = ZombpygGymEnv(world_config=world_config, render_mode=None)
+    observations = play(gym_env, 5)
+    assert np.array_equal(play(ZombpygGymEnv(world_config=world_config, render_mode=None), 5), observations)
+    assert np.array_equal(play(gym_env, 5), observations)
+
+def test_gym_env_observation_encoding():
+    gym_env = ZombpygGymEnv(player_specs="terminator:knife:0", observation_encoding="float16")
+    observation, _ = gym_env.reset(seed=0)
+    assert observation.dtype == np.float16
+    assert gym_env.observation_space.contains(observation)
+    observation, *_ = gym_env.step(0)
+    assert gym_env.observation_space.contains(observation)
+    with pytest.raises(ValueError):
+        ZombpygGymEnv(observation_encoding="bfloat16")
+
+def test_gym_env_visibility_cache_dir(tmp_path):
+    gym_env = ZombpygGymEnv(render_mode=None, visibility_cell_size=32, visibility_cache_dir=tmp_path)
+    gym_env.reset(seed=0)
+    assert gym_env.game.map.visibility.cell_size == 32
+    assert len(list(tmp_path.iterdir())) == 1
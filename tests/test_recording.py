@@ -0,0 +1,75 @@
+# tests/test_recording.py
+import os
+import pytest
+import numpy as np
+from zombpyg.recording import EpisodeReader, EVENT_CODES, FIGHTER_TYPES
+from tests import helpers
+
+
+def build_game(record_dir, initial_zombies=15):
+    return helpers.build_game(
+        "open_room", initial_zombies=initial_zombies, minimum_zombies=10, initialize_game=False,
+        agent_ids=["robot0", "robot1"], agent_weapons="rifle", player_specs="terminator:shotgun:2", seed=7,
+        record_dir=record_dir
+    )
+
+def test_recording_replays_the_episode(tmp_path):
+    game = build_game(str(tmp_path))
+    game.reset()
+    states = []
+    deaths = 0
+    for step in range(60):
+        # The world is stepped directly, as the game spawns zombies after the step has been recorded
+        game.world.step([step % 14, 12])
+        fighters = game.world.agents + game.world.players + game.world.zombies
+        states.append((
+            game.world.t,
+            sorted((fighter.x, fighter.y, fighter.life) for fighter in fighters if fighter.life > 0),
+            len(game.world.bullets),
+        ))
+        deaths = game.world.deaths
+    game.close()
+
+    reader = EpisodeReader(os.path.join(str(tmp_path), "episode-000000.zrec"))
+    assert (reader.w, reader.h) == (640, 480)
+    assert len(reader) == 61
+    # Seek backwards, starting at the end of the episode
+    for tick in reversed(range(1, 61)):
+        t, fighters, bullet_count = states[tick - 1]
+        assert abs(reader.get_time(tick) - t) < 1e-4
+        records = reader.get_fighters(tick)
+        assert sorted(zip(records["x"].tolist(), records["y"].tolist(), records["life"].tolist())) == pytest.approx(fighters)
+        assert len(reader.get_bullets(tick)) == bullet_count
+    events = np.concatenate([reader.get_events(tick) for tick in range(len(reader))])
+    assert deaths > 0
+    assert np.count_nonzero(events["code"] == EVENT_CODES["died"]) == deaths
+    assert set(FIGHTER_TYPES[code] for code in reader.get_fighters(0)["code"]) == {"agent", "player", "zombie"}
+
+def test_recordings_are_compact(tmp_path):
+    game = build_game(str(tmp_path), initial_zombies=50)
+    game.reset()
+    for step in range(100):
+        game.world.step([step % 14, 12])
+    game.close()
+    path = os.path.join(str(tmp_path), "episode-000000.zrec")
+    reader = EpisodeReader(path)
+    fighter_ticks = sum(len(reader.get_fighters(tick)) for tick in range(len(reader)))
+    # At most 12 bytes per living fighter and tick, so 15000 ticks of 50 fighters take less than 9 MB
+    assert os.path.getsize(path) <= 12 * fighter_ticks
+
+def test_each_episode_gets_a_file(tmp_path):
+    game = build_game(str(tmp_path))
+    game.reset()
+    game.play_actions([0, 0])
+    game.reset()
+    game.close()
+    assert sorted(os.listdir(str(tmp_path))) == ["episode-000000.zrec", "episode-000001.zrec"]
+    assert len(EpisodeReader(os.path.join(str(tmp_path), "episode-000000.zrec"))) == 2
+    assert len(EpisodeReader(os.path.join(str(tmp_path), "episode-000001.zrec"))) == 1
+
+def test_reader_rejects_other_files(tmp_path):
+    path = os.path.join(str(tmp_path), "other.zrec")
+    with open(path, "wb") as f:
+        f.write(b"not a recording, but long enough to hold a header")
+    with pytest.raises(ValueError):
+        EpisodeReader(path)
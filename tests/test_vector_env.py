@@ -0,0 +1,61 @@
+# tests/test_vector_env.py
+import numpy as np
+import gymnasium as gym
+import zombpyg.gym_env
+from zombpyg.vector_env import VectorZombpygEnv
+
+
+def test_vector_env_shapes():
+    env = VectorZombpygEnv(num_envs=3)
+    observations, _ = env.reset(seed=1)
+    feedback_size = env.games[0].agent_builder.get_feedback_size()
+    assert observations.shape == (3, 1, feedback_size, 1)
+    assert env.observation_space.contains(observations)
+
+    observations, rewards, terminations, truncations, infos = env.step(env.action_space.sample())
+    assert observations.shape == (3, 1, feedback_size, 1)
+    assert rewards.shape == terminations.shape == truncations.shape == (3,)
+    assert not np.any(terminations | truncations)
+    assert infos == {}
+    env.close()
+
+def test_vector_env_autoreset():
+    env = VectorZombpygEnv(num_envs=3)
+    env.reset()
+    # Finish the episode of the second game, which reaches the time limit of the game
+    env.games[1].world.t = 300
+    observations, _, terminations, truncations, infos = env.step(np.zeros((3,), dtype=int))
+    assert list(terminations | truncations) == [False, True, False]
+    assert list(infos["_final_obs"]) == [False, True, False]
+    assert infos["final_obs"][1].shape == observations[1].shape
+    # The game was reset in the same step
+    assert env.games[1].world.t == 0
+    assert np.array_equal(observations[1], env.games[1].get_current_feedback())
+
+def test_vector_env_max_episode_steps_and_partial_reset():
+    env = VectorZombpygEnv(num_envs=2, max_episode_steps=3)
+    env.reset()
+    for _ in range(2):
+        _, _, _, truncations, _ = env.step(np.zeros((2,), dtype=int))
+        assert not np.any(truncations)
+    _, _, _, truncations, _ = env.step(np.zeros((2,), dtype=int))
+    assert np.all(truncations)
+
+    env.step(np.zeros((2,), dtype=int))
+    env.reset(options={"reset_mask": np.array([True, False])})
+    assert list(env.episode_steps) == [0, 1]
+
+def test_make_vec():
+    env = gym.make_vec("jvstinian/Zombpyg-v1", num_envs=2, render_mode=None)
+    assert isinstance(env, VectorZombpygEnv)
+    observations, _ = env.reset()
+    assert observations.shape[0] == 2
+
+def test_vector_env_observation_encoding():
+    env = VectorZombpygEnv(num_envs=2, observation_encoding="uint8")
+    observations, _ = env.reset(seed=1)
+    assert observations.dtype == np.uint8
+    assert env.observation_space.contains(observations)
+    observations, *_ = env.step(env.action_space.sample())
+    assert env.observation_space.contains(observations)
+    env.close()
@@ -0,0 +1,50 @@
+# tests/test_world_snapshot.py
+import numpy as np
+from tests import helpers
+
+
+def build_game(seed):
+    return helpers.build_game(
+        "open_room", initial_zombies=15, minimum_zombies=10,
+        agent_ids=["robot0", "robot1"], agent_weapons="rifle", player_specs="terminator:shotgun:2", seed=seed
+    )
+
+def record(game, outcome):
+    _, observations, done, truncated = outcome
+    fighters = game.world.agents + game.world.players + game.world.zombies
+    return (
+        np.stack(observations),
+        [(fighter.x, fighter.y, fighter.orientation, fighter.life) for fighter in fighters],
+        [agent.weapon.ammo for agent in game.world.agents],
+        len(game.world.bullets), game.world.deaths, done, truncated,
+    )
+
+def play(game, steps):
+    return helpers.play(game, steps, lambda step: [step % 14, 12], record)
+
+def test_restore_replays_the_same_steps():
+    game = build_game(seed=7)
+    play(game, 5)
+    deaths = game.world.deaths
+    snapshot = game.world.snapshot()
+    trace = play(game, 60)
+    # Fighters died and bullets were fired after the snapshot
+    assert trace[-1][4] > deaths
+    assert sum(step[3] for step in trace) > 0
+
+    for _ in range(2):
+        game.world.restore(snapshot)
+        helpers.assert_same_trace(play(game, 60), trace)
+
+def test_restore_after_a_reset():
+    game = build_game(seed=8)
+    play(game, 5)
+    t = game.world.t
+    snapshot = game.world.snapshot()
+    trace = play(game, 30)
+
+    game.reset()
+    play(game, 10)
+    game.world.restore(snapshot)
+    assert game.world.t == t
+    helpers.assert_same_trace(play(game, 30), trace)
@@ -0,0 +1,95 @@
+# tests/utils/legacy_geometry.py
+# The gradient-based segment intersection that Wall.collide used before
+# zombpyg.utils.intersection, kept to check the new kernel against it.
+
+# Calc the gradient 'm' of a line between p1 and p2
+def calculate_gradient(p1, p2):
+    # Ensure that the line is not vertical
+    if (p1[0] != p2[0]):
+        m = (p1[1] - p2[1]) / (p1[0] - p2[0])
+        return m
+    else:
+        return None
+ 
+# Calc the point 'b' where line crosses the Y axis
+def calculate_yaxis_intersect(p, m):
+    return p[1] - (m * p[0])
+ 
+# Calc the point where two infinitely long lines (p1 to p2 and p3 to p4) intersect.
+# Handle parallel lines and vertical lines (the later has infinate 'm').
+# Returns a point tuple of points like this ((x,y),...)  or None
+# In non parallel cases the tuple will contain just one point.
+# For parallel lines that lay on top of one another the tuple will contain
+# all four points of the two lines
+def get_intersect_point(p1, p2, p3, p4):
+    m1 = calculate_gradient(p1, p2)
+    m2 = calculate_gradient(p3, p4)
+      
+    # See if the the lines are parallel
+    if (m1 != m2):
+        # See if either line is vertical
+        if (m1 is not None and m2 is not None):
+            # Neither line vertical           
+            b1 = calculate_yaxis_intersect(p1, m1)
+            b2 = calculate_yaxis_intersect(p3, m2)   
+            x = (b2 - b1) / (m1 - m2)       
+            y = (m1 * x) + b1           
+        else:
+            # Line 1 is vertical so use line 2's values
+            if (m1 is None):
+                b2 = calculate_yaxis_intersect(p3, m2)   
+                x = p1[0]
+                y = (m2 * x) + b2
+            # Line 2 is vertical so use line 1's values               
+            elif (m2 is None):
+                b1 = calculate_yaxis_intersect(p1, m1)
+                x = p3[0]
+                y = (m1 * x) + b1           
+            else:
+                assert False
+               
+        return ((x,y),)
+    else:
+        # Parallel lines with same 'b' value must be the same line so they intersect
+        # everywhere in this case we return the start and end points of both lines
+        # the calculateIntersectPoint method will sort out which of these points
+        # lays on both line segments
+        b1, b2 = None, None # vertical lines have no b value
+        if m1 is not None:
+            b1 = calculate_yaxis_intersect(p1, m1)
+           
+        if m2 is not None:   
+            b2 = calculate_yaxis_intersect(p3, m2)
+       
+        # If these parallel lines lay on one another   
+        if b1 == b2:
+            return p1,p2,p3,p4
+        else:
+            return None
+ 
+# For line segments (ie not infinitely long lines) the intersect point
+# may not lay on both lines.
+#   
+# We use a simple calculation to determine where the intersection 
+# point for the lines falls relative to each segment.  
+# If an intersection point falls on both line segments, the point is 
+# returned, otherwise None is returned.  
+def calculate_intersect_point(p1, p2, p3, p4):
+    p = get_intersect_point(p1, p2, p3, p4)
+    if p is not None:
+        for point in p:
+            l1 = calculate_parameter_of_point_on_segment(p1, p2, point)
+            l2 = calculate_parameter_of_point_on_segment(p3, p4, point)
+            if (0 <= l1) and (l1 <= 1) and (0 <= l2) and (l2 <= 1):
+                return point
+        return None            
+    else:
+        return None
+
+def calculate_parameter_of_point_on_segment(start, end, pt):
+    if start[0] != end[0]:
+        return (pt[0] - start[0])/(end[0] - start[0])
+    elif start[1] != end[1]:
+        return (pt[1] - start[1])/(end[1] - start[1])
+    else:
+        return 0.0
@@ -0,0 +1,106 @@
+# tests/utils/test_intersection.py
+import random
+
+import numpy as np
+from zombpyg.core.wall import Wall
+from zombpyg.utils.intersection import (
+    intersect_segments, intersect_ray_segment, point_on_segment,
+    intersect_segments_batch, intersect_rays_segments_batch,
+)
+from tests.utils.legacy_geometry import calculate_intersect_point as legacy_intersect_point
+
+
+def random_segment(rng, integer=False):
+    if integer:
+        return [(rng.randint(0, 100), rng.randint(0, 100)) for _ in range(2)]
+    return [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(2)]
+
+def test_intersect_segments_matches_legacy_in_general_position():
+    rng = random.Random(0)
+    n_hits = 0
+    for _ in range(2000):
+        p1, p2 = random_segment(rng)
+        p3, p4 = random_segment(rng)
+        parameters = intersect_segments(p1, p2, p3, p4)
+        expected = legacy_intersect_point(p1, p2, p3, p4)
+        if expected is None:
+            # The legacy bounds checks are exact, so near misses at the ends may differ
+            if parameters is not None:
+                assert min(parameters) < 1e-9 or max(parameters) > 1 - 1e-9
+            continue
+        assert parameters is not None
+        n_hits += 1
+        assert np.allclose(point_on_segment(p3, p4, parameters[1]), expected)
+        assert np.allclose(point_on_segment(p1, p2, parameters[0]), expected)
+    assert n_hits > 100
+
+def test_intersect_segments_axis_aligned():
+    # crossing
+    assert intersect_segments((0, 50), (100, 50), (40, 0), (40, 100)) == (0.4, 0.5)
+    # touching at an end
+    assert intersect_segments((0, 50), (40, 50), (40, 0), (40, 100)) == (1.0, 0.5)
+    # parallel but not collinear
+    assert intersect_segments((0, 0), (0, 100), (10, 0), (10, 100)) is None
+    # collinear and disjoint
+    assert intersect_segments((0, 0), (0, 10), (0, 20), (0, 30)) is None
+    # collinear and overlapping, in either direction
+    assert intersect_segments((0, 0), (0, 100), (0, 20), (0, 30)) == (0.2, 0.0)
+    assert np.allclose(intersect_segments((0, 100), (0, 0), (0, 20), (0, 30)), (0.7, 1.0))
+    # a point on a segment, and a point on a point
+    assert intersect_segments((0, 20), (0, 20), (0, 0), (0, 40)) == (0.0, 0.5)
+    assert intersect_segments((5, 5), (5, 5), (5, 5), (5, 5)) == (0.0, 0.0)
+    assert intersect_segments((5, 5), (5, 5), (5, 6), (5, 6)) is None
+
+def test_vertical_segments_no_longer_collide_with_vertical_walls():
+    # The gradient-based intersection took vertical segments against vertical
+    # walls to be on the same line, whatever their x coordinates
+    wall = Wall(start=(100, 0), end=(100, 100))
+    assert legacy_intersect_point((20, 50), (20, 10), wall.start, wall.end) is not None
+    assert wall.collide((20, 50), (20, 10)) is None
+    assert wall.collide((100, 50), (100, 150)) == (100, 50)
+
+def test_wall_collide_points_lie_on_the_wall():
+    rng = random.Random(1)
+    for _ in range(500):
+        p1, p2 = random_segment(rng)
+        x = rng.randint(0, 100)
+        wall = Wall(start=(x, 0), end=(x, 100))
+        point = wall.collide(p1, p2)
+        if point is not None:
+            assert point[0] == x
+
+def test_intersect_ray_segment():
+    assert intersect_ray_segment((0, 0), (1, 0), (10, -5), (10, 5)) == (10.0, 0.5)
+    assert intersect_ray_segment((0, 0), (-1, 0), (10, -5), (10, 5)) is None
+    # collinear, ahead of the origin and behind it
+    assert intersect_ray_segment((0, 0), (0, 2), (0, 10), (0, 20)) == (5.0, 0.0)
+    assert intersect_ray_segment((0, 0), (0, 2), (0, -10), (0, -20)) is None
+    assert intersect_ray_segment((0, 15), (0, 1), (0, 10), (0, 20)) == (0.0, 0.5)
+
+def test_batches_match_scalar_versions():
+    rng = random.Random(2)
+    segments = (
+        [random_segment(rng) for _ in range(100)] +
+        [random_segment(rng, integer=True) for _ in range(100)] +
+        # axis-aligned, collinear and degenerate segments
+        [[(0, y0), (0, y1)] for y0, y1 in ((0, 10), (5, 30), (30, 5), (50, 60), (7, 7))] +
+        [[(x0, 0), (x1, 0)] for x0, x1 in ((0, 10), (5, 30), (20, 20), (40, 0))]
+    )
+    segments = np.array(segments, dtype=float)
+    p1, p2 = segments[:, None, 0], segments[:, None, 1]
+    p3, p4 = segments[None, :, 0], segments[None, :, 1]
+
+    t, u, hits = intersect_segments_batch(p1, p2, p3, p4)
+    ray_t, ray_u, ray_hits = intersect_rays_segments_batch(p1, p2 - p1, p3, p4)
+    for i in range(len(segments)):
+        for j in range(len(segments)):
+            parameters = intersect_segments(segments[i, 0], segments[i, 1], segments[j, 0], segments[j, 1])
+            assert hits[i, j] == (parameters is not None)
+            if parameters is not None:
+                assert (t[i, j], u[i, j]) == parameters
+            parameters = intersect_ray_segment(
+                segments[i, 0], segments[i, 1] - segments[i, 0], segments[j, 0], segments[j, 1]
+            )
+            assert ray_hits[i, j] == (parameters is not None)
+            if parameters is not None:
+                assert (ray_t[i, j], ray_u[i, j]) == parameters
@@ -0,0 +1,54 @@
+# tests/utils/test_observations.py
+import random
+import pytest
+import numpy as np
+from zombpyg.utils.observations import (
+    compute_sensor_feedbacks, get_sector_distances, get_observation_space, encode_observations, decode_observations
+)
+from tests import helpers
+
+
+@pytest.mark.parametrize("map_id,rules_id", [("demo", "survival"), ("catacombs", "safehouse")])
+def test_batched_feedback_matches_per_agent_feedback(map_id, rules_id):
+    random.seed(0)
+    game = helpers.build_game(
+        map_id, initial_zombies=40, minimum_zombies=20, rules_id=rules_id,
+        agent_ids=[f"robot{i}" for i in range(6)], player_specs="terminator:rifle:2", seed=0
+    )
+    for _ in range(40):
+        agents = game.world.agents
+        for agent in agents:
+            agent.rotate(random.uniform(-10, 10))
+        batch = compute_sensor_feedbacks(agents, game.world)
+        for agent, feedback in zip(agents, batch):
+            expected = agent.sensor_feedback().reshape((-1, 8))
+            assert np.array_equal(feedback, expected)
+        game.play_actions([random.randrange(14) for _ in agents])
+
+def test_sector_distances():
+    distances = get_sector_distances(
+        np.array([[0.0, 0.0], [100.0, 0.0]]), np.array([0.0, 90.0]),
+        np.array([[-90.0, 0.0, 90.0]] * 2), np.array([[50.0, 50.0, 50.0]] * 2),
+        np.array([[0.0, -30.0], [130.0, 0.0]]), np.array([5.0, 5.0]),
+        exclude=np.array([[False, False], [False, True]])
+    )
+    # The first agent faces up and sees the first entity ahead, while the second faces
+    # right, and can't see the second entity (which is excluded) or the first (out of range)
+    assert distances[0].tolist() == [np.inf, 30.0, np.inf]
+    assert np.all(np.isinf(distances[1]))
+
+@pytest.mark.parametrize("encoding,tolerance", [("float32", 0.0), ("float16", 1e-3), ("uint8", 1 / 127.5)])
+def test_observation_encodings(encoding, tolerance):
+    feedbacks = np.random.default_rng(0).uniform(0.0, 2.0, size=(4, 312)).astype(np.float32)
+    feedbacks[0, :3] = [0.0, 1.0, 2.0]
+    observations = encode_observations(feedbacks, encoding)
+    assert observations.dtype == np.dtype(encoding)
+    assert get_observation_space(feedbacks.shape, encoding).contains(observations)
+    decoded = decode_observations(observations)
+    assert decoded.dtype == np.float32
+    assert np.max(np.abs(decoded - feedbacks)) <= tolerance
+    assert np.array_equal(decoded[0, :3], [0.0, 1.0, 2.0]) or encoding == "uint8"
+
+def test_invalid_observation_encoding():
+    with pytest.raises(ValueError):
+        get_observation_space((312,), "int8")
@@ -0,0 +1,94 @@
+# tests/utils/test_pose_cache.py
+import pytest
+import numpy as np
+from zombpyg.utils.pose_cache import PoseCache
+from zombpyg.utils.surroundings import get_movement_estimates
+from tests import helpers
+
+
+def test_lru_eviction():
+    cache = PoseCache(maxsize=2)
+    cache.put((0, 0, 0), "a")
+    cache.put((1, 0, 0), "b")
+    assert cache.get((0, 0, 0)) == "a"
+    cache.put((2, 0, 0), "c")
+    # (1, 0, 0) was the least recently used
+    assert cache.get((1, 0, 0)) is None
+    assert cache.get((0, 0, 0)) == "a"
+    assert cache.get((2, 0, 0)) == "c"
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+    assert cache.get_hit_rate() == 0.75
+
+def test_fifo_eviction():
+    cache = PoseCache(maxsize=2, eviction='fifo')
+    cache.put((0, 0, 0), "a")
+    cache.put((1, 0, 0), "b")
+    assert cache.get((0, 0, 0)) == "a"
+    cache.put((2, 0, 0), "c")
+    assert cache.get((0, 0, 0)) is None
+    assert cache.get((1, 0, 0)) == "b"
+
+def test_configure():
+    cache = PoseCache(maxsize=None)
+    for i in range(10):
+        cache.put((i, 0, 0), i)
+    assert len(cache) == 10
+    cache.configure(3, eviction='fifo')
+    assert len(cache) == 3
+    assert cache.get((9, 0, 0)) == 9
+    cache.configure(0)
+    cache.put((20, 0, 0), 20)
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        cache.configure(-1)
+    with pytest.raises(ValueError):
+        cache.configure(10, eviction='random')
+
+def test_cached_arrays_are_read_only():
+    cache = PoseCache()
+    cache.put((0, 0, 0), (np.zeros((3,)), [1, 2]))
+    arrays, _ = cache.get((0, 0, 0))
+    with pytest.raises(ValueError):
+        arrays[0] = 1.0
+    cache.put((1, 0, 0), np.ones((2,)))
+    assert not cache.get((1, 0, 0)).flags.writeable
+
+def test_cached_sensors_match_cast_sensors():
+    game = helpers.build_game("catacombs", initial_zombies=0, minimum_zombies=0)
+    agent = game.world.agents[0]
+    for action_id in [0, 4, 0, 10, 2, 4, 10, 0, 2] * 3:
+        agent.play_action(action_id)
+        ray_ends, distances, sensor_states = agent.cast_sensors(agent.x, agent.y)
+        assert agent.sensor_ray_ends.tolist() == ray_ends.tolist()
+        assert [(sensor.end_point, sensor.distance_to_wall, sensor.collide_point) for sensor in agent.sensors] == sensor_states
+    assert game.map.sensor_cache.hits > 0
+
+def play_zombies(movement_cache_size):
+    game = helpers.build_game(
+        "catacombs", initial_zombies=30, minimum_zombies=30, movement_cache_size=movement_cache_size, seed=5
+    )
+    for _ in range(100):
+        game.play_actions([12])
+    return game, [(zombie.get_position(), zombie.orientation) for zombie in game.world.zombies]
+
+def test_cached_movement_estimates_match_computed_estimates():
+    game, poses = play_zombies(16384)
+    _, uncached_poses = play_zombies(0)
+    # The estimates are the same whether or not they come from the cache
+    assert poses == uncached_poses
+    assert game.map.movement_cache.get_stats()["hit_rate"] > 0.5
+
+    zombie = game.world.zombies[0]
+    zombie.orientation = 30.4
+    zombie.get_movement_estimates()
+    hits = game.map.movement_cache.hits
+    cached = zombie.get_movement_estimates()
+    assert game.map.movement_cache.hits == hits + 1
+    # Computed for the quantized pose
+    estimates = get_movement_estimates(
+        zombie.get_position(), zombie.r, 30.0,
+        game.world.wall_grid.get_walls_near_circle(zombie.get_position(), zombie.vision_distance),
+        zombie.vision_distance
+    )
+    assert cached[:7] == estimates[:7]
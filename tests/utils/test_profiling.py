@@ -0,0 +1,62 @@
+# tests/utils/test_profiling.py
+from zombpyg.gym_env import ZombpygGymEnv
+from zombpyg.utils.profiling import StepProfiler
+from tests import helpers
+
+
+PHASES = ("bullets", "agent_actions", "fighter_actions", "resources_and_checkpoints", "observations", "cleanup")
+
+def build_game(profile):
+    return helpers.build_game(
+        agent_ids=["robot0", "robot1"], agent_weapons="rifle", player_specs="terminator:rifle:1", profile=profile
+    )
+
+def test_step_profiler():
+    profiler = StepProfiler()
+    start = profiler.start()
+    start = profiler.record("a", start)
+    profiler.record("a", start)
+    profiler.count("rays", 3)
+    profiler.count("rays")
+    profiler.end_step()
+    stats = profiler.get_stats()
+    assert stats["steps"] == 1
+    assert stats["phases"]["a"]["calls"] == 2
+    assert stats["counters"] == {"rays": 4}
+    profiler.reset()
+    assert profiler.get_stats() == {"steps": 0, "total_sec": 0, "phases": {}, "counters": {}}
+
+def test_game_step_stats():
+    game = build_game(profile=True)
+    for step in range(20):
+        game.play_actions([step % 14, 13])
+    stats = game.get_step_stats()
+    assert stats["steps"] == 20
+    assert set(stats["phases"]) == set(PHASES)
+    assert all(phase["calls"] == 20 for phase in stats["phases"].values())
+    assert abs(sum(phase["fraction"] for phase in stats["phases"].values()) - 1.0) < 1e-9
+    assert stats["counters"]["fighter_collision_checks"] > 0
+    assert stats["counters"]["sensor_ray_casts"] + stats["counters"].get("sensor_cache_hits", 0) > 0
+
+    # The stats are kept across episodes until reset
+    game.reset()
+    game.play_actions([0, 0])
+    assert game.get_step_stats()["steps"] == 21
+    game.reset_step_stats()
+    assert game.get_step_stats()["steps"] == 0
+
+def test_profiling_disabled_by_default():
+    game = build_game(profile=False)
+    game.play_actions([0, 0])
+    assert game.world.profiler is None
+    assert game.get_step_stats() is None
+
+def test_gym_env_step_stats_in_info():
+    gym_env = ZombpygGymEnv(render_mode=None, profile=True)
+    gym_env.reset()
+    _, _, _, _, info = gym_env.step(0)
+    assert info["step_stats"]["steps"] == 1
+    gym_env = ZombpygGymEnv(render_mode=None)
+    gym_env.reset()
+    _, _, _, _, info = gym_env.step(0)
+    assert "step_stats" not in info
@@ -0,0 +1,85 @@
+# tests/utils/test_raycast.py
+import numpy as np
+from zombpyg.core.wall import Wall
+from zombpyg.core.sensor import Sensor
+from zombpyg.utils.raycast import get_wall_segments, cast_rays
+from zombpyg.utils.geometry import calculate_distance
+from tests.utils import legacy_geometry
+
+
+walls = [
+    Wall(start=(0, 0), end=(100, 0)),
+    Wall(start=(100, 0), end=(100, 100)),
+    Wall(start=(50, 20), end=(50, 80)),
+]
+
+def test_cast_rays_nearest_wall():
+    wall_starts, wall_ends = get_wall_segments(walls)
+    distances, points, hits = cast_rays(
+        [[20, 50], [20, 50], [20, 50], [60, 50]],
+        [[90, 50], [20, 10], [20, 90], [60, 90]],
+        wall_starts, wall_ends
+    )
+    assert hits.tolist() == [True, False, False, False]
+    assert distances[0] == 30.0
+    assert points[0].tolist() == [50.0, 50.0]
+    assert np.all(np.isinf(distances[1:]))
+
+def test_cast_rays_collinear_wall():
+    wall_starts, wall_ends = get_wall_segments(walls)
+    distances, points, hits = cast_rays([[100, 120]], [[100, 50]], wall_starts, wall_ends)
+    assert hits[0]
+    assert distances[0] == 20.0
+    assert points[0].tolist() == [100.0, 100.0]
+
+def test_cast_rays_without_walls():
+    wall_starts, wall_ends = get_wall_segments([])
+    distances, _, hits = cast_rays([[0, 0]], [[10, 10]], wall_starts, wall_ends)
+    assert not hits[0]
+    assert np.isinf(distances[0])
+
+def get_legacy_sensor_collision(center, end_point):
+    # The nearest collision found by the gradient-based Wall.collide, before cast_rays
+    collision = None
+    for wall in walls:
+        point = legacy_geometry.calculate_intersect_point(center, end_point, wall.start, wall.end)
+        if point is not None:
+            point = (int(point[0]), int(point[1]))
+            distance = calculate_distance(center, point)
+            if (collision is None) or (distance < collision[0]):
+                collision = (distance, point)
+    return collision
+
+def test_cast_rays_matches_sensor():
+    wall_starts, wall_ends = get_wall_segments(walls)
+    for center in [(30, 40), (70, 50), (20, 90), (75, 10)]:
+        for angle in range(-165, 180, 15):
+            if (angle % 180) == 0:
+                continue
+            sensor = Sensor(center, angle, 80, walls, None)
+            distances, points, hits = cast_rays([sensor.center], [sensor.end_point], wall_starts, wall_ends)
+            collision = get_legacy_sensor_collision(sensor.center, sensor.end_point)
+            if collision is None:
+                assert not hits[0]
+                assert sensor.distance_to_wall is None
+            else:
+                assert hits[0]
+                assert abs(distances[0] - collision[0]) <= 1e-6
+                assert tuple(points[0].tolist()) == collision[1]
+                assert (sensor.distance_to_wall, sensor.collide_point) == (distances[0], collision[1])
+
+def test_cast_rays_vertical_sensors():
+    # The gradient-based code took all vertical lines for the same line, so vertical rays collided
+    # at their start whenever a vertical wall (here the one at x=50) spanned the y of their start
+    wall_starts, wall_ends = get_wall_segments(walls)
+    for angle, expected in [(0, (40.0, (30, 0))), (180, None)]:
+        sensor = Sensor((30, 40), angle, 80, walls, None)
+        assert get_legacy_sensor_collision(sensor.center, sensor.end_point) == (0.0, (30, 40))
+        distances, points, hits = cast_rays([sensor.center], [sensor.end_point], wall_starts, wall_ends)
+        if expected is None:
+            assert not hits[0]
+            assert sensor.distance_to_wall is None
+        else:
+            assert hits[0]
+            assert (distances[0], tuple(points[0].tolist())) == expected
+            assert (sensor.distance_to_wall, sensor.collide_point) == expected
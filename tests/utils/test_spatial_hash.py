@@ -0,0 +1,69 @@
+# tests/utils/test_spatial_hash.py
+import random
+import pytest
+from zombpyg.core.things import CircularThing
+from zombpyg.utils.geometry import calculate_distance
+from zombpyg.utils.spatial_hash import SpatialHash
+
+
+def make_things(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        CircularThing(rng.randint(0, 639), rng.randint(0, 479), 10, f"thing {i}", None, 1)
+        for i in range(count)
+    ]
+
+@pytest.mark.parametrize("cell_size", [8, 32, 100])
+def test_query_radius_matches_brute_force(cell_size):
+    things = make_things(200)
+    spatial_hash = SpatialHash(cell_size)
+    for thing in things:
+        spatial_hash.insert(thing)
+
+    for point, radius in [((320, 240), 50), ((0, 0), 15), ((600, 400), 120)]:
+        expected = {thing for thing in things if calculate_distance(point, thing.get_position()) < radius + thing.r}
+        assert set(spatial_hash.query_radius(point, radius)) == expected
+
+def test_update_and_remove():
+    thing = CircularThing(10, 10, 5, "thing", None, 1)
+    spatial_hash = SpatialHash(16)
+    spatial_hash.insert(thing)
+    assert spatial_hash.query_radius((12, 12), 1) == [thing]
+
+    thing.set_position(300, 300)
+    spatial_hash.update(thing)
+    assert spatial_hash.query_radius((12, 12), 1) == []
+    assert spatial_hash.query_radius((300, 300), 1) == [thing]
+
+    thing.life = 0
+    assert spatial_hash.query_radius((300, 300), 1) == []
+
+    spatial_hash.remove(thing)
+    assert len(spatial_hash) == 0
+    assert spatial_hash.cells == {}
+
+def test_query_cone():
+    ahead = CircularThing(100, 50, 10, "ahead", None, 1)
+    behind = CircularThing(100, 150, 10, "behind", None, 1)
+    spatial_hash = SpatialHash(32)
+    spatial_hash.insert(ahead)
+    spatial_hash.insert(behind)
+    found = spatial_hash.query_cone((100, 100), 0, 60, 45)
+    assert [thing for thing, _, _ in found] == [ahead]
+    _, angle, distance = found[0]
+    assert angle == 0.0
+    assert distance == 50.0
+
+def test_query_segment():
+    things = make_things(200, seed=1)
+    spatial_hash = SpatialHash(32)
+    for thing in things:
+        spatial_hash.insert(thing)
+    start, end = (0, 0), (639, 479)
+    candidates = set(spatial_hash.query_segment(start, end))
+    for thing in things:
+        x, y = thing.get_position()
+        # distance from the center to the diagonal of the map
+        distance = abs(479 * x - 639 * y) / calculate_distance(start, end)
+        if distance < thing.r:
+            assert thing in candidates
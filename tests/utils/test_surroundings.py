@@ -0,0 +1,56 @@
+# tests/utils/test_surroundings.py
+import random
+import pytest
+import numpy as np
+from zombpyg.map.map import MapFactory
+from zombpyg.core.wall import Wall
+from zombpyg.utils.surroundings import get_movement_estimates
+from tests.utils import legacy_surroundings
+
+
+def assert_same_estimates(estimates, legacy_estimates):
+    # The intervals are returned as lists rather than VisibleWallSegment objects
+    for value, legacy_value in zip(estimates[:7], legacy_estimates[:7]):
+        if legacy_value is None or isinstance(legacy_value, (bool, np.bool_)):
+            assert value == legacy_value
+        else:
+            assert value == pytest.approx(legacy_value, rel=1e-9, abs=1e-9)
+    assert len(estimates[7][0]) == len(legacy_estimates[7])
+
+@pytest.mark.parametrize("map_id", ["demo", "catacombs", "narrow_hallway", "tiny_space_v0", "open_room"])
+def test_movement_estimates_match_legacy_estimates_on_maps(map_id):
+    game_map = MapFactory.build_map(map_id, 640, 480)
+    rng = random.Random(0)
+    for idx in range(400):
+        # Integer poses, as in FightingThing.get_movement_estimates, and arbitrary ones
+        if idx % 2 == 0:
+            position, orientation = (rng.randint(0, 640), rng.randint(0, 480)), rng.randint(-179, 180)
+        else:
+            position, orientation = (rng.uniform(0, 640), rng.uniform(0, 480)), rng.uniform(-180, 180)
+        radius, vision_distance = rng.choice([(10, 60), (10, 100), (20, 150)])
+        walls = game_map.wall_grid.get_walls_near_circle(position, vision_distance)
+        assert_same_estimates(
+            get_movement_estimates(position, radius, orientation, walls, vision_distance),
+            legacy_surroundings.get_movement_estimates(position, radius, orientation, walls, vision_distance)
+        )
+
+def test_movement_estimates_match_legacy_estimates_with_random_walls():
+    rng = random.Random(1)
+    for _ in range(1000):
+        position = (rng.randint(100, 200), rng.randint(100, 200))
+        walls = []
+        for _ in range(rng.randint(0, 12)):
+            start = (rng.randint(40, 260), rng.randint(40, 260))
+            if rng.random() < 0.5:
+                # Axis-aligned walls, as on the maps
+                length = rng.randint(1, 150)
+                end = (start[0] + length, start[1]) if rng.random() < 0.5 else (start[0], start[1] + length)
+            else:
+                end = (rng.randint(40, 260), rng.randint(40, 260))
+            if end != start:
+                walls.append(Wall(start=start, end=end))
+        orientation = rng.choice([0, 90, -90, 180, rng.randint(-179, 180)])
+        assert_same_estimates(
+            get_movement_estimates(position, 10, orientation, walls, 80),
+            legacy_surroundings.get_movement_estimates(position, 10, orientation, walls, 80)
+        )
@@ -1,2 +1,2 @@
 
-__version__ = "0.10.2"
+__version__ = "0.10.27"
@@ -2,7 +2,8 @@ import numpy, pygame
 import bisect
 from zombpyg.core.bullet import Bullet
 from zombpyg.core.sensor import Sensor
-from zombpyg.utils.geometry import _valid_angle, get_angle_and_distance_to_point, calculate_distance
+from zombpyg.utils.raycast import cast_rays
+from zombpyg.utils.geometry import _valid_angle, get_angle_and_distance_to_point, get_angles_to_points, calculate_distance
 from zombpyg.utils.surroundings import Color
 from zombpyg.core.player import Player
 from zombpyg.actions import (
@@ -73,6 +74,8 @@ class AgentActions(object):
     
 
 class Agent(Player, MoveableThing, RotatableThing, AttackingThing):
+    fighter_type = 'agent'
+
     def __init__(
         self, 
         x, y, radius, world,
@@ -81,17 +84,24 @@ class Agent(Player, MoveableThing, RotatableThing, AttackingThing):
     ):
         super().__init__(
             x, y, radius,
-            'agent', color, weapon=weapon
+            'agent', color, weapon=weapon, rng=world.rng
         )
         self.agent_id = agent_id
         
         self.sensors = [
-            Sensor([x, y], sensor_angle, sensor_length, world.walls, self) 
+            Sensor([x, y], sensor_angle, sensor_length, world.walls, self, adjust_for_walls=False) 
             for sensor_angle, sensor_length in sensor_specs
         ]
         self.max_sensor_length = max(list(map(lambda sensor: sensor.length, self.sensors)))
+        self.sensor_angles = numpy.array([sensor.angle for sensor in self.sensors], dtype=float)
+        self.sensor_lengths = numpy.array([sensor.length for sensor in self.sensors], dtype=float)
+        self.world = world
+        self.wall_grid = world.wall_grid
+        self.sensor_cache = world.sensor_cache
+        self.sensor_key = (self.sensor_angles.tobytes(), self.sensor_lengths.tobytes())
         
         self.orientation = 0
+        self.update_sensors()
         self.step_size = self.r / 2
 
         self.direction_actions_n = AgentActions.direction_actions_n
@@ -112,14 +122,60 @@ class Agent(Player, MoveableThing, RotatableThing, AttackingThing):
         self.healing_of_others = 0
         self.checkpoints_reached = 0
 
-        self.world = world
-
     def update_steps(self):
         dx = int(self.step_size * numpy.sin(numpy.deg2rad(self.orientation)))
         dy = int(-self.step_size * numpy.cos(numpy.deg2rad(self.orientation)))
         self.step_forward = (dx, dy)
         self.step_right = (-dy, dx)
 
+    def cast_sensors(self, x, y):
+        """Cast the sensors from (x, y) against the walls, returning the end points and wall
+           distances of the sensors as arrays, along with the end point, wall distance and
+           wall collision point of each sensor.
+        """
+        angles = numpy.deg2rad(self.sensor_angles + self.orientation)
+        ray_ends = numpy.empty((len(self.sensors), 2))
+        ray_ends[:, 0] = x + numpy.trunc(self.sensor_lengths * numpy.sin(angles))
+        ray_ends[:, 1] = y + numpy.trunc(-self.sensor_lengths * numpy.cos(angles))
+        ray_starts = numpy.broadcast_to(numpy.array([x, y], dtype=float), ray_ends.shape)
+
+        candidates = self.wall_grid.get_candidates_for_rays(ray_starts, ray_ends)
+        if self.world.profiler is not None:
+            self.world.profiler.count("sensor_ray_casts", len(ray_ends))
+            self.world.profiler.count("sensor_wall_tests", len(ray_ends) * len(candidates))
+        distances, points, hits = cast_rays(
+            ray_starts, ray_ends,
+            self.wall_grid.wall_starts[candidates], self.wall_grid.wall_ends[candidates]
+        )
+        sensor_states = [
+            (tuple(end_point), distance, (int(point[0]), int(point[1]))) if hit else (tuple(end_point), None, None)
+            for end_point, distance, point, hit in zip(ray_ends.tolist(), distances.tolist(), points.tolist(), hits.tolist())
+        ]
+        return ray_ends, distances, sensor_states
+
+    def update_sensors(self):
+        """Update the end points and wall collisions of all sensors with a single ray cast,
+           or from the world's sensor cache when the pose has been seen before.
+        """
+        x, y = self.get_position()
+        key = (x, y, self.orientation, self.sensor_key)
+        cached = self.sensor_cache.get(key)
+        if cached is None:
+            cached = self.cast_sensors(x, y)
+            self.sensor_cache.put(key, cached)
+        elif self.world.profiler is not None:
+            self.world.profiler.count("sensor_cache_hits")
+        ray_ends, distances, sensor_states = cached
+
+        # Kept for computing the sensor feedback of all agents at once (see compute_sensor_feedbacks)
+        self.sensor_ray_ends = ray_ends
+        self.sensor_wall_distances = distances
+
+        center = (x, y)
+        for sensor, (end_point, distance, point) in zip(self.sensors, sensor_states):
+            sensor.set_pose(center, self.orientation, end_point)
+            sensor.set_wall_collision(distance, point)
+
     """An interactive agent, with the next action determined by a separate process."""
     def play_action(self, action_id: int):
         action = self.get_action(action_id)
@@ -155,16 +211,14 @@ class Agent(Player, MoveableThing, RotatableThing, AttackingThing):
         dx, dy = self.step_forward
         x, y = self.get_valid_position(self.x, self.y, self.x+dx, self.y+dy, self.world)
         self.set_position(x, y)
-        for sensor in self.sensors:
-            sensor.set_center(x, y)
+        self.update_sensors()
 
     def move_right(self) -> None:
         self.status = 'moving'
         dx, dy = self.step_right
         x, y = self.get_valid_position(self.x, self.y, self.x+dx, self.y+dy, self.world)
         self.set_position(x, y)
-        for sensor in self.sensors:
-            sensor.set_center(x, y)
+        self.update_sensors()
 
     def move_backward(self) -> None:
         self.status = 'moving'
@@ -173,8 +227,7 @@ class Agent(Player, MoveableThing, RotatableThing, AttackingThing):
         dy = -dy
         x, y = self.get_valid_position(self.x, self.y, self.x+dx, self.y+dy, self.world)
         self.set_position(x, y)
-        for sensor in self.sensors:
-            sensor.set_center(x, y)
+        self.update_sensors()
 
     def move_left(self) -> None:
         self.status = 'moving'
@@ -183,15 +236,13 @@ class Agent(Player, MoveableThing, RotatableThing, AttackingThing):
         dy = -dy
         x, y = self.get_valid_position(self.x, self.y, self.x+dx, self.y+dy, self.world)
         self.set_position(x, y)
-        for sensor in self.sensors:
-            sensor.set_center(x, y)
+        self.update_sensors()
     
     def rotate(self, angle: float):
         self.status = 'rotating'
         self.orientation = _valid_angle(self.orientation + angle)
         self.update_steps()
-        for sensor in self.sensors:
-            sensor.set_orientation(self.orientation)
+        self.update_sensors()
     
     def attack(self):
         self.weapon.use(self)
@@ -250,70 +301,50 @@ class Agent(Player, MoveableThing, RotatableThing, AttackingThing):
 
         return ammo_distances, medical_distances
         
-    def detect_zombies(self):
-        zombies = [zombie for zombie in self.world.zombies if zombie.life > 0]
+    def detect_fighters(self, fighter_types):
+        """Distances to the nearest living fighters of the given types along each sensor."""
+        rows, fighter_distances = self.world.fighters.query_radius(
+            self.get_position(), self.max_sensor_length, fighter_types=fighter_types, exclude=self
+        )
+        fighter_angles = get_angles_to_points(
+            self.get_position(), self.orientation, self.world.fighters.x[rows], self.world.fighters.y[rows]
+        )
         distances = [2*sensor.length for sensor in self.sensors]
         sensor_angles = list(map(lambda sensor: sensor.angle, self.sensors))
-        
-        for zombie in zombies:
-            angle, distance, _ = get_angle_and_distance_to_point(self.get_position(), self.orientation, zombie.get_position())
-            if distance >= self.max_sensor_length + zombie.r:
-                continue
-            rectified_angle = numpy.rad2deg(numpy.arctan2(zombie.r, distance))
+
+        for angle, distance, radius in zip(
+            fighter_angles.tolist(), fighter_distances.tolist(), self.world.fighters.radius[rows].tolist()
+        ):
+            rectified_angle = numpy.rad2deg(numpy.arctan2(radius, distance))
 
             lb = bisect.bisect_left(sensor_angles, angle - rectified_angle)
             ub = bisect.bisect_right(sensor_angles, angle + rectified_angle)
             for idx in range(lb, ub):
-                if distance >= self.sensors[idx].length + zombie.r:
+                if distance >= self.sensors[idx].length + radius:
                     continue
                 distances[idx] = min(distances[idx], distance)
         
         return distances
-        
-    def detect_players(self):
-        players_found = [
-            (agent, 'agent') for agent in self.world.agents if agent.life > 0
-        ] + [
-            (player, 'player') for player in self.world.players if player.life > 0
-        ] 
-        distances = [2*sensor.length for sensor in self.sensors]
-        sensor_angles = list(map(lambda sensor: sensor.angle, self.sensors))
-
-        for player, _ in players_found:
-            if player == self:
-                continue
-            angle, distance, _ = get_angle_and_distance_to_point(self.get_position(), self.orientation, player.get_position())
-            if distance >= self.max_sensor_length + player.r:
-                continue
-            rectified_angle = numpy.rad2deg(numpy.arctan2(player.r, distance))
 
-            lb = bisect.bisect_left(sensor_angles, angle - rectified_angle)
-            ub = bisect.bisect_right(sensor_angles, angle + rectified_angle)
-            for idx in range(lb, ub):
-                if distance >= self.sensors[idx].length + player.r:
-                    continue
-                distances[idx] = min(distances[idx], distance)
+    def detect_zombies(self):
+        return self.detect_fighters(('zombie',))
         
-        return distances
+    def detect_players(self):
+        return self.detect_fighters(('agent', 'player'))
     
     def find_heal_target(self):
         heal_distance = 4 * self.r
         max_heal_angle = 30.0
-        players = [
-            agent for agent in self.world.agents if agent.life > 0
-        ] + [
-            player for player in self.world.players if player.life > 0
-        ]
+        rows, distances = self.world.fighters.query_radius(
+            self.get_position(), heal_distance, include_radius=False, fighter_types=('agent', 'player'), exclude=self
+        )
+        angles = get_angles_to_points(
+            self.get_position(), self.orientation, self.world.fighters.x[rows], self.world.fighters.y[rows]
+        )
         min_distance = 1.01 * heal_distance # Set larger than healing distance
         target_player = None
         
-        for player in players:
-            if player == self:
-                continue
-            angle, distance, _ = get_angle_and_distance_to_point(self.get_position(), self.orientation, player.get_position())
-            if distance >= heal_distance:
-                continue
-            
+        for player, angle, distance in zip(self.world.fighters.get_fighters(rows), angles.tolist(), distances.tolist()):
             rectified_angle = numpy.rad2deg(numpy.arctan2(player.r, distance))
             if angle >= -max_heal_angle-rectified_angle and angle <= max_heal_angle+rectified_angle:
                 if distance < min_distance:
@@ -468,7 +499,7 @@ class AgentBuilder(object):
         self.friendly_fire_guard = friendly_fire_guard
     
     def build(self, agent_id, x, y, weapon_id, world):
-        weapon = WeaponFactory.create_weapon(weapon_id, friendly_fire_guard=self.friendly_fire_guard)
+        weapon = WeaponFactory.create_weapon(weapon_id, friendly_fire_guard=self.friendly_fire_guard, rng=world.rng)
         return Agent(
             x, y, self.radius, world,
             agent_id, self.color, self.sensor_specs,
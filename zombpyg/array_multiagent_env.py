@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+import numpy
+from gymnasium.spaces.discrete import Discrete
+from gymnasium.vector.utils import batch_space
+from zombpyg.game import Game
+from zombpyg.agent import AgentActions
+from zombpyg.utils.observations import get_observation_space, encode_observations
+
+
+class ArrayMultiagentZombpygEnv(object):
+    """Multiagent play with arrays in place of dictionaries keyed by the agents.
+
+    The actions are given as an integer array of shape (n_agents,), in the order of
+    agent_ids, and the observations are returned as an array of shape
+    (n_agents, obs_dim), along with arrays of the rewards, terminations, truncations
+    and of the agents still alive.  An agent is terminated when it dies or when the
+    game ends, after which its actions are ignored and its observations are zeros.
+
+    The returned arrays are preallocated buffers which are overwritten by the next
+    call to reset or step, and should be copied if they need to be kept.
+    """
+    # See the supported modes in the render method
+    metadata = {
+        'render_modes': ['human', 'rgb_array']
+    }
+
+    def __init__(self,
+        world_config={
+            "tag": "SingleMap",
+            "parameters": {
+                "map_id": "demo",
+                "w": 640,
+                "h": 480,
+                "initial_zombies": 0,
+                "minimum_zombies": 0
+            }
+        },
+        rules_id="survival",
+        agent_ids=[0],
+        agent_weapons="rifle",
+        player_specs="",
+        render_mode=None,
+        fps=50,
+        agent_reward_configuration={},
+        friendly_fire_guard=False,
+        verbose=False,
+        visibility_cell_size=None,
+        visibility_cache_dir=None,
+        render_scale=1.0,
+        frame_skip=1,
+        observation_encoding="float32"
+    ):
+        if render_mode is not None and (render_mode not in self.metadata['render_modes']):
+            raise ValueError(f"render_mode {render_mode} is not valid, must be one of {', '.join(self.metadata['render_modes'])}")
+        self.render_mode = render_mode
+
+        self.game = Game(
+            world_config,
+            rules_id=rules_id,
+            agent_ids=agent_ids,
+            agent_weapons=agent_weapons,
+            player_specs=player_specs,
+            enable_rendering=(render_mode == "human"),
+            fps=fps,
+            agent_reward_configuration=agent_reward_configuration,
+            friendly_fire_guard=friendly_fire_guard,
+            verbose=verbose,
+            visibility_cell_size=visibility_cell_size,
+            visibility_cache_dir=visibility_cache_dir,
+            render_scale=render_scale,
+        )
+        # Each action is repeated for frame_skip world steps (see Game.play_actions)
+        self.frame_skip = frame_skip
+
+        self.agent_ids = list(agent_ids)
+        self.n_agents = len(self.agent_ids)
+        self.obs_dim = self.game.feedback_size
+        self.single_action_space = Discrete(AgentActions.get_actions_n())
+        # The observations are float32, or float16 or uint8 to save memory (see encode_observations)
+        self.observation_encoding = observation_encoding
+        self.single_observation_space = get_observation_space((self.obs_dim,), observation_encoding)
+        self.action_space = batch_space(self.single_action_space, self.n_agents)
+        self.observation_space = batch_space(self.single_observation_space, self.n_agents)
+
+        # Preallocated buffers for the results of a step
+        self.observations = numpy.zeros((self.n_agents, self.obs_dim), dtype=self.single_observation_space.dtype)
+        self.rewards = numpy.zeros((self.n_agents,), dtype=numpy.float64)
+        self.terminations = numpy.zeros((self.n_agents,), dtype=bool)
+        self.truncations = numpy.zeros((self.n_agents,), dtype=bool)
+        self.alive = numpy.zeros((self.n_agents,), dtype=bool)
+        self.no_action_id = AgentActions.get_no_action_id()
+
+    def __update_observations__(self):
+        agents = self.game.world.agents
+        self.alive[:] = [agent.life > 0 for agent in agents]
+        # Only the living agents are observed
+        self.observations[~self.alive] = 0.0
+        living_agents = [agent for agent, alive in zip(agents, self.alive) if alive]
+        if living_agents:
+            self.observations[self.alive] = encode_observations(
+                self.game.world.get_sensor_feedback_array(living_agents), self.observation_encoding
+            )
+
+    def reset(self, seed=None, options=None):
+        """Start a new game, returning the observations and the mask of the living agents."""
+        self.game.reset(seed=seed)
+        self.rewards[:] = 0.0
+        self.terminations[:] = False
+        self.truncations[:] = False
+        self.__update_observations__()
+        return self.observations, self.alive
+
+    def step(self, actions):
+        """Play the actions of the agents, given as an array of shape (n_agents,).
+
+        Returns:
+            observations (ndarray): array of shape (n_agents, obs_dim), encoded with observation_encoding
+            rewards (ndarray): the rewards of the agents
+            terminations (ndarray): whether each agent died or the game ended
+            truncations (ndarray): whether the game was truncated
+            alive (ndarray): whether each agent is still alive
+        """
+        actions = numpy.asarray(actions)
+        if actions.shape != (self.n_agents,):
+            raise ValueError(f"Expected actions of shape {(self.n_agents,)}, not {actions.shape}")
+        # The actions of dead agents are ignored by the world
+        action_ids = numpy.where(self.alive, actions, self.no_action_id).tolist()
+
+        rewards, _, done, truncated = self.game.play_actions(
+            action_ids, num_frames=self.frame_skip, compute_observations=False
+        )
+        self.rewards[:] = rewards
+        self.__update_observations__()
+        self.terminations[:] = done
+        self.terminations |= ~self.alive
+        self.truncations[:] = truncated
+        return self.observations, self.rewards, self.terminations, self.truncations, self.alive
+
+    def render(self):
+        """Renders the environment, either to the display ('human') or as an RGB array ('rgb_array')."""
+        if self.render_mode == 'human':
+            self.game.draw()
+            return None
+        elif self.render_mode == 'rgb_array':
+            return self.game.get_frame()
+        else:
+            raise ValueError(f"render_mode={self.render_mode} is not supported")
+
+    def close(self):
+        self.game.close()
+
+    def __str__(self):
+        return '<{} instance>'.format(type(self).__name__)
+
+    def __enter__(self):
+        """Support with-statement for the environment. """
+        return self
+
+    def __exit__(self, *args):
+        """Support with-statement for the environment. """
+        self.close()
+        # propagate exception
+        return False
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+import multiprocessing
+import traceback
+from multiprocessing import shared_memory
+import numpy
+from gymnasium.spaces.discrete import Discrete
+from gymnasium.vector import VectorEnv, AutoresetMode
+from gymnasium.vector.utils import batch_space
+from zombpyg.game import Game
+from zombpyg.agent import AgentActions
+from zombpyg.utils.observations import get_observation_space, encode_observations
+
+
+class SharedBuffers(object):
+    """The arrays exchanged between the pool and its workers, each in a shared memory block.
+
+       The pool creates the blocks, and the workers attach to them by name, so that the
+       observations are written by the workers in place and never pickled.
+    """
+    def __init__(self, num_envs, observation_shape, names=None, observation_dtype=numpy.float32):
+        self.specs = {
+            "actions": ((num_envs,), numpy.int64),
+            "observations": ((num_envs,) + observation_shape, observation_dtype),
+            "final_observations": ((num_envs,) + observation_shape, observation_dtype),
+            "rewards": ((num_envs,), numpy.float64),
+            "terminations": ((num_envs,), numpy.bool_),
+            "truncations": ((num_envs,), numpy.bool_),
+        }
+        self.blocks = {}
+        self.arrays = {}
+        for key, (shape, dtype) in self.specs.items():
+            size = max(int(numpy.prod(shape)) * numpy.dtype(dtype).itemsize, 1)
+            if names is None:
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                block = shared_memory.SharedMemory(name=names[key])
+            self.blocks[key] = block
+            self.arrays[key] = numpy.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def get_names(self):
+        return {key: block.name for key, block in self.blocks.items()}
+
+    def close(self, unlink=False):
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if unlink:
+                block.unlink()
+        self.blocks = {}
+
+def _worker(
+    pipe, parent_pipe, buffer_names, num_envs, observation_shape, env_indices, game_kwargs,
+    max_episode_steps, frame_skip, observation_encoding
+):
+    """Play the games env_indices of the pool, taking commands from the pipe."""
+    parent_pipe.close()
+    buffers = SharedBuffers(
+        num_envs, observation_shape, names=buffer_names, observation_dtype=numpy.dtype(observation_encoding)
+    )
+    arrays = buffers.arrays
+    try:
+        games = [Game(enable_rendering=False, **game_kwargs) for _ in env_indices]
+        episode_steps = {idx: 0 for idx in env_indices}
+        pipe.send(("ready", None))
+        while True:
+            command, data = pipe.recv()
+            if command == "reset":
+                seed, reset_mask = data
+                for idx, game in zip(env_indices, games):
+                    if (reset_mask is None) or reset_mask[idx]:
+                        # Seeded by index, so the games don't depend on how they are spread over the workers
+                        game.reset(seed=None if seed is None else seed + idx)
+                        episode_steps[idx] = 0
+                        arrays["observations"][idx] = encode_observations(
+                            game.get_current_feedback(), observation_encoding
+                        )
+                pipe.send(("ok", None))
+            elif command == "step":
+                finished = []
+                for idx, game in zip(env_indices, games):
+                    reward, observation, done, truncated = game.play_action(
+                        int(arrays["actions"][idx]), num_frames=frame_skip
+                    )
+                    # Encoded in the worker, so only the encoded observations are shared
+                    observation = encode_observations(observation, observation_encoding)
+                    episode_steps[idx] += 1
+                    if (max_episode_steps is not None) and (episode_steps[idx] >= max_episode_steps):
+                        truncated = True
+                    arrays["rewards"][idx] = reward
+                    arrays["terminations"][idx] = done
+                    arrays["truncations"][idx] = truncated
+                    if done or truncated:
+                        arrays["final_observations"][idx] = observation
+                        game.reset()
+                        episode_steps[idx] = 0
+                        observation = encode_observations(game.get_current_feedback(), observation_encoding)
+                        finished.append(idx)
+                    arrays["observations"][idx] = observation
+                pipe.send(("ok", finished))
+            elif command == "close":
+                for game in games:
+                    game.close()
+                pipe.send(("ok", None))
+                break
+            else:
+                raise RuntimeError(f"Unknown command {command} sent to the worker")
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception:
+        pipe.send(("error", traceback.format_exc()))
+    finally:
+        buffers.close()
+        pipe.close()
+
+class AsyncVectorZombpygEnv(VectorEnv):
+    """N games, each with a single agent, spread over a pool of worker processes.
+
+    Each worker plays a contiguous block of the games, and writes their observations,
+    rewards and flags into shared memory, so only commands and the indices of the
+    finished games go through the pipes.  The actions are also passed through shared
+    memory.  As with VectorZombpygEnv, finished games are reset in the same step.
+
+    step_async and step_wait split a step, so that the next actions can be computed
+    while the games are played.
+    """
+    metadata = {
+        'render_modes': [],
+        'autoreset_mode': AutoresetMode.SAME_STEP,
+    }
+
+    def __init__(
+        self,
+        num_envs=1,
+        num_workers=None,
+        world_config={
+            "tag": "SingleMap",
+            "parameters": {
+                "map_id": "demo",
+                "w": 640,
+                "h": 480,
+                "initial_zombies": 0,
+                "minimum_zombies": 0
+            }
+        },
+        rules_id="survival",
+        agent_weapon="rifle",
+        player_specs="",
+        render_mode=None,
+        fps=50,
+        agent_reward_configuration={},
+        friendly_fire_guard=False,
+        verbose=False,
+        visibility_cell_size=None,
+        visibility_cache_dir=None,
+        max_episode_steps=None,
+        frame_skip=1,
+        observation_encoding="float32",
+        context=None
+    ):
+        if num_envs < 1:
+            raise ValueError(f"The number of environments must be positive, not {num_envs}")
+        if render_mode is not None:
+            raise ValueError(f"In vectorized environment, render_mode {render_mode} is not valid, must be None")
+        self.render_mode = render_mode
+        self.num_envs = num_envs
+        if num_workers is None:
+            num_workers = min(num_envs, multiprocessing.cpu_count())
+        self.num_workers = max(1, min(num_workers, num_envs))
+
+        game_kwargs = {
+            "world_config": world_config,
+            "rules_id": rules_id,
+            "agent_ids": [0],
+            "agent_weapons": [agent_weapon],
+            "player_specs": player_specs,
+            "fps": fps,
+            "agent_reward_configuration": agent_reward_configuration,
+            "friendly_fire_guard": friendly_fire_guard,
+            "verbose": verbose,
+            "visibility_cell_size": visibility_cell_size,
+            "visibility_cache_dir": visibility_cache_dir,
+        }
+        # The games are only created in the workers, but an uninitialized game gives the observation shape
+        observation_shape = Game(
+            enable_rendering=False, **dict(game_kwargs, agent_reward_configuration=dict(agent_reward_configuration))
+        ).get_feedback_size()
+        self.single_action_space = Discrete(AgentActions.get_actions_n())
+        # The observations are float32, or float16 or uint8 to save memory (see encode_observations)
+        self.observation_encoding = observation_encoding
+        self.single_observation_space = get_observation_space(observation_shape, observation_encoding)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        self.buffers = SharedBuffers(num_envs, observation_shape, observation_dtype=self.single_observation_space.dtype)
+        ctx = multiprocessing.get_context(context)
+        self.pipes = []
+        self.processes = []
+        for env_indices in numpy.array_split(numpy.arange(num_envs), self.num_workers):
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                name=f"zombpyg-worker-{env_indices[0]}",
+                args=(
+                    child_pipe, parent_pipe, self.buffers.get_names(), num_envs,
+                    observation_shape, env_indices.tolist(), game_kwargs,
+                    max_episode_steps, frame_skip, observation_encoding
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_pipe.close()
+            self.pipes.append(parent_pipe)
+            self.processes.append(process)
+        self.waiting = None
+        self.closed = False
+        self.__receive__()
+
+    def __send__(self, command, data=None):
+        for pipe in self.pipes:
+            pipe.send((command, data))
+
+    def __receive__(self, timeout=None):
+        results = []
+        errors = []
+        for pipe in self.pipes:
+            if (timeout is not None) and not pipe.poll(timeout):
+                raise multiprocessing.TimeoutError(f"The workers did not respond within {timeout} seconds")
+            status, data = pipe.recv()
+            if status == "error":
+                errors.append(data)
+            results.append(data)
+        if errors:
+            self.close(terminate=True)
+            raise RuntimeError("Error in a worker of the environment pool:\n" + "\n".join(errors))
+        return results
+
+    def __check_not_waiting__(self):
+        if self.closed:
+            raise RuntimeError("The environment pool has been closed")
+        if self.waiting is not None:
+            raise RuntimeError(f"Calling another method while waiting for the pending call to {self.waiting}")
+
+    def reset_async(self, seed=None, options=None):
+        self.__check_not_waiting__()
+        if seed is not None:
+            self._np_random_seed = seed
+        reset_mask = None if options is None else options.get("reset_mask")
+        if reset_mask is not None:
+            reset_mask = numpy.asarray(reset_mask, dtype=bool).tolist()
+        self.__send__("reset", (seed, reset_mask))
+        self.waiting = "reset"
+
+    def reset_wait(self, timeout=None):
+        if self.waiting != "reset":
+            raise RuntimeError("Calling reset_wait without any prior call to reset_async")
+        self.__receive__(timeout=timeout)
+        self.waiting = None
+        return self.buffers.arrays["observations"].copy(), {}
+
+    def reset(self, seed=None, options=None):
+        """Reset all the games, or only those selected by the boolean array options["reset_mask"]."""
+        self.reset_async(seed=seed, options=options)
+        return self.reset_wait()
+
+    def step_async(self, actions):
+        self.__check_not_waiting__()
+        actions = numpy.asarray(actions)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(f"Expected actions of shape {(self.num_envs,)}, not {actions.shape}")
+        self.buffers.arrays["actions"][:] = actions
+        self.__send__("step")
+        self.waiting = "step"
+
+    def step_wait(self, timeout=None):
+        if self.waiting != "step":
+            raise RuntimeError("Calling step_wait without any prior call to step_async")
+        results = self.__receive__(timeout=timeout)
+        self.waiting = None
+
+        arrays = self.buffers.arrays
+        infos = {}
+        for finished in results:
+            for idx in finished:
+                infos = self._add_info(
+                    infos, {"final_obs": arrays["final_observations"][idx].copy(), "final_info": {}}, idx
+                )
+        return (
+            arrays["observations"].copy(), arrays["rewards"].copy(),
+            arrays["terminations"].copy(), arrays["truncations"].copy(), infos
+        )
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close_extras(self, timeout=None, terminate=False):
+        if self.closed:
+            return
+        self.closed = True
+        if not terminate:
+            try:
+                if self.waiting is not None:
+                    self.__receive__(timeout=timeout)
+                self.__send__("close")
+                for pipe in self.pipes:
+                    pipe.recv()
+            except (EOFError, OSError, RuntimeError):
+                terminate = True
+        for process in self.processes:
+            if terminate and process.is_alive():
+                process.terminate()
+            process.join()
+        for pipe in self.pipes:
+            pipe.close()
+        self.buffers.close(unlink=True)
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close(terminate=True)
@@ -0,0 +1,211 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy
+# The JSON report may be written to standard output, so pygame's greeting is hidden
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from zombpyg import __version__
+from zombpyg.agent import AgentActions
+from zombpyg.game import Game
+from zombpyg.map.map import MapFactory
+from zombpyg.rules.factory import RulesFactory
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+
+class BenchmarkScenario(object):
+    """A headless game configuration to time, played with seeded random actions."""
+    def __init__(
+        self, map_id, rules_id, initial_zombies, minimum_zombies,
+        agent_count, weapon, player_specs="", seed=0
+    ):
+        self.map_id = map_id
+        self.rules_id = rules_id
+        self.initial_zombies = initial_zombies
+        self.minimum_zombies = minimum_zombies
+        self.agent_count = agent_count
+        self.weapon = weapon
+        self.player_specs = player_specs
+        self.seed = seed
+
+    def to_dict(self):
+        return {
+            "map_id": self.map_id,
+            "rules_id": self.rules_id,
+            "initial_zombies": self.initial_zombies,
+            "minimum_zombies": self.minimum_zombies,
+            "agent_count": self.agent_count,
+            "weapon": self.weapon,
+            "player_specs": self.player_specs,
+            "seed": self.seed,
+        }
+
+    def build_game(self, profile=False):
+        world_config = {
+            "tag": "SingleMap",
+            "parameters": {
+                "map_id": self.map_id,
+                "w": 640,
+                "h": 480,
+                "initial_zombies": self.initial_zombies,
+                "minimum_zombies": self.minimum_zombies,
+            }
+        }
+        return Game(
+            world_config,
+            rules_id=self.rules_id,
+            agent_ids=[f"robot{idx}" for idx in range(self.agent_count)],
+            agent_weapons=self.weapon,
+            player_specs=self.player_specs,
+            initialize_game=True,
+            enable_rendering=False,
+            profile=profile,
+            seed=self.seed,
+        )
+
+def build_scenarios(map_ids, rules_ids, zombie_counts, agent_counts, weapons, player_specs="", seed=0):
+    """The scenarios for every combination of the arguments, with consecutive seeds starting from seed.
+
+       The zombie counts are pairs (initial_zombies, minimum_zombies).
+    """
+    scenarios = []
+    combinations = itertools.product(map_ids, rules_ids, zombie_counts, agent_counts, weapons)
+    for idx, (map_id, rules_id, (initial_zombies, minimum_zombies), agent_count, weapon) in enumerate(combinations):
+        scenarios.append(
+            BenchmarkScenario(
+                map_id, rules_id, initial_zombies, minimum_zombies, agent_count, weapon,
+                player_specs=player_specs, seed=seed + idx
+            )
+        )
+    return scenarios
+
+def get_max_rss_kb():
+    """The peak resident set size of the process in kilobytes, or None where unavailable."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+def run_scenario(scenario, steps=200, warmup=20, trace_memory=False, profile=False):
+    """Play the scenario for warmup plus steps steps, resetting the game when an episode ends,
+       and return the timings of the last steps steps.
+    """
+    game = scenario.build_game(profile=profile)
+    action_rng = random.Random(scenario.seed)
+    actions_n = AgentActions.get_actions_n()
+    if trace_memory:
+        tracemalloc.start()
+
+    latencies = numpy.zeros((steps,))
+    resets = 0
+    for step in range(-warmup, steps):
+        action_ids = [action_rng.randrange(actions_n) for _ in range(scenario.agent_count)]
+        start = time.perf_counter()
+        _, _, done, truncated = game.play_actions(action_ids)
+        if step >= 0:
+            latencies[step] = time.perf_counter() - start
+        elif step == -1:
+            game.reset_step_stats()
+        if done or truncated:
+            # Resets are not included in the step latencies
+            game.reset()
+            resets += 1
+
+    result = scenario.to_dict()
+    total = latencies.sum()
+    result.update({
+        "steps": steps,
+        "resets": resets,
+        "steps_per_sec": steps / total if total > 0 else None,
+        "latency_ms": {
+            "mean": 1000.0 * latencies.mean() if steps > 0 else None,
+            "p50": 1000.0 * numpy.percentile(latencies, 50) if steps > 0 else None,
+            "p90": 1000.0 * numpy.percentile(latencies, 90) if steps > 0 else None,
+            "p99": 1000.0 * numpy.percentile(latencies, 99) if steps > 0 else None,
+            "max": 1000.0 * latencies.max() if steps > 0 else None,
+        },
+        "max_rss_kb": get_max_rss_kb(),
+    })
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_traced_kb"] = peak // 1024
+    if profile:
+        result["step_stats"] = game.get_step_stats()
+    return result
+
+def run_benchmark(scenarios, steps=200, warmup=20, trace_memory=False, profile=False, verbose=False):
+    results = []
+    for scenario in scenarios:
+        result = run_scenario(scenario, steps=steps, warmup=warmup, trace_memory=trace_memory, profile=profile)
+        if verbose:
+            print(
+                f"{scenario.map_id}/{scenario.rules_id} zombies={scenario.initial_zombies}:{scenario.minimum_zombies} "
+                f"agents={scenario.agent_count} weapon={scenario.weapon}: {result['steps_per_sec']:.1f} steps/s",
+                file=sys.stderr
+            )
+        results.append(result)
+    return {
+        "zombpyg_version": __version__,
+        "python_version": platform.python_version(),
+        "numpy_version": numpy.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "steps": steps,
+        "warmup": warmup,
+        "scenarios": results,
+    }
+
+def parse_zombie_counts(zombie_specs):
+    zombie_counts = []
+    for zombie_spec in zombie_specs:
+        parts = zombie_spec.split(':')
+        if len(parts) != 2:
+            raise ValueError(f"{zombie_spec} is not a valid zombie count.  Value must be given as initial:minimum.")
+        zombie_counts.append((int(parts[0]), int(parts[1])))
+    return zombie_counts
+
+def main():
+    parser = argparse.ArgumentParser(description="zombpyg simulation benchmark")
+    parser.add_argument("-m", "--maps", dest="map_ids", metavar="MAP_ID", type=str, nargs="+", default=list(MapFactory.MAP_IDS), help="The map ids (all maps by default)")
+    parser.add_argument("-r", "--rules", dest="rules_ids", metavar="RULES_ID", type=str, nargs="+", default=list(RulesFactory.RULES_IDS), help="The rules ids (all rules by default)")
+    parser.add_argument("-z", "--zombies", dest="zombie_specs", metavar="INITIAL:MINIMUM", type=str, nargs="+", default=["5:0", "20:10"], help="The initial and minimum amounts of zombies")
+    parser.add_argument("-a", "--agents", dest="agent_counts", metavar="NUMBER", type=int, nargs="+", default=[1, 4], help="The numbers of agents")
+    parser.add_argument("-w", "--weapons", dest="weapons", metavar="WEAPON_ID", type=str, nargs="+", default=["rifle", "shotgun", "axe"], help="The weapons of the agents")
+    parser.add_argument("--players", dest="player_specs", metavar="PLAYER_TYPE:WEAPON:COUNT,...", type=str, default="", help="The players specified as a comma-separated list of player_id:weapon_id:count")
+    parser.add_argument("--steps", dest="steps", metavar="NUMBER", type=int, default=200, help="The number of timed steps per scenario")
+    parser.add_argument("--warmup", dest="warmup", metavar="NUMBER", type=int, default=20, help="The number of untimed steps played first in each scenario")
+    parser.add_argument("--seed", dest="seed", metavar="NUMBER", type=int, default=0, help="The seed of the first scenario")
+    parser.add_argument("--trace-memory", dest="trace_memory", default=False, action="store_true", help="Report the peak memory allocated by Python, which slows the steps down")
+    parser.add_argument("--profile", dest="profile", default=False, action="store_true", help="Report the time spent in each phase of the steps")
+    parser.add_argument("-o", "--output", dest="output", metavar="FILE", type=str, default=None, help="Write the JSON report to FILE rather than standard output")
+    parser.add_argument("--verbose", dest="verbose", default=False, action="store_true")
+
+    args = parser.parse_args()
+    scenarios = build_scenarios(
+        args.map_ids, args.rules_ids, parse_zombie_counts(args.zombie_specs),
+        args.agent_counts, args.weapons, player_specs=args.player_specs, seed=args.seed
+    )
+    report = run_benchmark(
+        scenarios, steps=args.steps, warmup=args.warmup,
+        trace_memory=args.trace_memory, profile=args.profile, verbose=args.verbose
+    )
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 import numpy
 import pygame
-from operator import itemgetter
 
-from zombpyg.utils.geometry import calculate_parameter_of_point_on_segment, get_nearest_point_and_distance_to_path
+from zombpyg.utils.raycast import cast_rays
 from zombpyg.utils.surroundings import Color
 
 
@@ -22,82 +21,29 @@ class Bullet(object):
         self.world = world
         self.first_hit_occurred = False
 
-    def collide_with_walls(self, start, end):
-        closest_wall_point = None
-        min_l = 1.01 # Set to > 1 in case end is on a wall
-        for wall in self.world.walls:
-            point = wall.collide(start, end)
-            if point is not None:
-                l = calculate_parameter_of_point_on_segment(start, end, point)
-                if l < min_l:
-                    closest_wall_point = point
-                    min_l = min(min_l, l)
-        return closest_wall_point
-
-    def next_step(self):
-        dt = self.world.step_time_delta
-        end = (
-            self.current_location[0] + dt * self.speed * self.direction[0],
-            self.current_location[1] + dt * self.speed * self.direction[1]
-        )
-        hits_wall = False
-        wall_point = self.collide_with_walls(self.current_location, end)
-        if wall_point is not None:
-            end = wall_point
-            hits_wall = True
-
-        potential_targets = [
-            (agent, 'agent') for agent in self.world.agents if agent.life > 0
-        ] + [
-            (player, 'player') for player in self.world.players if player.life > 0
-        ] + [
-            (zombie, 'zombie') for zombie in self.world.zombies if zombie.life > 0
-        ]
-        potential_hits = []
-        for fighter, fighter_type in potential_targets:
-            near_pt, fighter_dist, _ = get_nearest_point_and_distance_to_path(self.current_location, end, fighter.get_position())
-            if fighter_dist < fighter.r:
-                ell = calculate_parameter_of_point_on_segment(self.current_location, end, near_pt)
-                potential_hits.append(
-                    (fighter, fighter_type, fighter_dist, ell)
-                )
-        potential_hits = sorted(potential_hits, key=itemgetter(3), reverse=False)
-        for fighter, fighter_type, fighter_dist, ell in potential_hits:
-            if fighter == self.agent:
-                # Shouldn't happen, but just in case
-                continue
-            damage = 0
-            if fighter_dist < fighter.r/2:
-                damage = 100.0
-            elif fighter_dist < fighter.r:
-                damage = numpy.random.randint(*self.damage_range)
-            fighter.life -= damage
-            self.max_total_damage -= damage
-            if (fighter_type == "zombie") and not self.first_hit_occurred:
-                self.first_hit_occurred = True
-                self.agent.attack_hits += 1
-
-            if fighter.life <= 0:
-                if fighter_type == "zombie":
-                    self.agent.zombies_killed += 1
-                elif (fighter_type == "player") or (fighter_type == "agent"):
-                    self.agent.fratricide += 1
+    def apply_hit(self, fighter, fighter_dist):
+        fighter_type = fighter.fighter_type
+        damage = 0
+        if fighter_dist < fighter.r/2:
+            damage = 100.0
+        elif fighter_dist < fighter.r:
+            damage = self.world.np_rng.integers(*self.damage_range)
+        fighter.life -= damage
+        self.max_total_damage -= damage
+        if (fighter_type == "zombie") and not self.first_hit_occurred:
+            self.first_hit_occurred = True
+            self.agent.attack_hits += 1
+
+        if fighter.life <= 0:
+            if fighter_type == "zombie":
+                self.agent.zombies_killed += 1
             elif (fighter_type == "player") or (fighter_type == "agent"):
-                self.agent.friendly_fire += 1
-
-            if self.max_total_damage <= 0:
-                break
+                self.agent.fratricide += 1
+        elif (fighter_type == "player") or (fighter_type == "agent"):
+            self.agent.friendly_fire += 1
 
-        # Update state
-        self.current_location = end
-        self.time_remaining -= dt
-        if (
-            hits_wall or (self.time_remaining <= 0) or
-            (self.max_total_damage <= 0) or
-            (self.current_location[0] < 0) or (self.current_location[0] >= self.world.w) or
-            (self.current_location[1] < 0) or (self.current_location[1] >= self.world.h)
-        ):
-            self.active = False
+    def next_step(self):
+        step_bullets([self], self.world)
 
     def get_path_decoration(self):
         dt = self.world.step_time_delta
@@ -130,4 +76,93 @@ class BulletDecoration(object):
         self.life -= amount
 
     def draw(self, game):
-        pygame.draw.line(game.DISPLAYSURF, Bullet.color, self.start, self.end, BulletDecoration.width)
\ No newline at end of file
+        pygame.draw.line(game.DISPLAYSURF, Bullet.color, self.start, self.end, BulletDecoration.width)
+
+
+# The positions of the fighters in the list of their type in the world (agents, players or zombies)
+def get_list_positions(world, targets):
+    if len(targets) == 0:
+        return numpy.zeros((0,), dtype=int)
+    positions = {}
+    for group in (world.agents, world.players, world.zombies):
+        positions.update((fighter, idx) for idx, fighter in enumerate(group))
+    return numpy.array([positions.get(fighter, 0) for fighter in targets], dtype=int)
+
+# The following advances the bullets by one time step together.  The paths of all the
+# bullets are cast against the walls at once, and the distances from all the living fighters
+# to the paths are computed at once.  The damage is then applied bullet by bullet, in the
+# order of the bullets, and to the fighters along each path in the order they are met,
+# so that a fighter killed by a bullet isn't hit by the following bullets.
+def step_bullets(bullets, world):
+    if len(bullets) == 0:
+        return
+    dt = world.step_time_delta
+    starts = numpy.array([bullet.current_location for bullet in bullets], dtype=float)
+    speeds = numpy.array([bullet.speed for bullet in bullets], dtype=float)
+    directions = numpy.array([bullet.direction for bullet in bullets], dtype=float)
+    ends = numpy.empty_like(starts)
+    ends[:, 0] = starts[:, 0] + dt * speeds * directions[:, 0]
+    ends[:, 1] = starts[:, 1] + dt * speeds * directions[:, 1]
+
+    # Stop the bullets at the walls
+    wall_grid = world.wall_grid
+    candidates = wall_grid.get_candidates_for_rays(starts, ends)
+    if world.profiler is not None:
+        world.profiler.count("bullet_ray_casts", len(bullets))
+        world.profiler.count("bullet_wall_tests", len(bullets) * len(candidates))
+    _, wall_points, hits_wall = cast_rays(
+        starts, ends, wall_grid.wall_starts[candidates], wall_grid.wall_ends[candidates]
+    )
+    ends[hits_wall] = wall_points[hits_wall]
+
+    # Nearest points on the paths to the living fighters, as in get_nearest_point_and_distance_to_path
+    fighters = world.fighters
+    rows = fighters.get_living_rows()
+    fighter_xs = fighters.x[rows][None, :]
+    fighter_ys = fighters.y[rows][None, :]
+    radii = fighters.radius[rows]
+    dx = (ends[:, 0] - starts[:, 0])[:, None]
+    dy = (ends[:, 1] - starts[:, 1])[:, None]
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        a = ((fighter_xs - starts[:, 0:1]) * dx + (fighter_ys - starts[:, 1:2]) * dy) / numpy.sqrt(dx ** 2 + dy ** 2) ** 2
+    nearest_xs = numpy.where(a < 0, starts[:, 0:1], numpy.where(a > 1, ends[:, 0:1], starts[:, 0:1] + a * dx))
+    nearest_ys = numpy.where(a < 0, starts[:, 1:2], numpy.where(a > 1, ends[:, 1:2], starts[:, 1:2] + a * dy))
+    distances = numpy.sqrt((fighter_xs - nearest_xs) ** 2 + (fighter_ys - nearest_ys) ** 2)
+    hit_bullets, hit_fighters = numpy.nonzero(distances < radii[None, :])
+    hit_rows = rows[hit_fighters]
+    hit_targets = fighters.get_fighters(hit_rows)
+    # Order the hits by bullet, and then along the path of the bullet, with the fighters met at the
+    # same distance taken as in the lists of the world: the agents, the players and then the zombies
+    list_positions = get_list_positions(world, hit_targets)
+    order = numpy.lexsort((
+        list_positions, fighters.type_code[hit_rows], numpy.clip(a[hit_bullets, hit_fighters], 0.0, 1.0), hit_bullets
+    ))
+    hit_bullets, hit_fighters = hit_bullets[order], hit_fighters[order]
+    hit_distances = distances[hit_bullets, hit_fighters].tolist()
+    hit_targets = [hit_targets[idx] for idx in order.tolist()]
+
+    first_hit = numpy.searchsorted(hit_bullets, numpy.arange(len(bullets) + 1))
+    for idx, bullet in enumerate(bullets):
+        for hit in range(first_hit[idx], first_hit[idx + 1]):
+            fighter = hit_targets[hit]
+            if (fighter == bullet.agent) or (fighter.life <= 0):
+                # The bullet's shooter shouldn't be on the path, while fighters
+                # killed by earlier bullets are no longer targets
+                continue
+            bullet.apply_hit(fighter, hit_distances[hit])
+            if bullet.max_total_damage <= 0:
+                break
+
+    # Update state
+    ends = ends.tolist()
+    hits_wall = hits_wall.tolist()
+    for bullet, end, hit_wall in zip(bullets, ends, hits_wall):
+        bullet.current_location = tuple(end)
+        bullet.time_remaining -= dt
+        if (
+            hit_wall or (bullet.time_remaining <= 0) or
+            (bullet.max_total_damage <= 0) or
+            (end[0] < 0) or (end[0] >= world.w) or
+            (end[1] < 0) or (end[1] >= world.h)
+        ):
+            bullet.active = False
@@ -0,0 +1,152 @@
+import heapq
+import math
+import numpy
+
+
+class FighterTable(object):
+    """The state of a set of fighters, stored as a struct of arrays.
+
+       Each fighter owns a row of the table, and its position, radius, orientation
+       and life are properties reading from and writing to that row (see FightingThing),
+       so that queries over all the fighters can be computed with numpy.  Rows freed
+       by removed fighters are reused, lowest first, and the arrays grow as needed.
+       Positions are integers, as the fighters move by whole steps on the map.
+
+       When given the spatial hash in which the fighters of the table are registered,
+       the queries around a point only look at the fighters in the cells near the point.
+    """
+    TYPE_CODES = {None: 0, 'agent': 1, 'player': 2, 'zombie': 3}
+
+    def __init__(self, capacity=64, spatial_hash=None):
+        self.x = numpy.zeros((capacity,), dtype=int)
+        self.y = numpy.zeros((capacity,), dtype=int)
+        self.radius = numpy.zeros((capacity,))
+        self.orientation = numpy.zeros((capacity,))
+        self.life = numpy.zeros((capacity,))
+        self.type_code = numpy.zeros((capacity,), dtype=numpy.int8)
+        self.active = numpy.zeros((capacity,), dtype=bool)
+        self.fighters = numpy.empty((capacity,), dtype=object)
+        # Rows in use are all below n_rows, and the free rows below n_rows are kept in a heap
+        self.n_rows = 0
+        self.free_rows = []
+        self.spatial_hash = spatial_hash
+
+    def __len__(self):
+        return self.n_rows - len(self.free_rows)
+
+    def get_capacity(self):
+        return len(self.x)
+
+    def __grow__(self):
+        capacity = max(self.get_capacity(), 1)
+        for name in ('x', 'y', 'radius', 'orientation', 'life', 'type_code', 'active'):
+            old = getattr(self, name)
+            setattr(self, name, numpy.concatenate((old, numpy.zeros((capacity,), dtype=old.dtype))))
+        self.fighters = numpy.concatenate((self.fighters, numpy.empty((capacity,), dtype=object)))
+
+    def add(self, fighter, x=0, y=0, radius=0, orientation=0, life=0):
+        """Add a row for the fighter, and return the index of the row."""
+        if self.free_rows:
+            row = heapq.heappop(self.free_rows)
+        else:
+            if self.n_rows == self.get_capacity():
+                self.__grow__()
+            row = self.n_rows
+            self.n_rows += 1
+        self.x[row] = x
+        self.y[row] = y
+        self.radius[row] = radius
+        self.orientation[row] = orientation
+        self.life[row] = life
+        self.type_code[row] = FighterTable.TYPE_CODES[fighter.fighter_type]
+        self.active[row] = True
+        self.fighters[row] = fighter
+        return row
+
+    def remove(self, row):
+        self.active[row] = False
+        self.fighters[row] = None
+        heapq.heappush(self.free_rows, row)
+
+    def clear(self):
+        self.active[:] = False
+        self.fighters[:] = None
+        self.n_rows = 0
+        self.free_rows = []
+
+    def attach(self, fighter):
+        """Move the state of the fighter from its current table into this one."""
+        old_table, old_row = fighter.fighter_table, fighter.fighter_row
+        row = self.add(
+            fighter,
+            x=old_table.x[old_row], y=old_table.y[old_row],
+            radius=old_table.radius[old_row], orientation=old_table.orientation[old_row],
+            life=old_table.life[old_row]
+        )
+        old_table.remove(old_row)
+        fighter.fighter_table = self
+        fighter.fighter_row = row
+
+    def get_type_mask(self, fighter_types):
+        type_codes = self.type_code[:self.n_rows]
+        mask = numpy.zeros((self.n_rows,), dtype=bool)
+        for fighter_type in fighter_types:
+            mask |= (type_codes == FighterTable.TYPE_CODES[fighter_type])
+        return mask
+
+    def get_rows(self):
+        return numpy.flatnonzero(self.active[:self.n_rows])
+
+    def get_living_rows(self, fighter_types=None):
+        """Rows of the living fighters, optionally restricted to the given fighter types."""
+        mask = self.active[:self.n_rows] & (self.life[:self.n_rows] > 0)
+        if fighter_types is not None:
+            mask &= self.get_type_mask(fighter_types)
+        return numpy.flatnonzero(mask)
+
+    def query_radius(self, point, radius, include_radius=True, fighter_types=None, exclude=None):
+        """Rows of the living fighters with center closer to point than radius (plus their own radius if
+           include_radius), along with their distances from point.
+        """
+        if self.spatial_hash is not None:
+            # Sorted, so that the rows come in the same order as from get_living_rows
+            found = sorted(self.__near_rows__(point, radius, include_radius, fighter_types, exclude))
+            rows = numpy.array([row for row, _ in found], dtype=int)
+            distances = numpy.array([distance for _, distance in found], dtype=float)
+            return rows, distances
+        rows = self.get_living_rows(fighter_types=fighter_types)
+        if (exclude is not None) and (exclude.fighter_table is self):
+            rows = rows[rows != exclude.fighter_row]
+        distances = numpy.sqrt((self.x[rows] - point[0]) ** 2 + (self.y[rows] - point[1]) ** 2)
+        limits = radius + self.radius[rows] if include_radius else radius
+        near = distances < limits
+        return rows[near], distances[near]
+
+    def any_within_radius(self, point, radius, include_radius=True, fighter_types=None, exclude=None):
+        """Whether query_radius would find any fighter, stopping at the first one found."""
+        if self.spatial_hash is not None:
+            for _ in self.__near_rows__(point, radius, include_radius, fighter_types, exclude):
+                return True
+            return False
+        rows, _ = self.query_radius(
+            point, radius, include_radius=include_radius, fighter_types=fighter_types, exclude=exclude
+        )
+        return len(rows) > 0
+
+    def __near_rows__(self, point, radius, include_radius, fighter_types, exclude):
+        # Only the fighters in the cells of the spatial hash around point are looked at.  There
+        # are few of them, so they are filtered one by one rather than with numpy.
+        x, y = point
+        xs, ys, radii, life = self.x, self.y, self.radius, self.life
+        for fighter in self.spatial_hash.query_box(x - radius, y - radius, x + radius, y + radius, living=False):
+            if (fighter is exclude) or (fighter.fighter_table is not self):
+                continue
+            if (fighter_types is not None) and (fighter.fighter_type not in fighter_types):
+                continue
+            row = fighter.fighter_row
+            distance = math.sqrt((xs.item(row) - x) ** 2 + (ys.item(row) - y) ** 2)
+            if (distance < (radius + radii.item(row) if include_radius else radius)) and (life.item(row) > 0):
+                yield row, distance
+
+    def get_fighters(self, rows):
+        return self.fighters[rows].tolist()
@@ -5,13 +5,17 @@ from zombpyg.core.weapons import Knife, Axe, Gun, Rifle, Shotgun
 
 class Player(FightingThing):
     MAX_LIFE = 100
+    fighter_type = 'player'
 
     def __init__(
         self, x, y, radius,
-        name, color, weapon=None
+        name, color, weapon=None, rng=None
     ):
         if weapon is None:
-            weapon = random.choice([Gun, Shotgun, Rifle, Knife, Axe])()
+            # The weapon is picked with the rng of the world, so that seeded games are reproducible
+            if rng is None:
+                raise ValueError(f"Player {name} has no weapon, and no rng to pick one with")
+            weapon = rng.choice([Gun, Shotgun, Rifle, Knife, Axe])()
 
         dead_decoration = DeadBody(radius, f"dead player {name}", Color.BRONZE)
 
@@ -4,7 +4,7 @@ from zombpyg.utils.surroundings import Color
 
 
 class Sensor:
-    def __init__(self, center, angle, length, walls, owner):
+    def __init__(self, center, angle, length, walls, owner, adjust_for_walls=True):
         self.owner = owner
         self.center = center
         self.length = length
@@ -17,7 +17,8 @@ class Sensor:
         self.walls = walls
         
         # initialize
-        self.adjust_endpoint_for_wall()
+        if adjust_for_walls:
+            self.adjust_endpoint_for_wall()
     
     def set_center(self, x, y):
         self.center = (x, y)
@@ -27,6 +28,17 @@ class Sensor:
         self.orientation = orient
         self.adjust_endpoint_for_wall()
     
+    # The following two methods support updating a bank of sensors at once
+    # (see cast_rays), in which case the wall collisions are calculated elsewhere.
+    def set_pose(self, center, orientation, end_point):
+        self.center = center
+        self.orientation = orientation
+        self.end_point = end_point
+
+    def set_wall_collision(self, distance, point):
+        self.distance_to_wall = distance
+        self.collide_point = point
+
     def restore_end_point(self):
         angle = self.angle + self.orientation
         dx = int(self.length * numpy.sin(numpy.deg2rad(angle)))
@@ -3,6 +3,7 @@ import numpy
 import pygame
 
 from zombpyg.core.sensor import Sensor
+from zombpyg.core.fighter_table import FighterTable
 from zombpyg.utils.surroundings import Color, get_movement_estimates
 from zombpyg.utils.geometry import _valid_angle, get_angle_and_distance_to_point
 from zombpyg.actions import (
@@ -102,12 +103,21 @@ class Weapon(object):
 
 class FightingThing(CircularThing):
     """Thing that has a weapon."""
+    fighter_type = None
+    # The resolution in degrees of the orientations for which movement estimates are computed
+    movement_estimate_resolution = 1.0
+
     def __init__(
         self,
         x, y, radius,
         name, color, life, weapon,
         dead_decoration=None
     ):
+        # The fighter's state lives in a row of a fighter table.  Until the fighter
+        # is added to a world (which moves the row into the world's table), the
+        # fighter has a table of its own.
+        self.fighter_table = FighterTable(capacity=1)
+        self.fighter_row = self.fighter_table.add(self)
         super(FightingThing, self).__init__(
             x, y, radius,
             name, color, life,
@@ -115,7 +125,79 @@ class FightingThing(CircularThing):
         )
 
         self.weapon = weapon
+        # Set by the world when the fighter is added, so that the spatial hash
+        # can be kept up to date as the fighter moves
+        self.spatial_hash = None
+
+    @property
+    def x(self):
+        return self.fighter_table.x.item(self.fighter_row)
+
+    @x.setter
+    def x(self, value):
+        self.fighter_table.x[self.fighter_row] = value
+
+    @property
+    def y(self):
+        return self.fighter_table.y.item(self.fighter_row)
+
+    @y.setter
+    def y(self, value):
+        self.fighter_table.y[self.fighter_row] = value
+
+    @property
+    def r(self):
+        return self.fighter_table.radius.item(self.fighter_row)
+
+    @r.setter
+    def r(self, value):
+        self.fighter_table.radius[self.fighter_row] = value
+
+    @property
+    def orientation(self):
+        return self.fighter_table.orientation.item(self.fighter_row)
+
+    @orientation.setter
+    def orientation(self, value):
+        self.fighter_table.orientation[self.fighter_row] = value
+
+    @property
+    def life(self):
+        return self.fighter_table.life.item(self.fighter_row)
+
+    @life.setter
+    def life(self, value):
+        self.fighter_table.life[self.fighter_row] = value
+
+    def set_position(self, x, y):
+        super(FightingThing, self).set_position(x, y)
+        if self.spatial_hash is not None:
+            self.spatial_hash.update(self)
     
+    def get_movement_estimates(self):
+        """The movement estimates (see get_movement_estimates) for wandering within the vision distance.
+
+           The estimates only depend on the walls, which don't move, and on the pose, so they are
+           computed for the pose quantized to integer positions and movement_estimate_resolution
+           degrees, and shared by all fighters on the map through the map's movement cache.
+        """
+        x, y = self.get_position()
+        resolution = self.movement_estimate_resolution
+        orientation = _valid_angle(round(self.orientation / resolution) * resolution)
+        key = (int(round(x)), int(round(y)), orientation, self.r, self.vision_distance)
+        estimates = self.world.movement_cache.get(key)
+        if estimates is None:
+            position = key[:2]
+            estimates = get_movement_estimates(
+                position, self.r, orientation,
+                self.world.wall_grid.get_walls_near_circle(position, self.vision_distance),
+                self.vision_distance
+            )
+            self.world.movement_cache.put(key, estimates)
+        elif self.world.profiler is not None:
+            self.world.profiler.count("movement_cache_hits")
+        return estimates
+
     def get_valid_position(self, x0, y0, x1, y1, world):
         dx = x1 - x0
         dy = y1 - y0
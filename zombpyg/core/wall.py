@@ -1,5 +1,5 @@
 import pygame
-from zombpyg.utils.geometry import calculate_intersect_point
+from zombpyg.utils.intersection import intersect_segments, point_on_segment
 from zombpyg.utils.surroundings import Color
 
 
@@ -13,8 +13,9 @@ class Wall(object):
         pygame.draw.line(game.DISPLAYSURF, Color.WHITE, self.start, self.end, self.width)
 
     def collide(self, p1, p2):
-        point = calculate_intersect_point(p1, p2, self.start, self.end)
-        if point is None:
+        """The point (truncated to integers) where the segment from p1 to p2 first meets the wall, or None."""
+        parameters = intersect_segments(p1, p2, self.start, self.end)
+        if parameters is None:
             return None
-        else:
-            return (int(point[0]), int(point[1]))
+        point = point_on_segment(self.start, self.end, parameters[1])
+        return (int(point[0]), int(point[1]))
@@ -1,9 +1,8 @@
 import numpy
-import random
 
 from zombpyg.core.things import Weapon
-from zombpyg.utils.geometry import rotate_vector, get_angle_and_distance_to_point, get_nearest_point_and_distance_to_path
-from zombpyg.core.bullet import Bullet
+from zombpyg.utils.geometry import rotate_vector, get_angle_and_distance_to_point, get_distances_to_path
+from zombpyg.core.bullet import Bullet, step_bullets
 
 
 class MeleeWeapon(Weapon):
@@ -14,29 +13,17 @@ class MeleeWeapon(Weapon):
         self.friendly_fire_guard = friendly_fire_guard
     
     def find_target(self, attacker):
-        potential_targets = [
-            agent for agent in attacker.world.agents if agent.life > 0
-        ] + [
-            player for player in attacker.world.players if player.life > 0
-        ] + [
-            zombie for zombie in attacker.world.zombies if zombie.life > 0
-        ]
+        potential_targets = attacker.world.fighter_hash.query_cone(
+            attacker.get_position(), attacker.orientation, self.max_range, self.max_angle,
+            include_radius=False, exclude=attacker
+        )
         min_distance = 1.01 * self.max_range # Set larger than max distance
         target_fighter = None
         
-        for fighter in potential_targets:
-            if fighter == attacker:
-                continue
-
-            angle, distance, _ = get_angle_and_distance_to_point(attacker.get_position(), attacker.orientation, fighter.get_position())
-            if distance >= self.max_range:
-                continue
-            
-            rectified_angle = numpy.rad2deg(numpy.arctan2(fighter.r, distance))
-            if angle >= -self.max_angle-rectified_angle and angle <= self.max_angle+rectified_angle:
-                if distance < min_distance:
-                    min_distance = min(min_distance, distance)
-                    target_fighter = fighter
+        for fighter, angle, distance in potential_targets:
+            if distance < min_distance:
+                min_distance = min(min_distance, distance)
+                target_fighter = fighter
         
         return target_fighter
     
@@ -49,7 +36,7 @@ class MeleeWeapon(Weapon):
                 # Nearly attacked fellow player or agent
                 attacker.friendly_fire_avoided += 1
             else:
-                damage = random.randint(*self.damage_range)
+                damage = attacker.world.rng.randint(*self.damage_range)
                 target.life -= damage
                 
                 # Adjust the attackers stats
@@ -150,11 +137,11 @@ class Firearm(Weapon):
     
     def check_bullet_paths_for_friendly_fire(self, attacker, bullets):
         friendly_distance_buffer_multiplier = 1.2
-        friendlies = [
-            (agent, 'agent') for agent in attacker.world.agents if agent.life > 0
-        ] + [
-            (player, 'player') for player in attacker.world.players if player.life > 0
-        ]
+        fighters = attacker.world.fighters
+        rows = fighters.get_living_rows(fighter_types=('agent', 'player'))
+        if attacker.fighter_table is fighters:
+            rows = rows[rows != attacker.fighter_row]
+        friendly_xs, friendly_ys, friendly_radii = fighters.x[rows], fighters.y[rows], fighters.radius[rows]
         
         for bullet in bullets:
             bullet_start = bullet.current_location
@@ -162,16 +149,14 @@ class Firearm(Weapon):
                 numpy.array(bullet.current_location) + numpy.array(bullet.direction) * bullet.speed * bullet.time_remaining # in air for 0.5 seconds
             )
             # Adjust the endpoint for the nearest wall collision
-            for wall in attacker.world.walls:
+            for wall in attacker.world.wall_grid.get_walls_near_segment(bullet_start, bullet_end_point):
                 pt = wall.collide(bullet_start, bullet_end_point)
                 if pt is not None:
                     bullet_end_point = pt
-            # Go through friendlies and see if any are too close to the path
-            for friendly, _ in friendlies:
-                if attacker != friendly:
-                    _, dist, _ = get_nearest_point_and_distance_to_path(bullet_start, bullet_end_point, friendly.get_position())
-                    if dist < friendly_distance_buffer_multiplier*friendly.r:
-                        return True
+            # See if any friendlies are too close to the path
+            distances = get_distances_to_path(bullet_start, bullet_end_point, friendly_xs, friendly_ys)
+            if numpy.any(distances < friendly_distance_buffer_multiplier*friendly_radii):
+                return True
         return False
     
     def use(self, attacker):
@@ -184,10 +169,11 @@ class Firearm(Weapon):
             else:
                 self.ammo -= 1
                 attacker.attack_count += 1
-                # Take first step with bullet
+                # Take first step with the bullets
                 for bullet in bullets:
                     attacker.world.decorations.append(bullet.get_path_decoration())
-                    bullet.next_step()
+                step_bullets(bullets, attacker.world)
+                for bullet in bullets:
                     attacker.world.add_bullet(bullet)
 
     def ammo_resource_consumption_rate(self):
@@ -237,7 +223,7 @@ class Shotgun(Firearm):
 
 class WeaponFactory(object):
     @staticmethod
-    def create_weapon(weapon_id, friendly_fire_guard=False):
+    def create_weapon(weapon_id, friendly_fire_guard=False, rng=None):
         if weapon_id == "rifle":
             return Rifle(friendly_fire_guard=friendly_fire_guard)
         elif weapon_id == "shotgun":
@@ -249,7 +235,10 @@ class WeaponFactory(object):
         elif weapon_id == "knife":
             return Knife(friendly_fire_guard=friendly_fire_guard)
         elif weapon_id == "random":
-            return random.choice([
+            # Picked with the rng of the world, so that seeded games are reproducible
+            if rng is None:
+                raise ValueError("A random weapon needs an rng to be picked with")
+            return rng.choice([
                 Knife(friendly_fire_guard=friendly_fire_guard), 
                 Axe(friendly_fire_guard=friendly_fire_guard), 
                 Gun(friendly_fire_guard=friendly_fire_guard), 
@@ -1,12 +1,12 @@
-import random
 import numpy
 import pygame
 
 from zombpyg.core.wall import Wall
 from zombpyg.core.things import FightingThing, DeadBody
 from zombpyg.core.weapons import ZombieClaws
-from zombpyg.utils.geometry import _valid_angle, get_angle_and_distance_to_point
-from zombpyg.utils.surroundings import Color, get_movement_estimates
+from zombpyg.utils.geometry import _valid_angle, get_angle_and_distance_to_point, get_angles_to_points
+from zombpyg.utils.intersection import intersect_segments_batch
+from zombpyg.utils.surroundings import Color
 from zombpyg.actions import (
     MoveableThing,
     RotatableThing,
@@ -20,11 +20,12 @@ from zombpyg.actions import (
 
 class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
     MAX_LIFE = 100
+    fighter_type = 'zombie'
     vision_distance = 60
     peripheral_vision_angle = 45
 
     def __init__(self, x, y, radius, world, orientation=0):
-        life = random.randint(Zombie.MAX_LIFE // 2, Zombie.MAX_LIFE)
+        life = world.rng.randint(Zombie.MAX_LIFE // 2, Zombie.MAX_LIFE)
         dead_decoration = DeadBody(radius, 'zombie remains', Color.BRONZE)
 
         super(Zombie, self).__init__(
@@ -47,6 +48,12 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
         self.update_steps()
 
         self.world = world
+        # The target found for all zombies at once at the start of the fighters' turn (see seek_targets)
+        self.sought_target = None
+        # Whether the last step along the world's flow field was blocked, in horde mode
+        self.flow_blocked = False
+        # The number of steps covered by the moves of the next step (see World.schedule_zombie_steps)
+        self.step_scale = 1
 
     def next_step(self):
         """Zombies attack if in range, else move in direction of a sighted player."""
@@ -54,6 +61,10 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
         action = None
         # Collect data on players and agents
         detected_player, detected_distance, detected_angle = self.seek_target()
+        # In horde mode, zombies seeing no player head for the nearest one along the world's flow field
+        direction = None
+        if (detected_player is None) and (self.world.flow_field is not None) and (not self.flow_blocked):
+            direction = self.world.flow_field.get_direction(self.get_position())
         if detected_player is not None:
             # If a player is seen, then re-orient if necessary.
             # If the angle to target is acceptable but is not in attack range, then pursue.
@@ -69,11 +80,22 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
             else: 
                 self.targeted_player = detected_player
                 action = AttackAction(self)
+        elif direction is not None:
+            angle = _valid_angle(direction - self.orientation)
+            if angle < -self.sensor_angle / 2:
+                action = RotateAction(self, self.orientation_actions[0])
+            elif angle > self.sensor_angle / 2:
+                action = RotateAction(self, self.orientation_actions[2])
+            else:
+                # When the way is blocked (by other zombies, or at the corner of a wall), the next step wanders
+                position = self.get_position()
+                self.play_action(ForwardMoveAction(self))
+                self.flow_blocked = (self.get_position() == position)
+                return
         else:
+            self.flow_blocked = False
             # If no player is seen, make random choice for motion depending on positioning relative to walls
-            distance_forward, has_gap_ahead, gap_ahead_width, gap_ahead_left_angle, gap_ahead_right_angle, angle_left_gap, angle_right_gap, surroundings = get_movement_estimates(
-                self.get_position(), self.r, self.orientation, self.world.walls, self.vision_distance
-            )
+            distance_forward, has_gap_ahead, gap_ahead_width, gap_ahead_left_angle, gap_ahead_right_angle, angle_left_gap, angle_right_gap, surroundings = self.get_movement_estimates()
             if has_gap_ahead and (gap_ahead_width >= 3 * self.r):
                 distweight = min(max(int(distance_forward/self.r) - 2, 0), 5)
                 leftrotweight = 1 if gap_ahead_left_angle < -self.sensor_angle else 0
@@ -87,7 +109,7 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
                     RotateAction(self, self.orientation_actions[1]),
                     RotateAction(self, self.orientation_actions[2])
                 ]
-                action = random.choices(
+                action = self.world.rng.choices(
                     action_choices,
                     weights=[distweight, backweight, leftrotweight, noactionweight, rightrotweight],
                     k=1
@@ -101,7 +123,7 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
                     RotateAction(self, self.orientation_actions[0]),
                     RotateAction(self, self.orientation_actions[2])
                 ]
-                action = random.choices(
+                action = self.world.rng.choices(
                     action_choices, weights=[angle_right_gap, numpy.abs(angle_left_gap)], k=1
                 )[0]
 
@@ -117,6 +139,8 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
     
     def move_forward(self) -> None:
         dx, dy = self.step_forward
+        dx *= self.step_scale
+        dy *= self.step_scale
         x0, y0 = self.x, self.y
         x, y = self.get_valid_position(self.x, self.y, self.x+dx, self.y+dy, self.world)
         self.set_position(x, y)
@@ -127,8 +151,8 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
 
     def move_backward(self) -> None:
         dx, dy = self.step_forward
-        dx = -dx
-        dy = -dy
+        dx = -dx * self.step_scale
+        dy = -dy * self.step_scale
         x0, y0 = self.x, self.y
         x, y = self.get_valid_position(self.x, self.y, self.x+dx, self.y+dy, self.world)
         self.set_position(x, y)
@@ -143,15 +167,18 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
     
     def attack(self):
         if self.targeted_player is not None:
-            damage = random.randint(*self.weapon.damage_range)
+            damage = self.world.rng.randint(*self.weapon.damage_range)
             self.targeted_player.life -= damage
 
     def seek_target(self):
-        players = [
-            agent for agent in self.world.agents if agent.life > 0
-         ] + [
-             player for player in self.world.players if player.life > 0
-        ]
+        sought_target, self.sought_target = self.sought_target, None
+        # A target sought in advance is only kept if it hasn't been killed since
+        if (sought_target is not None) and ((sought_target[0] is None) or (sought_target[0].life > 0)):
+            return sought_target
+        rows, _ = self.world.fighters.query_radius(
+            self.get_position(), self.vision_distance, fighter_types=('agent', 'player')
+        )
+        players = self.world.fighters.get_fighters(rows)
         minimum_distance_to_player = self.vision_distance * 2.0
         detected_angle = None
         detected_player = None
@@ -164,13 +191,7 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
             if numpy.abs(angle) >= self.peripheral_vision_angle:
                 continue
             
-            wall_point = None
-            for wall in self.world.walls:
-                wall_point = wall.collide(self.get_position(), player.get_position())
-                if wall_point is not None:
-                    # There's a wall between the (positions of the) zombie and player
-                    break
-            if wall_point is None:
+            if self.world.has_line_of_sight(self.get_position(), player.get_position()):
                 # no wall found betwen zombie and player
                 if distance < minimum_distance_to_player:
                     minimum_distance_to_player = distance
@@ -187,6 +208,64 @@ class Zombie(FightingThing, MoveableThing, RotatableThing, AttackingThing):
         pygame.draw.circle(game.DISPLAYSURF, self.color, (self.x, self.y), self.r)
         pygame.draw.line(game.DISPLAYSURF, Color.WHITE, self.get_position(), end, 1)
 
+# The following seeks the targets of all the zombies at once, as Zombie.seek_target does
+# one zombie at a time.  The distances and angles from every zombie to every living agent
+# and player are computed together, and the lines of sight of the pairs within vision are
+# tested against the walls together.  Each zombie is handed the nearest visible target in
+# its sought_target, which is used by its next call to seek_target.
+def seek_targets(zombies, world):
+    zombies = [zombie for zombie in zombies if zombie.life > 0]
+    if len(zombies) == 0:
+        return
+    table = world.fighters
+    zombie_rows = numpy.array([zombie.fighter_row for zombie in zombies], dtype=int)
+    target_rows = table.get_living_rows(fighter_types=('agent', 'player'))
+    vision_distances = numpy.array([zombie.vision_distance for zombie in zombies], dtype=float)
+    peripheral_vision_angles = numpy.array([zombie.peripheral_vision_angle for zombie in zombies], dtype=float)
+
+    # Pairs (zombie, target) within the vision distance and the peripheral vision angle
+    zombie_xs = table.x[zombie_rows][:, None]
+    zombie_ys = table.y[zombie_rows][:, None]
+    target_xs = table.x[target_rows][None, :]
+    target_ys = table.y[target_rows][None, :]
+    distances = numpy.sqrt((target_xs - zombie_xs) ** 2 + (target_ys - zombie_ys) ** 2)
+    angles = get_angles_to_points(
+        (zombie_xs, zombie_ys), table.orientation[zombie_rows][:, None], target_xs, target_ys
+    )
+    in_sight = (distances < vision_distances[:, None] + table.radius[target_rows][None, :])
+    in_sight &= (numpy.abs(angles) < peripheral_vision_angles[:, None])
+    zombie_idx, target_idx = numpy.nonzero(in_sight)
+
+    # Lines of sight of the pairs, as in World.has_line_of_sight
+    if (len(zombie_idx) > 0) and (world.visibility is not None):
+        starts = numpy.stack((zombie_xs[zombie_idx, 0], zombie_ys[zombie_idx, 0]), axis=1)
+        ends = numpy.stack((target_xs[0, target_idx], target_ys[0, target_idx]), axis=1)
+        visible = world.visibility.lookup_batch(starts, ends)
+        in_sight[zombie_idx[visible == 0], target_idx[visible == 0]] = False
+        # Only the pairs the table can't tell about are tested against the walls
+        zombie_idx, target_idx = zombie_idx[visible < 0], target_idx[visible < 0]
+    if len(zombie_idx) > 0:
+        starts = numpy.stack((zombie_xs[zombie_idx, 0], zombie_ys[zombie_idx, 0]), axis=1)
+        ends = numpy.stack((target_xs[0, target_idx], target_ys[0, target_idx]), axis=1)
+        wall_grid = world.wall_grid
+        candidates = wall_grid.get_candidates_for_rays(starts, ends)
+        if len(candidates) > 0:
+            _, _, hits = intersect_segments_batch(
+                starts[:, None, :], ends[:, None, :],
+                wall_grid.wall_starts[candidates][None, :, :], wall_grid.wall_ends[candidates][None, :, :]
+            )
+            in_sight[zombie_idx[hits.any(axis=1)], target_idx[hits.any(axis=1)]] = False
+
+    # The nearest target in sight, the first one in the order of the rows on ties
+    distances = numpy.where(in_sight, distances, numpy.inf)
+    nearest = numpy.argmin(distances, axis=1) if len(target_rows) > 0 else numpy.zeros((len(zombies),), dtype=int)
+    targets = table.get_fighters(target_rows)
+    for idx, zombie in enumerate(zombies):
+        if (len(target_rows) > 0) and in_sight[idx, nearest[idx]]:
+            zombie.sought_target = (targets[nearest[idx]], distances[idx, nearest[idx]], angles[idx, nearest[idx]])
+        else:
+            zombie.sought_target = (None, zombie.vision_distance * 2.0, None)
+
 class ZombieBuilder(object):
     def __init__(self, radius):
         self.radius = radius
@@ -1,3 +1,4 @@
+import os
 import random
 import pygame
 from pygame.locals import *
@@ -5,13 +6,16 @@ from itertools import cycle, islice
 from zombpyg.map.map import MapFactory
 from zombpyg.map.world_config_builder import WorldConfigurationBuilderFactory, GameState
 from zombpyg.rules.factory import RulesFactory
-from zombpyg.world import World
+from zombpyg.world import World, check_lod_bands
 from zombpyg.core.wall import Wall
 from zombpyg.agent import Agent, AgentBuilder
 from zombpyg.core.zombie import ZombieBuilder
 from zombpyg.utils.surroundings import Color
 from zombpyg.core.weapons import Shotgun
 from zombpyg.players.builder import PlayerBuilder
+from zombpyg.utils.profiling import StepProfiler
+from zombpyg.utils.seeding import make_rngs, reseed
+from zombpyg.recording import EpisodeRecorder
 
 # GYM: Decide whether to conform to gym interface
 # class ActionSpace(object):
@@ -110,7 +114,21 @@ class Game:
         fps=50,
         agent_reward_configuration={},
         friendly_fire_guard=False,
-        verbose=False
+        verbose=False,
+        sensor_cache_size=4096,
+        sensor_cache_eviction='lru',
+        movement_cache_size=16384,
+        movement_cache_eviction='lru',
+        batched_zombie_targeting=False,
+        visibility_cell_size=None,
+        visibility_cache_dir=None,
+        horde_mode=False,
+        flow_field_interval=5,
+        lod_bands=None,
+        profile=False,
+        render_scale=1.0,
+        seed=None,
+        record_dir=None
     ):
         # world_config={
         #     "tag": "SingleMap",
@@ -131,6 +149,14 @@ class Game:
         if enable_rendering:
             self.__initialize_renderer__() # uses width and height
         self.fps = fps
+
+        # Offscreen rendering to arrays (see get_frame), set up on first use
+        if render_scale <= 0:
+            raise ValueError(f"The render scale must be positive, not {render_scale}")
+        self.render_scale = render_scale
+        self.frame_surface = None
+        self.scaled_frame_surface = None
+        self.frame = None
         
         self.obj_radius = 10
         self.robot_sensor_length = 250
@@ -138,6 +164,35 @@ class Game:
         self.friendly_fire_guard = friendly_fire_guard
         
         self.check_terminate = True
+
+        # Size and eviction policy of the per-map cache of sensor wall collisions
+        self.sensor_cache_size = sensor_cache_size
+        self.sensor_cache_eviction = sensor_cache_eviction
+        # Size and eviction policy of the per-map cache of the movement estimates of wandering fighters
+        self.movement_cache_size = movement_cache_size
+        self.movement_cache_eviction = movement_cache_eviction
+        # Whether the zombies seek their targets all at once in each step (see World.seek_zombie_targets)
+        self.batched_zombie_targeting = batched_zombie_targeting
+        # The cell size of the per-map visibility tables for the lines of sight, or None to test against the walls
+        self.visibility_cell_size = visibility_cell_size
+        # Where the visibility tables are saved, or None for ~/.cache/zombpyg
+        self.visibility_cache_dir = visibility_cache_dir
+        # In horde mode, the zombies follow a flow field towards the players, updated every flow_field_interval steps
+        self.horde_mode = horde_mode
+        self.flow_field_interval = flow_field_interval
+        # The zombies far from the agents and players step less often, by the bands (distance, interval) given
+        self.lod_bands = check_lod_bands(lod_bands)
+
+        # Per-phase timing of the world steps, accumulated across episodes (see StepProfiler)
+        self.profiler = StepProfiler() if profile else None
+
+        # The game's own generators, from which the map, the world and everything in it draw
+        self.rng, self.np_rng = make_rngs(seed)
+
+        # Each episode is recorded to a file of its own in record_dir, when given (see EpisodeRecorder)
+        self.record_dir = record_dir
+        self.recorder = None
+        self.episode_count = 0
         
         self.agent_ids = agent_ids
         # The following processes the provided weapon names into a list of weapon names 
@@ -183,6 +238,18 @@ class Game:
             DISPLAYSURF = pygame.display.set_mode((self.w, self.h), 0, 32)
             self.set_display(DISPLAYSURF)
  
+    def __initialize_offscreen_renderer__(self):
+        if self.frame_surface is None:
+            # A plain surface needs no display, so this works on headless machines
+            self.frame_surface = pygame.Surface((self.w, self.h), 0, 32)
+            target = self.frame_surface
+            if self.render_scale != 1.0:
+                scaled_size = (max(1, int(self.w * self.render_scale)), max(1, int(self.h * self.render_scale)))
+                self.scaled_frame_surface = pygame.Surface(scaled_size, 0, 32)
+                target = self.scaled_frame_surface
+            # The frame is a view of the pixels of the surface, so the surface is the preallocated buffer
+            self.frame = pygame.surfarray.pixels3d(target).transpose((1, 0, 2))
+ 
     def __process_player_specs__(self, player_specs, friendly_fire_guard):
         self.player_builders = []
         for player_spec in player_specs.split(','):
@@ -251,12 +318,31 @@ class Game:
             map(apply_update, zip(self.agent_rewards, self.world.agents))
         )
 
-    def reset(self):
+    def seed(self, seed):
+        """Seed the game's generators, so that the following episodes can be replayed exactly."""
+        reseed(self.rng, self.np_rng, seed)
+
+    def reset(self, seed=None):
+        """Start a new episode, seeding the game's generators first if a seed is given."""
+        if seed is not None:
+            self.seed(seed)
         # Map and world creation
-        update_map, worldconfig = self.world_configuration_builder.build_world_configuration(self.last_game_state)
+        update_map, worldconfig = self.world_configuration_builder.build_world_configuration(
+            self.last_game_state, rng=self.rng
+        )
         if update_map:
             self.map = worldconfig.game_map
-            self.world = World(self.map, 1.0/self.fps)
+            self.map.sensor_cache.configure(self.sensor_cache_size, eviction=self.sensor_cache_eviction)
+            self.map.movement_cache.configure(self.movement_cache_size, eviction=self.movement_cache_eviction)
+            if self.visibility_cell_size is not None:
+                self.map.load_visibility_table(cell_size=self.visibility_cell_size, cache_dir=self.visibility_cache_dir)
+            self.world = World(
+                self.map, 1.0/self.fps, rng=self.rng, np_rng=self.np_rng,
+                batched_zombie_targeting=self.batched_zombie_targeting,
+                horde_mode=self.horde_mode, flow_field_interval=self.flow_field_interval,
+                lod_bands=self.lod_bands
+            )
+            self.world.set_profiler(self.profiler)
             self.initial_zombies = worldconfig.initial_zombies
             self.minimum_zombies = worldconfig.minimum_zombies
             self.rules = RulesFactory.get_rules(self.rules_id, self.world, self.map.objectives)
@@ -268,14 +354,72 @@ class Game:
         self.spawn_players()
         self.spawn_zombies(self.initial_zombies, initial_spawn=True)
         self.initialize_rewards()
+        if self.record_dir is not None:
+            self.__start_recording__()
+        self.episode_count += 1
+
+    def __start_recording__(self):
+        self.stop_recording()
+        os.makedirs(self.record_dir, exist_ok=True)
+        path = os.path.join(self.record_dir, f"episode-{self.episode_count:06d}.zrec")
+        self.recorder = EpisodeRecorder(path, self.world)
+        self.world.set_recorder(self.recorder)
+        # The first tick is the initial state of the episode
+        self.recorder.record(self.world)
+
+    def stop_recording(self):
+        """Close the recording of the current episode, if any."""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+            self.world.set_recorder(None)
+
+    def get_step_stats(self):
+        """The per-phase timings and counters of the steps since profiling started, or None if not profiling."""
+        if self.profiler is None:
+            return None
+        return self.profiler.get_stats()
+
+    def reset_step_stats(self):
+        if self.profiler is not None:
+            self.profiler.reset()
 
     def get_feedback_size(self):
         return (1, self.feedback_size, 1)
 
-    def play_actions(self, action_ids, num_frames=1):
-        assert num_frames == 1
+    def play_actions(self, action_ids, num_frames=1, compute_observations=True):
+        """Repeat the actions for num_frames world steps (stopping early if the game ends),
+           and return the rewards summed over the steps along with the final observations.
+
+           The observations are only computed for the last step, and not at all (None is
+           returned in their place) if compute_observations is False.
+        """
+        if num_frames < 1:
+            raise ValueError(f"The number of frames must be positive, not {num_frames}")
 
-        feedbacks = self.world.step(action_ids)
+        total_rewards = None
+        for frame in range(num_frames):
+            feedbacks = self.world.step(
+                action_ids, compute_feedback=compute_observations and (frame == num_frames - 1)
+            )
+            rewards, done, truncated = self.__process_step__()
+            if total_rewards is None:
+                total_rewards = rewards
+            else:
+                total_rewards = [total + reward for total, reward in zip(total_rewards, rewards)]
+            if done or truncated:
+                break
+
+        if not compute_observations:
+            return total_rewards, None, done, truncated
+        if feedbacks is None:
+            # The game ended before the last frame, so the observations are computed now
+            feedbacks = self.world.get_sensor_feedbacks()
+        observations = [feedback.reshape((1, len(feedback), 1)) for feedback in feedbacks]
+        return total_rewards, observations, done, truncated
+
+    def __process_step__(self):
+        """Update the rewards, the zombies and the state of the game after a world step."""
         rewards = self.update_rewards()
         if self.verbose and any([reward != 0.0 for reward in rewards]):
             for agent_id, reward in zip(self.agent_ids, rewards):
@@ -313,8 +457,7 @@ class Game:
             truncated = True
             self.last_game_state = GameState.TRUNCATED
 
-        observations = [feedback.reshape((1, len(feedback), 1)) for feedback in feedbacks]
-        return rewards, observations, done, truncated
+        return rewards, done, truncated
     
     def play_action(self, action_id, num_frames=1):
         rewards, observations, done, truncated = self.play_actions([action_id], num_frames=num_frames)
@@ -328,8 +471,8 @@ class Game:
     # This is used by the train method
     # This might be useful for gym later.
     def get_current_feedback(self, num_frames=1):
-        assert num_frames == 1
-        feedbacks = self.world.agents[0].sensor_feedback()
+        # The observation is that of the current (i.e., last) frame, whatever the number of frames
+        feedbacks = self.world.get_sensor_feedbacks(self.world.agents[:1])[0]
         return feedbacks.reshape((1, len(feedbacks), 1))
     
     def increase_fps(self):
@@ -358,7 +501,30 @@ class Game:
               if time_used > 0:
                   print(f"Estimated FPS: {1000.0/time_used}")
 
+    def get_frame(self):
+        """Draw the world onto an offscreen surface, and return the frame as an RGB array of shape
+           (h, w, 3), scaled by render_scale.
+
+           The array is a view of a surface that is reused for every frame, so it is overwritten
+           by the next call, and should be copied if it needs to be kept.
+        """
+        self.__initialize_offscreen_renderer__()
+        self.frame_surface.fill(Color.BACKGROUND)
+        # The things draw themselves on the game's DISPLAYSURF
+        display = self.DISPLAYSURF
+        self.DISPLAYSURF = self.frame_surface
+        try:
+            self.world.draw(self)
+        finally:
+            self.DISPLAYSURF = display
+        if self.scaled_frame_surface is not None:
+            pygame.transform.smoothscale(
+                self.frame_surface, self.scaled_frame_surface.get_size(), self.scaled_frame_surface
+            )
+        return self.frame
+
     def close(self):
+        self.stop_recording()
         if self.DISPLAYSURF is not None:
             pygame.display.quit()
             pygame.quit()
@@ -1,11 +1,11 @@
 #!/usr/bin/env python
 import gymnasium as gym
 from gymnasium.spaces.discrete import Discrete
-from gymnasium.spaces.box import Box
 from gymnasium.envs.registration import register
 import pygame
 from zombpyg.game import Game
 from zombpyg.agent import AgentActions
+from zombpyg.utils.observations import get_observation_space, encode_observations
 
 
 class ZombpygGymEnv(gym.Env):
@@ -32,7 +32,7 @@ class ZombpygGymEnv(gym.Env):
     The methods are accessed publicly as "step", "reset", etc...
     """
     # See the supported modes in the render method
-    metadata = {'render.modes': ['human']}
+    metadata = {'render.modes': ['human', 'rgb_array'], 'render_modes': ['human', 'rgb_array']}
 
     # Set these in ALL subclasses
     reward_range = (-float('inf'), float('inf'))
@@ -60,7 +60,13 @@ class ZombpygGymEnv(gym.Env):
         fps=50,
         agent_reward_configuration={},
         friendly_fire_guard=False,
-        verbose=False
+        verbose=False,
+        visibility_cell_size=None,
+        visibility_cache_dir=None,
+        profile=False,
+        render_scale=1.0,
+        frame_skip=1,
+        observation_encoding="float32"
     ):
         if render_mode is not None and (render_mode not in self.metadata.get('render.modes', [])):
             raise ValueError(f"In gymnasium environment, render_mode {render_mode} is not valid, must be one of {', '.join(self.metadata.get('render.modes', []))}")
@@ -78,9 +84,17 @@ class ZombpygGymEnv(gym.Env):
             agent_reward_configuration=agent_reward_configuration,
             friendly_fire_guard=friendly_fire_guard,
             verbose=verbose,
+            visibility_cell_size=visibility_cell_size,
+            visibility_cache_dir=visibility_cache_dir,
+            profile=profile,
+            render_scale=render_scale,
         )
+        # Each action is repeated for frame_skip world steps (see Game.play_actions)
+        self.frame_skip = frame_skip
 
-        self.observation_space = Box(low=0.0, high=400.0, shape=self.game.get_feedback_size())
+        # The observations are float32, or float16 or uint8 to save memory (see encode_observations)
+        self.observation_encoding = observation_encoding
+        self.observation_space = get_observation_space(self.game.get_feedback_size(), observation_encoding)
 
     @classmethod
     def using_single_map(
@@ -94,7 +108,13 @@ class ZombpygGymEnv(gym.Env):
         fps=50,
         agent_reward_configuration={},
         friendly_fire_guard=False,
-        verbose=False
+        verbose=False,
+        visibility_cell_size=None,
+        visibility_cache_dir=None,
+        profile=False,
+        render_scale=1.0,
+        frame_skip=1,
+        observation_encoding="float32"
     ):
         return cls(
             world_config={
@@ -114,11 +134,17 @@ class ZombpygGymEnv(gym.Env):
             fps=fps,
             agent_reward_configuration=agent_reward_configuration,
             friendly_fire_guard=friendly_fire_guard,
-            verbose=verbose
+            verbose=verbose,
+            visibility_cell_size=visibility_cell_size,
+            visibility_cache_dir=visibility_cache_dir,
+            profile=profile,
+            render_scale=render_scale,
+            frame_skip=frame_skip,
+            observation_encoding=observation_encoding
         )
 
     def get_observation(self):
-        return self.game.get_current_feedback()
+        return encode_observations(self.game.get_current_feedback(), self.observation_encoding)
     
     def get_frame_size(self):
         feedback_size = self.game.get_feedback_size()
@@ -140,8 +166,12 @@ class ZombpygGymEnv(gym.Env):
             done (bool): whether the episode has ended, in which case further step() calls will return undefined results
             info (dict): contains auxiliary diagnostic information (helpful for debugging, and sometimes learning)
         """
-        reward, observation, done, truncated = self.game.play_action(action_id)
+        reward, observation, done, truncated = self.game.play_action(action_id, num_frames=self.frame_skip)
+        observation = encode_observations(observation, self.observation_encoding)
         info = {}
+        if self.game.profiler is not None:
+            # The timings accumulated since profiling started (see Game.get_step_stats)
+            info["step_stats"] = self.game.get_step_stats()
             
         return observation, reward, done, truncated, info
 
@@ -160,7 +190,8 @@ class ZombpygGymEnv(gym.Env):
             info (dict): contains auxiliary diagnostic information
         """
         super().reset(seed=seed)
-        self.game.reset()
+        # The seed is passed on to the game's own generators, so the episode can be replayed
+        self.game.reset(seed=seed)
         return self.get_observation(), {}
 
     def render(self):
@@ -203,6 +234,9 @@ class ZombpygGymEnv(gym.Env):
         if self.render_mode == 'human':
             self.game.draw()
             return None
+        elif self.render_mode == 'rgb_array':
+            # Drawn offscreen, so no display is needed.  The frame is overwritten by the next call.
+            return self.game.get_frame()
         else:
             raise ValueError("mode={} is not supported".format(mode))
 
@@ -251,6 +285,7 @@ register(
 register(
     id='jvstinian/Zombpyg-v1', 
     entry_point='zombpyg.gym_env:ZombpygGymEnv',
+    vector_entry_point='zombpyg.vector_env:VectorZombpygEnv',
     max_episode_steps=300*50,
     nondeterministic=True,
     kwargs={
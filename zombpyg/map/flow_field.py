@@ -0,0 +1,155 @@
+import heapq
+import numpy
+
+from zombpyg.utils.intersection import intersect_segments_batch
+
+
+# The 8 neighbours of a cell, as offsets (di, dj), with the cost of moving to them
+NEIGHBOUR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+NEIGHBOUR_COSTS = (1.0, 1.0, 1.0, 1.0, numpy.sqrt(2.0), numpy.sqrt(2.0), numpy.sqrt(2.0), numpy.sqrt(2.0))
+
+
+def get_segment_distances(starts, ends, wall_starts, wall_ends):
+    """The distances between the segments (arrays of shape (n, 2)) and the walls (arrays of shape (m, 2)), as (n, m)."""
+    starts, ends = starts[:, None, :], ends[:, None, :]
+    wall_starts, wall_ends = wall_starts[None, :, :], wall_ends[None, :, :]
+    _, _, crossing = intersect_segments_batch(starts, ends, wall_starts, wall_ends)
+
+    def point_distances(points, p0, p1):
+        d = p1 - p0
+        dd = numpy.sum(d * d, axis=-1)
+        a = numpy.clip(numpy.sum((points - p0) * d, axis=-1) / numpy.where(dd > 0, dd, 1.0), 0.0, 1.0)
+        return numpy.sqrt(numpy.sum((points - p0 - a[..., None] * d) ** 2, axis=-1))
+
+    distances = numpy.minimum(
+        numpy.minimum(point_distances(starts, wall_starts, wall_ends), point_distances(ends, wall_starts, wall_ends)),
+        numpy.minimum(point_distances(wall_starts, starts, ends), point_distances(wall_ends, starts, ends)),
+    )
+    return numpy.where(crossing, 0.0, distances)
+
+
+class FlowField(object):
+    """Directions towards the nearest target (the living agents and players), for all the cells of a grid.
+
+       The moves between neighbouring cells that pass within clearance of a wall are removed
+       once, as the walls don't move.  The default clearance lets zombies of radius 10 through,
+       as their moves are checked at the corners of their bounding box (see get_valid_position).
+       The distances from the targets are then computed every update_interval steps with
+       Dijkstra's algorithm, starting from the cells around the targets in sight of them, and
+       each cell points to the neighbour it was reached from (or to the target), so that any
+       number of zombies can follow the field with a lookup (see get_direction).
+    """
+    def __init__(self, wall_grid, size, cell_size=16, clearance=14.0, update_interval=5):
+        if update_interval < 1:
+            raise ValueError(f"The update interval of a flow field must be positive, not {update_interval}")
+        self.wall_grid = wall_grid
+        self.size = size
+        self.cell_size = cell_size
+        self.clearance = clearance
+        self.update_interval = update_interval
+        self.shape = (-(-size[0] // cell_size), -(-size[1] // cell_size))
+        self.n_cells = self.shape[0] * self.shape[1]
+        nx, ny = self.shape
+        cells = numpy.arange(self.n_cells)
+        i, j = cells // ny, cells % ny
+        self.centers = (numpy.stack((i, j), axis=1) + 0.5) * cell_size
+
+        # The passable moves, as lists of (neighbour, cost) per cell
+        self.neighbours = [[] for _ in range(self.n_cells)]
+        for (di, dj), cost in zip(NEIGHBOUR_OFFSETS, NEIGHBOUR_COSTS):
+            on_grid = (i + di >= 0) & (i + di < nx) & (j + dj >= 0) & (j + dj < ny)
+            sources = cells[on_grid]
+            targets = (i[on_grid] + di) * ny + (j[on_grid] + dj)
+            passable = numpy.ones((len(sources),), dtype=bool)
+            if len(wall_grid.walls) > 0:
+                starts, ends = self.centers[sources], self.centers[targets]
+                candidates = wall_grid.get_candidates_for_segments(starts, ends, margin=clearance)
+                if len(candidates) > 0:
+                    distances = get_segment_distances(
+                        starts, ends, wall_grid.wall_starts[candidates], wall_grid.wall_ends[candidates]
+                    )
+                    passable = distances.min(axis=1) > clearance
+            for source, target in zip(sources[passable].tolist(), targets[passable].tolist()):
+                self.neighbours[source].append((target, cost))
+
+        self.distances = numpy.full((self.n_cells,), numpy.inf)
+        # The orientation (in degrees, as for the fighters) to follow from each cell, nan where there's none
+        self.directions = numpy.full((self.n_cells,), numpy.nan)
+        self.steps_until_update = 0
+        self.updates = 0
+
+    def get_cell(self, point):
+        """The index of the cell containing the point, or -1 off the grid."""
+        i = int(point[0] // self.cell_size)
+        j = int(point[1] // self.cell_size)
+        if (0 <= i < self.shape[0]) and (0 <= j < self.shape[1]) and (0 <= point[0]) and (0 <= point[1]):
+            return i * self.shape[1] + j
+        return -1
+
+    def update(self, targets):
+        """Compute the distances and directions towards the nearest of the target points."""
+        distances = [numpy.inf] * self.n_cells
+        parents = [-1] * self.n_cells
+        # The cells around the targets head straight for them
+        seed_directions = {}
+        nx, ny = self.shape
+        for point in targets:
+            cell = self.get_cell(point)
+            if cell < 0:
+                continue
+            i, j = divmod(cell, ny)
+            for di in (-1, 0, 1):
+                for dj in (-1, 0, 1):
+                    if not ((0 <= i + di < nx) and (0 <= j + dj < ny)):
+                        continue
+                    seed = (i + di) * ny + (j + dj)
+                    center = self.centers[seed]
+                    distance = numpy.hypot(point[0] - center[0], point[1] - center[1]) / self.cell_size
+                    if (distance < distances[seed]) and (
+                        (seed == cell) or not self.wall_grid.segment_collides(tuple(center), point)
+                    ):
+                        distances[seed] = distance
+                        seed_directions[seed] = numpy.rad2deg(
+                            numpy.arctan2(point[0] - center[0], -(point[1] - center[1]))
+                        )
+        heap = [(distances[seed], seed) for seed in seed_directions]
+        heapq.heapify(heap)
+        neighbours = self.neighbours
+        while heap:
+            distance, cell = heapq.heappop(heap)
+            if distance > distances[cell]:
+                continue
+            for neighbour, cost in neighbours[cell]:
+                new_distance = distance + cost
+                if new_distance < distances[neighbour]:
+                    distances[neighbour] = new_distance
+                    parents[neighbour] = cell
+                    heapq.heappush(heap, (new_distance, neighbour))
+
+        # New arrays rather than updates in place, so that snapshots of the field stay valid
+        self.distances = numpy.array(distances)
+        parents = numpy.array(parents)
+        directions = numpy.full((self.n_cells,), numpy.nan)
+        reached = parents >= 0
+        offsets = self.centers[parents[reached]] - self.centers[reached]
+        directions[reached] = numpy.rad2deg(numpy.arctan2(offsets[:, 0], -offsets[:, 1]))
+        for seed, direction in seed_directions.items():
+            if parents[seed] < 0:
+                directions[seed] = direction
+        self.directions = directions
+        self.updates += 1
+
+    def step(self, targets):
+        """Update the field if update_interval steps have passed since the last update."""
+        if self.steps_until_update <= 0:
+            self.update(targets)
+            self.steps_until_update = self.update_interval
+        self.steps_until_update -= 1
+
+    def get_direction(self, point):
+        """The orientation to follow from the point towards the nearest target, or None."""
+        cell = self.get_cell(point)
+        if cell < 0:
+            return None
+        direction = self.directions[cell]
+        return None if numpy.isnan(direction) else float(direction)
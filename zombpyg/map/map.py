@@ -4,6 +4,9 @@ from .objective import ObjectiveLocation
 from .spawns import SpawnLocation
 from .resourcespawns import ResourceSpawnLocation
 from .checkpoint import Checkpoint
+from .wall_grid import WallGrid
+from zombpyg.utils.pose_cache import PoseCache
+from .visibility import VisibilityTable
 
 
 class Map(object):
@@ -18,6 +21,24 @@ class Map(object):
         self.objectives = objectives
         self.resource_spawns = resource_spawns
         self.checkpoints = checkpoints
+        # Walls don't move, so the index for querying walls is built once, and the wall
+        # collisions of sensors and the movement estimates can be reused across episodes
+        self.wall_grid = WallGrid(walls)
+        self.sensor_cache = PoseCache()
+        self.movement_cache = PoseCache(maxsize=16384)
+        # Set by MapFactory, and used to name the files of the visibility tables
+        self.map_id = None
+        # The table of the lines of sight between cells, when enabled (see load_visibility_table)
+        self.visibility = None
+
+    def load_visibility_table(self, cell_size=16, max_distance=128, cache_dir=None):
+        """Load (or build and save, see VisibilityTable.load_or_build) the visibility table of the map."""
+        if (self.visibility is None) or (self.visibility.cell_size != cell_size) or (self.visibility.max_distance != max_distance):
+            self.visibility = VisibilityTable.load_or_build(
+                self.walls, self.size, map_id=self.map_id, cell_size=cell_size, max_distance=max_distance,
+                cache_dir=cache_dir
+            )
+        return self.visibility
 
 class DemoMap(Map):
     @staticmethod
@@ -269,7 +290,7 @@ class CatacombsMap(Map):
         ]
             
     @staticmethod
-    def build_map(w, h):
+    def build_map(w, h, rng=random):
         walls = [
             Wall(start=(0, 0), end=(0, h-1), width=1),
             Wall(start=(0, h-1), end=(w-1, h-1), width=1),
@@ -311,7 +332,7 @@ class CatacombsMap(Map):
         path_width_nodes = [(6*i + 1)*cell_width // 2 for i in range(0, 4)]
         path_height_nodes = [(6*i + 1)*cell_height // 2 for i in range(0, 4)]
         path_height_nodes.reverse()
-        up_nodes = random.sample(range(0, 6), 3)
+        up_nodes = rng.sample(range(0, 6), 3)
         
         # We consider resource spawns just off the crossroads.
         # We enumerate a shift in each direction at the crossroads.
@@ -596,12 +617,24 @@ class TinySpace1Map(Map):
         )
 
 class MapFactory(object):
+    MAP_IDS = (
+        "demo", "open_room", "easy_exit", "simple_hallway", "narrow_hallway",
+        "catacombs", "elevator", "tiny_space_v0", "tiny_space_v1",
+    )
+
     @staticmethod
     def get_default(w, h):
         return DemoMap.build_map(w, h)
     
     @staticmethod
-    def build_map(map_id, w, h):
+    def build_map(map_id, w, h, rng=random):
+        game_map = MapFactory.__build_map__(map_id, w, h, rng=rng)
+        # Unknown map ids get the default map
+        game_map.map_id = map_id if map_id in MapFactory.MAP_IDS else "demo"
+        return game_map
+
+    @staticmethod
+    def __build_map__(map_id, w, h, rng=random):
         if map_id == "demo":
             return DemoMap.build_map(w, h)
         elif map_id == "open_room":
@@ -613,7 +646,7 @@ class MapFactory(object):
         elif map_id == "narrow_hallway":
             return NarrowHallwayMap.build_map(w, h)
         elif map_id == "catacombs":
-            return CatacombsMap.build_map(w, h)
+            return CatacombsMap.build_map(w, h, rng=rng)
         elif map_id == "elevator":
             return HallwayElevatorMap.build_map(w, h)
         elif map_id == "tiny_space_v0":
@@ -2,7 +2,7 @@ from abc import ABC, abstractmethod
 from zombpyg.utils.geometry import calculate_distance
 from zombpyg.utils.surroundings import Color
 from zombpyg.core.things import RectangularThing, CircularThing
-from zombpyg.core.wall import Wall
+from zombpyg.utils.intersection import intersect_segments, point_on_segment
 
 class Objective(ABC):
     @abstractmethod
@@ -33,23 +33,20 @@ class ObjectiveLocation(RectangularThing, Objective):
         )
     
     def collide(self, start, end):
-        # we get the boundary of the rectangle as a set of walls
-        topleft = (self.left, self.top)
-        bottomleft = (self.left, self.top + self.height)
-        bottomright = (self.left + self.width, self.top + self.height)
-        topright = (self.left + self.width, self.top)
-        walls = [
-            Wall(topleft, bottomleft),
-            Wall(bottomleft, bottomright),
-            Wall(bottomright, topright),
-            Wall(topright, topleft),
+        # The boundary of the rectangle, as a sequence of edges
+        corners = [
+            (self.left, self.top),
+            (self.left, self.top + self.height),
+            (self.left + self.width, self.top + self.height),
+            (self.left + self.width, self.top),
         ]
 
         points = []
-        for wall in walls:
-            point = wall.collide(start, end)
-            if point is not None:
-                points.append(point)
+        for edge_start, edge_end in zip(corners, corners[1:] + corners[:1]):
+            parameters = intersect_segments(start, end, edge_start, edge_end)
+            if parameters is not None:
+                point = point_on_segment(edge_start, edge_end, parameters[1])
+                points.append((int(point[0]), int(point[1])))
 
         return points
 
@@ -19,8 +19,8 @@ class ResourceSpawnLocation(CircularThing):
         self.ammo_spawn_probability = ammo_spawn_probability
         self.ammo_spawn_life = ammo_spawn_life
     
-    def spawn_resource(self):
-        p = numpy.random.random()
+    def spawn_resource(self, np_rng):
+        p = np_rng.random()
         if p <= self.medical_spawn_probability:
             return MedicalSupplyResource(self.x, self.y, self.r, self.medical_spawn_life)
         elif p <= self.medical_spawn_probability + self.ammo_spawn_probability:
@@ -10,7 +10,7 @@ class SpawnLocation(RectangularThing):
         )
         self.initial_spawn_only = initial_spawn_only
     
-    def get_spawn_location(self):
-        x = numpy.random.randint(self.left, self.left + self.width)
-        y = numpy.random.randint(self.top, self.top + self.height)
+    def get_spawn_location(self, np_rng):
+        x = np_rng.integers(self.left, self.left + self.width)
+        y = np_rng.integers(self.top, self.top + self.height)
         return x, y
@@ -0,0 +1,293 @@
+import os
+import hashlib
+import numpy
+
+from zombpyg.utils.raycast import get_wall_segments
+
+
+def get_default_cache_dir():
+    return os.path.join(os.path.expanduser("~"), ".cache", "zombpyg")
+
+def get_walls_digest(walls):
+    wall_starts, wall_ends = get_wall_segments(walls)
+    return hashlib.sha1(wall_starts.tobytes() + wall_ends.tobytes()).hexdigest()[:16]
+
+
+class VisibilityTable(object):
+    """Whether walls stand between points, looked up by the square cells of a grid containing them.
+
+       For each pair of cells, a bit records whether every segment between a point of the
+       one cell and a point of the other is clear of the walls, and another whether every
+       such segment meets a wall.  Pairs of cells with neither bit set, such as cells close
+       to the end of a wall, or cells further apart than max_distance (lines of sight are only
+       sought within the vision distance of the fighters), are left to an exact test (see lookup).
+       Only the pairs within max_distance are stored, as a bitset per cell over the offsets of
+       its neighbourhood, so the table grows with the number of cells rather than its square.
+       Walls don't move, so the table is built once per map, and can be saved to and loaded from disk.
+    """
+    VERSION = 2
+
+    def __init__(self, size, cell_size, max_distance, digest, visible, blocked):
+        self.size = size
+        self.cell_size = cell_size
+        self.max_distance = max_distance
+        self.digest = digest
+        self.shape = (-(-size[0] // cell_size), -(-size[1] // cell_size))
+        self.n_cells = self.shape[0] * self.shape[1]
+        self.offsets = VisibilityTable.get_neighbourhood(cell_size, max_distance)
+        self.reach, self.offset_index = VisibilityTable.__get_offset_index__(self.offsets)
+        # Bitsets (as in numpy.packbits along the rows) of n_cells x len(offsets) bits, indexed by
+        # the first cell of a pair and the offset of the second cell from it
+        self.visible = visible
+        self.blocked = blocked
+
+    @staticmethod
+    def get_neighbourhood(cell_size, max_distance):
+        """The offsets (di, dj) of the cells with points less than max_distance away from the points of a cell."""
+        reach = int(numpy.ceil(max_distance / cell_size)) + 1
+        di, dj = numpy.meshgrid(numpy.arange(-reach, reach + 1), numpy.arange(-reach, reach + 1), indexing="ij")
+        offsets = numpy.stack((di.ravel(), dj.ravel()), axis=1)
+        gaps = numpy.maximum(numpy.abs(offsets) * float(cell_size) - cell_size, 0.0)
+        return offsets[numpy.sqrt(numpy.sum(gaps ** 2, axis=1)) < max_distance]
+
+    @staticmethod
+    def __get_offset_index__(offsets):
+        """The reach of the offsets along each axis, and the index of each offset (di, dj)
+           at [di + reach, dj + reach] of a square array, with -1 for the other offsets.
+        """
+        reach = int(numpy.abs(offsets).max())
+        offset_index = numpy.full((2 * reach + 1, 2 * reach + 1), -1, dtype=int)
+        offset_index[offsets[:, 0] + reach, offsets[:, 1] + reach] = numpy.arange(len(offsets))
+        return reach, offset_index
+
+    @staticmethod
+    def __get_neighbours__(shape, offsets):
+        """The (i, j) of the cells at the offsets from each cell of the grid, with shape (n_cells, n_offsets, 2),
+           and whether they are on the grid.
+        """
+        cells = numpy.arange(shape[0] * shape[1])
+        ij = numpy.stack((cells // shape[1], cells % shape[1]), axis=1)
+        neighbours = ij[:, None, :] + offsets[None, :, :]
+        on_grid = (neighbours >= 0).all(axis=-1) & (neighbours[..., 0] < shape[0]) & (neighbours[..., 1] < shape[1])
+        return neighbours, on_grid
+
+    @staticmethod
+    def build(walls, size, cell_size=16, max_distance=128, chunk_size=2048):
+        """Build the table for the walls of a map of the given size (w, h)."""
+        nx, ny = -(-size[0] // cell_size), -(-size[1] // cell_size)
+        n_cells = nx * ny
+        cells = numpy.arange(n_cells)
+        ij = numpy.stack((cells // ny, cells % ny), axis=1)
+        lower = ij.astype(float) * cell_size
+        offsets = numpy.array([[0, 0], [cell_size, 0], [0, cell_size], [cell_size, cell_size]], dtype=float)
+        # The corners of the cells, with shape (n_cells, 4, 2)
+        corners = lower[:, None, :] + offsets[None, :, :]
+
+        neighbourhood = VisibilityTable.get_neighbourhood(cell_size, max_distance)
+        reach, offset_index = VisibilityTable.__get_offset_index__(neighbourhood)
+        # Each pair of cells is classified once, through the offsets going forwards, and recorded
+        # for both of its cells
+        forwards = numpy.flatnonzero(
+            (neighbourhood[:, 0] > 0) | ((neighbourhood[:, 0] == 0) & (neighbourhood[:, 1] >= 0))
+        )
+        backwards = offset_index[reach - neighbourhood[forwards, 0], reach - neighbourhood[forwards, 1]]
+        second_ij, on_grid = VisibilityTable.__get_neighbours__((nx, ny), neighbourhood[forwards])
+        first, forward_idx = numpy.nonzero(on_grid)
+        second = second_ij[first, forward_idx, 0] * ny + second_ij[first, forward_idx, 1]
+
+        wall_starts, wall_ends = get_wall_segments(walls)
+        visible = numpy.zeros((n_cells, len(neighbourhood)), dtype=bool)
+        blocked = numpy.zeros((n_cells, len(neighbourhood)), dtype=bool)
+        for start in range(0, len(first), chunk_size):
+            a = first[start:start + chunk_size]
+            b = second[start:start + chunk_size]
+            f = forward_idx[start:start + chunk_size]
+            pair_visible, pair_blocked = VisibilityTable.__classify_pairs__(
+                corners[a], corners[b], wall_starts, wall_ends
+            )
+            visible[a, forwards[f]] = visible[b, backwards[f]] = pair_visible
+            blocked[a, forwards[f]] = blocked[b, backwards[f]] = pair_blocked
+        return VisibilityTable(
+            size, cell_size, max_distance, get_walls_digest(walls),
+            numpy.packbits(visible, axis=1), numpy.packbits(blocked, axis=1)
+        )
+
+    @staticmethod
+    def __classify_pairs__(corners_a, corners_b, wall_starts, wall_ends, eps=1e-6):
+        n_pairs = len(corners_a)
+        visible = numpy.ones((n_pairs,), dtype=bool)
+        blocked = numpy.zeros((n_pairs,), dtype=bool)
+        # Only the walls meeting the bounding box of the two cells can meet the segments between them
+        lower = numpy.minimum(corners_a[:, 0, :], corners_b[:, 0, :])
+        upper = numpy.maximum(corners_a[:, 3, :], corners_b[:, 3, :])
+        wall_lower = numpy.minimum(wall_starts, wall_ends)
+        wall_upper = numpy.maximum(wall_starts, wall_ends)
+        overlaps = (
+            (wall_lower[None, :, :] <= upper[:, None, :] + eps) & (wall_upper[None, :, :] >= lower[:, None, :] - eps)
+        ).all(axis=-1)
+        pair_idx, wall_idx = numpy.nonzero(overlaps)
+        if len(pair_idx) == 0:
+            return visible, blocked
+        # One entry per pair of cells and wall, with the corners of shape (entries, 4, 2)
+        corners_a = corners_a[pair_idx]
+        corners_b = corners_b[pair_idx]
+        p0 = wall_starts[wall_idx]
+        d = wall_ends[wall_idx] - p0
+        normals = numpy.stack((-d[:, 1], d[:, 0]), axis=-1)
+
+        # The wall is clear of the pair if it doesn't meet the convex hull of the two cells, as
+        # shown by a separating axis, among the normal to the line between the cells and the
+        # normal to the wall (the x and y axes are those of the bounding boxes)
+        hull = numpy.concatenate((corners_a, corners_b), axis=1)
+        direction = corners_b[:, 0, :] - corners_a[:, 0, :]
+        separated = numpy.zeros((len(pair_idx),), dtype=bool)
+        for axis in (numpy.stack((-direction[:, 1], direction[:, 0]), axis=-1), normals):
+            hull_projections = numpy.sum(hull * axis[:, None, :], axis=-1)
+            start_projections = numpy.sum(p0 * axis, axis=-1)
+            end_projections = numpy.sum((p0 + d) * axis, axis=-1)
+            margin = eps * (1.0 + numpy.abs(hull_projections).max(axis=-1))
+            separated |= (numpy.minimum(start_projections, end_projections) > hull_projections.max(axis=-1) + margin)
+            separated |= (numpy.maximum(start_projections, end_projections) < hull_projections.min(axis=-1) - margin)
+        visible[pair_idx[~separated]] = False
+
+        # The wall blocks the pair if its line separates the cells, and every segment between
+        # corners of the cells crosses the line within the wall.  The crossings of all the
+        # segments between the cells lie between those of the segments between corners.
+        lengths = numpy.sqrt(numpy.sum(d * d, axis=-1))
+        sides_a = numpy.sum((corners_a - p0[:, None, :]) * normals[:, None, :], axis=-1)
+        sides_b = numpy.sum((corners_b - p0[:, None, :]) * normals[:, None, :], axis=-1)
+        margin = eps * (1.0 + lengths * (1.0 + numpy.abs(p0).max(axis=-1)))
+        apart = (lengths > 0) & (
+            ((sides_a.min(axis=-1) > margin) & (sides_b.max(axis=-1) < -margin))
+            | ((sides_a.max(axis=-1) < -margin) & (sides_b.min(axis=-1) > margin))
+        )
+        corners_a, corners_b = corners_a[apart], corners_b[apart]
+        sides_a, sides_b = sides_a[apart], sides_b[apart]
+        p0, d, lengths = p0[apart], d[apart], lengths[apart]
+        # Crossings of the segments from the corners i of a to the corners j of b, as parameters along the walls
+        t = sides_a[:, :, None] / (sides_a[:, :, None] - sides_b[:, None, :])
+        crossings = corners_a[:, :, None, :] + t[..., None] * (corners_b[:, None, :, :] - corners_a[:, :, None, :])
+        u = numpy.sum((crossings - p0[:, None, None, :]) * d[:, None, None, :], axis=-1) / (lengths ** 2)[:, None, None]
+        u_margin = eps * (1.0 + 1.0 / lengths)
+        within = (u.min(axis=(1, 2)) > u_margin) & (u.max(axis=(1, 2)) < 1.0 - u_margin)
+        blocked[pair_idx[apart][within]] = True
+        return visible, blocked & ~visible
+
+    def get_cell(self, point):
+        """The index of the cell containing the point, or -1 off the grid."""
+        i = int(point[0] // self.cell_size)
+        j = int(point[1] // self.cell_size)
+        if (0 <= i < self.shape[0]) and (0 <= j < self.shape[1]) and (0 <= point[0]) and (0 <= point[1]):
+            return i * self.shape[1] + j
+        return -1
+
+    def lookup(self, start, end):
+        """True if the segment from start to end is clear of the walls, False if it meets a wall,
+           or None if the table can't tell, and the segment has to be tested against the walls.
+        """
+        a = self.get_cell(start)
+        b = self.get_cell(end)
+        if (a < 0) or (b < 0):
+            return None
+        di = b // self.shape[1] - a // self.shape[1]
+        dj = b % self.shape[1] - a % self.shape[1]
+        if (abs(di) > self.reach) or (abs(dj) > self.reach):
+            return None
+        idx = self.offset_index[di + self.reach, dj + self.reach]
+        if idx < 0:
+            return None
+        byte, bit = idx >> 3, 7 - (idx & 7)
+        if (self.visible[a, byte] >> bit) & 1:
+            return True
+        if (self.blocked[a, byte] >> bit) & 1:
+            return False
+        return None
+
+    def lookup_batch(self, starts, ends):
+        """Batched lookup, with 1 for clear, 0 for blocked, and -1 for the segments to be tested."""
+        starts = numpy.asarray(starts, dtype=float).reshape((-1, 2))
+        ends = numpy.asarray(ends, dtype=float).reshape((-1, 2))
+        cells = []
+        for points in (starts, ends):
+            ij = numpy.floor(points / self.cell_size).astype(int)
+            on_grid = (points >= 0).all(axis=1) & (ij[:, 0] < self.shape[0]) & (ij[:, 1] < self.shape[1])
+            cells.append((ij, on_grid))
+        (a_ij, a_on_grid), (b_ij, b_on_grid) = cells
+        d = b_ij - a_ij
+        known = a_on_grid & b_on_grid & (numpy.abs(d) <= self.reach).all(axis=1)
+        idx = numpy.where(
+            known, self.offset_index[numpy.clip(d[:, 0] + self.reach, 0, 2 * self.reach),
+                                     numpy.clip(d[:, 1] + self.reach, 0, 2 * self.reach)], -1
+        )
+        known &= (idx >= 0)
+        a = numpy.where(known, a_ij[:, 0] * self.shape[1] + a_ij[:, 1], 0)
+        idx = numpy.where(known, idx, 0)
+        bits = 7 - (idx & 7)
+        visible = (self.visible[a, idx >> 3] >> bits) & 1
+        blocked = (self.blocked[a, idx >> 3] >> bits) & 1
+        return numpy.where(known & (visible == 1), 1, numpy.where(known & (blocked == 1), 0, -1))
+
+    def get_known_fraction(self):
+        """The fraction of the pairs of cells within max_distance for which the table doesn't need an exact test."""
+        n_offsets = len(self.offsets)
+        known = numpy.unpackbits(self.visible | self.blocked, axis=1, count=n_offsets).astype(bool)
+        _, on_grid = VisibilityTable.__get_neighbours__(self.shape, self.offsets)
+        return float(numpy.sum(known & on_grid) / numpy.sum(on_grid))
+
+    def save(self, path):
+        # Written to a temporary file first, so that processes reading the table never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            numpy.savez_compressed(
+                f,
+                version=numpy.array(VisibilityTable.VERSION),
+                size=numpy.array(self.size),
+                cell_size=numpy.array(self.cell_size),
+                max_distance=numpy.array(self.max_distance),
+                digest=numpy.array(self.digest),
+                visible=self.visible,
+                blocked=self.blocked,
+            )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path):
+        with numpy.load(path) as data:
+            if int(data["version"]) != VisibilityTable.VERSION:
+                raise ValueError(f"Unsupported visibility table version {int(data['version'])} in {path}")
+            return VisibilityTable(
+                tuple(data["size"].tolist()), int(data["cell_size"]), float(data["max_distance"]), str(data["digest"]),
+                data["visible"], data["blocked"]
+            )
+
+    @staticmethod
+    def get_path(cache_dir, map_id, size, cell_size, max_distance, digest):
+        return os.path.join(
+            cache_dir, f"visibility-{map_id}-{size[0]}x{size[1]}-{cell_size}-{max_distance:g}-{digest}.npz"
+        )
+
+    @staticmethod
+    def load_or_build(walls, size, map_id=None, cell_size=16, max_distance=128, cache_dir=None):
+        """The table for the walls, loaded from cache_dir (by default ~/.cache/zombpyg) when it has been
+           saved before, else built and saved there.  Maps without a map_id are not saved.
+        """
+        if map_id is None:
+            return VisibilityTable.build(walls, size, cell_size=cell_size, max_distance=max_distance)
+        if cache_dir is None:
+            cache_dir = get_default_cache_dir()
+        digest = get_walls_digest(walls)
+        path = VisibilityTable.get_path(cache_dir, map_id, size, cell_size, max_distance, digest)
+        if os.path.exists(path):
+            try:
+                table = VisibilityTable.load(path)
+            except ValueError:
+                # Saved by another version, so built again
+                table = None
+            if (table is not None) and (
+                (table.size == tuple(size)) and (table.cell_size == cell_size) and (table.digest == digest)
+            ):
+                return table
+        table = VisibilityTable.build(walls, size, cell_size=cell_size, max_distance=max_distance)
+        os.makedirs(cache_dir, exist_ok=True)
+        table.save(path)
+        return table
@@ -0,0 +1,178 @@
+import numpy
+
+from zombpyg.utils.raycast import get_wall_segments
+
+
+class WallGrid(object):
+    """A uniform grid of square cells, each listing the walls passing through it.
+
+       Walls don't move once a map has been built, so the grid is built once per map
+       and shared by every query.  The queries return the indices (in increasing order)
+       of the walls that can possibly be touched, which can then be tested exactly.
+    """
+    def __init__(self, walls, cell_size=32, vectorized_query_threshold=64, box_query_cells=36):
+        self.walls = walls
+        self.cell_size = cell_size
+        self.box_query_cells = box_query_cells
+        self.vectorized_query_threshold = vectorized_query_threshold
+        self.wall_starts, self.wall_ends = get_wall_segments(walls)
+        self.no_walls = numpy.zeros((0,), dtype=int)
+        self.all_walls = numpy.arange(len(walls))
+
+        # The grid covers the walls, with a border of one cell
+        if len(walls) > 0:
+            lower = numpy.minimum(self.wall_starts.min(axis=0), self.wall_ends.min(axis=0))
+            upper = numpy.maximum(self.wall_starts.max(axis=0), self.wall_ends.max(axis=0))
+        else:
+            lower = upper = numpy.zeros((2,))
+        self.origin = tuple((numpy.floor(lower / cell_size).astype(int) - 1).tolist())
+        self.shape = tuple((numpy.floor(upper / cell_size).astype(int) + 2 - self.origin).tolist())
+
+        cells = {}
+        for idx in range(len(walls)):
+            for cell_id in self.__get_cells_touching_segment__(self.wall_starts[idx], self.wall_ends[idx]):
+                cells.setdefault(cell_id, []).append(idx)
+        # Cell contents in compressed sparse row format, along with a dictionary for small queries
+        self.cells = {cell_id: numpy.array(indices, dtype=int) for cell_id, indices in cells.items()}
+        counts = numpy.zeros((self.shape[0] * self.shape[1],), dtype=int)
+        for cell_id, indices in self.cells.items():
+            counts[cell_id] = len(indices)
+        self.indptr = numpy.concatenate(([0], numpy.cumsum(counts)))
+        self.indices = numpy.concatenate(
+            [self.no_walls] + [self.cells[cell_id] for cell_id in sorted(self.cells)]
+        )
+
+    def __get_cell_ids__(self, i, j):
+        """Ids of the cells with (integer arrays of) grid coordinates i and j, or -1 when off the grid."""
+        i = i - self.origin[0]
+        j = j - self.origin[1]
+        inside = (i >= 0) & (i < self.shape[0]) & (j >= 0) & (j < self.shape[1])
+        return numpy.where(inside, i * self.shape[1] + j, -1)
+
+    def __get_cells_touching_segment__(self, start, end):
+        # A cell touching a segment has its center within half a diagonal of the segment
+        lower = numpy.floor(numpy.minimum(start, end) / self.cell_size).astype(int)
+        upper = numpy.floor(numpy.maximum(start, end) / self.cell_size).astype(int)
+        i, j = numpy.meshgrid(
+            numpy.arange(lower[0], upper[0] + 1), numpy.arange(lower[1], upper[1] + 1), indexing="ij"
+        )
+        i, j = i.ravel(), j.ravel()
+        centers = (numpy.stack((i, j), axis=1) + 0.5) * self.cell_size
+        d = end - start
+        dd = numpy.inner(d, d)
+        a = numpy.clip((centers - start) @ d / dd, 0.0, 1.0) if dd > 0 else numpy.zeros((len(i),))
+        distances = numpy.linalg.norm(centers - start - a[:, None] * d, axis=1)
+        near = distances <= self.cell_size * numpy.sqrt(0.5)
+        return self.__get_cell_ids__(i[near], j[near]).tolist()
+
+    def __gather__(self, cell_ids):
+        starts = self.indptr[cell_ids]
+        lengths = self.indptr[cell_ids + 1] - starts
+        total = lengths.sum()
+        if total == 0:
+            return self.no_walls
+        # Concatenate the ranges indices[start:start+length] without a Python loop
+        offsets = numpy.repeat(starts - numpy.cumsum(lengths) + lengths, lengths)
+        found = numpy.zeros((len(self.walls),), dtype=bool)
+        found[self.indices[offsets + numpy.arange(total)]] = True
+        return numpy.flatnonzero(found)
+
+    def get_candidates_for_segments(self, starts, ends, margin=0.0):
+        """Indices of the walls that might come within margin of any of the segments (arrays of shape (n, 2))."""
+        starts = numpy.asarray(starts, dtype=float).reshape((-1, 2))
+        ends = numpy.asarray(ends, dtype=float).reshape((-1, 2))
+        if (len(starts) == 0) or (len(self.walls) == 0):
+            return self.no_walls
+
+        # Sample each segment at intervals of at most a cell.  Every point within margin of
+        # a segment is then within margin plus half a cell of a sample, so lies in a cell
+        # at most `reach` cells away from the cell of that sample.
+        lengths = numpy.sqrt(numpy.sum((ends - starts) ** 2, axis=1))
+        counts = numpy.ceil(lengths / self.cell_size).astype(int) + 1
+        segment = numpy.repeat(numpy.arange(len(starts)), counts)
+        first = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        t = (numpy.arange(counts.sum()) - first) / numpy.maximum(counts[segment] - 1, 1)
+        samples = starts[segment] + t[:, None] * (ends - starts)[segment]
+        reach = int(numpy.ceil((margin + 0.5 * self.cell_size) / self.cell_size))
+        # Cells off the grid have no walls, so the samples can be clamped to just off the grid
+        i = numpy.clip(
+            numpy.floor(samples[:, 0] / self.cell_size).astype(int) - self.origin[0], -reach, self.shape[0] + reach - 1
+        ) + reach
+        j = numpy.clip(
+            numpy.floor(samples[:, 1] / self.cell_size).astype(int) - self.origin[1], -reach, self.shape[1] + reach - 1
+        ) + reach
+
+        # Mark the cells containing the samples on a padded grid, and then dilate the marks by
+        # reach cells, along the rows and then along the columns
+        marked = numpy.zeros((self.shape[0] + 2 * reach, self.shape[1] + 2 * reach), dtype=bool)
+        marked[i, j] = True
+        dilated = marked.copy()
+        for d in range(1, reach + 1):
+            dilated[d:, :] |= marked[:-d, :]
+            dilated[:-d, :] |= marked[d:, :]
+        marked = dilated.copy()
+        for d in range(1, reach + 1):
+            dilated[:, d:] |= marked[:, :-d]
+            dilated[:, :-d] |= marked[:, d:]
+        cell_ids = numpy.flatnonzero(dilated[reach:-reach, reach:-reach])
+        return self.__gather__(cell_ids)
+
+    def get_candidates_for_rays(self, starts, ends):
+        """Indices of the walls to test in a vectorized ray cast (see cast_rays).
+
+           With only a few walls, testing all of them at once is cheaper than the
+           broadphase query, so all the walls are returned.
+        """
+        if len(self.walls) <= self.vectorized_query_threshold:
+            return self.all_walls
+        return self.get_candidates_for_segments(starts, ends)
+
+    def get_candidates_for_segment(self, start, end, margin=0.0):
+        """Indices of the walls that might come within margin of the segment from start to end."""
+        i0 = int((min(start[0], end[0]) - margin) // self.cell_size)
+        j0 = int((min(start[1], end[1]) - margin) // self.cell_size)
+        i1 = int((max(start[0], end[0]) + margin) // self.cell_size)
+        j1 = int((max(start[1], end[1]) + margin) // self.cell_size)
+        if (i1 - i0 <= 1) and (j1 - j0 <= 1):
+            # Short segments, such as the steps taken by fighters, are common,
+            # so we look up the (at most four) cells in the bounding box directly.
+            found = []
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    ci = i - self.origin[0]
+                    cj = j - self.origin[1]
+                    if (0 <= ci < self.shape[0]) and (0 <= cj < self.shape[1]):
+                        indices = self.cells.get(ci * self.shape[1] + cj)
+                        if indices is not None:
+                            found.append(indices)
+            if not found:
+                return self.no_walls
+            elif len(found) == 1:
+                return found[0]
+            return numpy.unique(numpy.concatenate(found))
+        if (i1 - i0 + 1) * (j1 - j0 + 1) <= self.box_query_cells:
+            # Small boxes, such as the surroundings of a fighter, are cheaper to gather whole
+            i0, i1 = max(i0 - self.origin[0], 0), min(i1 - self.origin[0], self.shape[0] - 1)
+            j0, j1 = max(j0 - self.origin[1], 0), min(j1 - self.origin[1], self.shape[1] - 1)
+            if (i0 > i1) or (j0 > j1):
+                return self.no_walls
+            cell_ids = numpy.arange(i0, i1 + 1)[:, None] * self.shape[1] + numpy.arange(j0, j1 + 1)[None, :]
+            return self.__gather__(cell_ids.ravel())
+        return self.get_candidates_for_segments([start], [end], margin=margin)
+
+    def get_candidates_for_circle(self, center, radius):
+        """Indices of the walls that might come within radius of center."""
+        return self.get_candidates_for_segment(center, center, margin=radius)
+
+    def get_walls_near_segment(self, start, end, margin=0.0):
+        return [self.walls[idx] for idx in self.get_candidates_for_segment(start, end, margin=margin)]
+
+    def get_walls_near_circle(self, center, radius):
+        return [self.walls[idx] for idx in self.get_candidates_for_circle(center, radius)]
+
+    def segment_collides(self, start, end):
+        """Whether the segment from start to end meets any wall."""
+        for idx in self.get_candidates_for_segment(start, end):
+            if self.walls[idx].collide(start, end) is not None:
+                return True
+        return False
@@ -41,7 +41,7 @@ class WorldConfigurationBuilder(ABC):
             return jsonobj
 
     @abstractmethod
-    def build_world_configuration(self, last_game_state: GameState) -> WorldConfiguration:
+    def build_world_configuration(self, last_game_state: GameState, rng=random) -> WorldConfiguration:
         pass
     
     @abstractmethod
@@ -70,9 +70,9 @@ class SingleMapBuilder(WorldConfigurationBuilder):
             parameters.get("minimum_zombies"),
         )
     
-    def build_world_configuration(self, last_game_state: GameState):
+    def build_world_configuration(self, last_game_state: GameState, rng=random):
         if last_game_state == GameState.UNINITIALIZED:
-            game_map = MapFactory.build_map(self.map_id, self.w, self.h)
+            game_map = MapFactory.build_map(self.map_id, self.w, self.h, rng=rng)
             return True, WorldConfiguration(game_map, self.initial_zombies, self.minimum_zombies)
         else:
             return False, None
@@ -99,13 +99,13 @@ class RandomMapBuilder(WorldConfigurationBuilder):
     # In the following, last_game_state is not used.
     # Instead, when the random selection indicates a new map is to be used, we generate
     # the underlying map using the UNINITIALIZED state.
-    def build_world_configuration(self, last_game_state: GameState):
-        next_index = random.choices(range(0, len(self.weights)), weights=self.weights, k=1)[0]
+    def build_world_configuration(self, last_game_state: GameState, rng=random):
+        next_index = rng.choices(range(0, len(self.weights)), weights=self.weights, k=1)[0]
         if self.last_map_builder_index is None or (self.last_map_builder_index != next_index):
             self.last_map_builder_index = next_index
             map_builder = self.map_builders[self.last_map_builder_index]
             adjusted_game_state = GameState.UNINITIALIZED
-            return map_builder.build_world_configuration(adjusted_game_state)
+            return map_builder.build_world_configuration(adjusted_game_state, rng=rng)
         else:
             # No change in map
             return False, None
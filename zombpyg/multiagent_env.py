@@ -1,9 +1,9 @@
 #!/usr/bin/env python
 from os import path
-from gymnasium.spaces import Box
 from gymnasium.spaces.discrete import Discrete
 from zombpyg.game import Game
 from zombpyg.agent import AgentActions
+from zombpyg.utils.observations import get_observation_space, encode_observations, check_observation_encoding
 
 
 # TODO: When we update from nixos-23.05, we will need to make sure this properly conforms with PettingZoo's ParallelEnv.
@@ -12,7 +12,7 @@ class MultiagentZombpygEnv(object):
     """
     # See the supported modes in the render method
     metadata = {
-        'render.modes': ['human']
+        'render.modes': ['human', 'rgb_array']
     }
 
     # reward_range doesn't appear to be mentioned in the ParallelEnv API, but we keep it anyway
@@ -37,7 +37,12 @@ class MultiagentZombpygEnv(object):
         fps=50,
         agent_reward_configuration={},
         friendly_fire_guard=False,
-        verbose=False
+        verbose=False,
+        visibility_cell_size=None,
+        visibility_cache_dir=None,
+        render_scale=1.0,
+        frame_skip=1,
+        observation_encoding="float32"
     ):
         if render_mode is not None and (render_mode not in self.metadata.get('render.modes', [])):
             raise ValueError(f"In gymnasium environment, render_mode {render_mode} is not valid, must be one of {', '.join(self.metadata.get('render.modes', []))}")
@@ -55,7 +60,15 @@ class MultiagentZombpygEnv(object):
             agent_reward_configuration=agent_reward_configuration,
             friendly_fire_guard=friendly_fire_guard,
             verbose=verbose,
+            visibility_cell_size=visibility_cell_size,
+            visibility_cache_dir=visibility_cache_dir,
+            render_scale=render_scale,
         )
+        # Each action is repeated for frame_skip world steps (see Game.play_actions)
+        self.frame_skip = frame_skip
+        # The observations are float32, or float16 or uint8 to save memory (see encode_observations)
+        check_observation_encoding(observation_encoding)
+        self.observation_encoding = observation_encoding
 
         self.agents = agent_ids
         self.possible_agents = agent_ids
@@ -73,15 +86,18 @@ class MultiagentZombpygEnv(object):
 
     # setting observation_space in the constructor with the help of the following
     def _get_observation_spaces(self):
-        return { agent_id: Box(low=0.0, high=400.0, shape=self.game.get_feedback_size()) for agent_id in self.possible_agents }
+        return {
+            agent_id: get_observation_space(self.game.get_feedback_size(), self.observation_encoding)
+            for agent_id in self.possible_agents
+        }
 
     def get_observation(self):
         ret = {}
-        for agent in self.game.world.agents:
-            if agent.agent_id in self.agents: # This indicates the agent was alive before the step
-                agentobs = agent.sensor_feedback()
-                agentobs = agentobs.reshape((1, len(agentobs), 1))
-                ret[agent.agent_id] = agentobs
+        # An agent in self.agents was alive before the step
+        agents = [agent for agent in self.game.world.agents if agent.agent_id in self.agents]
+        for agent, agentobs in zip(agents, self.game.world.get_sensor_feedbacks(agents)):
+            agentobs = agentobs.reshape((1, len(agentobs), 1))
+            ret[agent.agent_id] = encode_observations(agentobs, self.observation_encoding)
         # return the observation and info
         return ret, {}
 
@@ -111,12 +127,15 @@ class MultiagentZombpygEnv(object):
                 )
             )
         
-        rewardslist, observationslist, doneflag, truncatedflag = self.game.play_actions(agent_actions)
+        rewardslist, observationslist, doneflag, truncatedflag = self.game.play_actions(agent_actions, num_frames=self.frame_skip)
         # form returns
         # rewardslist and observationslist are for all agents, not just those that were active at the beginning of the step or are still alive
         allrewards = { agent_id: reward for agent_id, reward in zip(self.possible_agents, rewardslist) }
         rewards = { agent_id: allrewards[agent_id] for agent_id in self.agents }
-        allobservations = { agent_id: observation for agent_id, observation in zip(self.possible_agents, observationslist) }
+        allobservations = {
+            agent_id: encode_observations(observation, self.observation_encoding)
+            for agent_id, observation in zip(self.possible_agents, observationslist)
+        }
         observations = { agent_id: allobservations[agent_id] for agent_id in self.agents }
         done = { agent_id: doneflag for agent_id in self.agents }
         truncated = { agent_id: truncatedflag for agent_id in self.agents }
@@ -135,18 +154,20 @@ class MultiagentZombpygEnv(object):
             dictionary of observations (dict[AgentID, ObsType]): the initial observations
             dictionary of info (dict[AgentID, dict]): additional information for each agent
         """
-        self.game.reset()
+        self.game.reset(seed=seed)
         self.agents = self.possible_agents
         return self.get_observation()
 
     def render(self):
-        """Renders the environment.  Only 'human' is supported in this implementation.
+        """Renders the environment, either to the display ('human') or as an RGB array ('rgb_array').
         Args:
             mode (str): the mode to render with
         """
         if self.render_mode == 'human':
             self.game.draw()
             return None
+        elif self.render_mode == 'rgb_array':
+            return self.game.get_frame()
         else:
             raise ValueError("mode={} is not supported".format(mode))
 
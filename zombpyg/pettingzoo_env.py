@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+import numpy
+try:
+    from pettingzoo.utils.env import ParallelEnv
+except ImportError as ex:
+    raise ImportError(
+        "The PettingZoo environment requires pettingzoo, which can be installed with `pip install zombpyg[pettingzoo]`"
+    ) from ex
+from zombpyg.array_multiagent_env import ArrayMultiagentZombpygEnv
+
+
+class ParallelZombpygEnv(ParallelEnv):
+    """PettingZoo ParallelEnv for multiagent play, built on ArrayMultiagentZombpygEnv.
+
+    The observations of the agents have shape (obs_dim,).  Agents are removed from
+    agents once terminated (when they die or the game ends) or truncated, and the
+    agents missing from the actions of a step don't act.  The keyword arguments are
+    those of ArrayMultiagentZombpygEnv.
+    """
+    metadata = {
+        'name': 'zombpyg_v0',
+        'render_modes': ArrayMultiagentZombpygEnv.metadata['render_modes'],
+        'is_parallelizable': True,
+    }
+
+    def __init__(self, **kwargs):
+        self.env = ArrayMultiagentZombpygEnv(**kwargs)
+        self.render_mode = self.env.render_mode
+        self.possible_agents = list(self.env.agent_ids)
+        self.agent_indices = {agent_id: idx for idx, agent_id in enumerate(self.possible_agents)}
+        self.agents = []
+        self.observation_spaces = {agent_id: self.env.single_observation_space for agent_id in self.possible_agents}
+        self.action_spaces = {agent_id: self.env.single_action_space for agent_id in self.possible_agents}
+
+    def observation_space(self, agent):
+        return self.observation_spaces[agent]
+
+    def action_space(self, agent):
+        return self.action_spaces[agent]
+
+    def reset(self, seed=None, options=None):
+        observations, alive = self.env.reset(seed=seed, options=options)
+        self.agents = [agent_id for agent_id in self.possible_agents if alive[self.agent_indices[agent_id]]]
+        return (
+            {agent_id: observations[self.agent_indices[agent_id]].copy() for agent_id in self.agents},
+            {agent_id: {} for agent_id in self.agents},
+        )
+
+    def step(self, actions):
+        action_array = numpy.full((self.env.n_agents,), self.env.no_action_id, dtype=int)
+        for agent_id, action in actions.items():
+            action_array[self.agent_indices[agent_id]] = action
+        observations, rewards, terminations, truncations, _ = self.env.step(action_array)
+
+        indices = [self.agent_indices[agent_id] for agent_id in self.agents]
+        results = (
+            {agent_id: observations[idx].copy() for agent_id, idx in zip(self.agents, indices)},
+            {agent_id: float(rewards[idx]) for agent_id, idx in zip(self.agents, indices)},
+            {agent_id: bool(terminations[idx]) for agent_id, idx in zip(self.agents, indices)},
+            {agent_id: bool(truncations[idx]) for agent_id, idx in zip(self.agents, indices)},
+            {agent_id: {} for agent_id in self.agents},
+        )
+        self.agents = [
+            agent_id for agent_id, idx in zip(self.agents, indices)
+            if not (terminations[idx] or truncations[idx])
+        ]
+        return results
+
+    def render(self):
+        return self.env.render()
+
+    def close(self):
+        self.env.close()
@@ -10,7 +10,7 @@ class PlayerBuilder(object):
         self.friendly_fire_guard = friendly_fire_guard
 
     def create_player(self, x, y, world):
-        weapon = WeaponFactory.create_weapon(self.weapon_id, self.friendly_fire_guard)
+        weapon = WeaponFactory.create_weapon(self.weapon_id, self.friendly_fire_guard, rng=world.rng)
         if self.player_id == "terminator":
             return Terminator(x, y, self.radius, world, weapon=weapon)
         else:
@@ -1,11 +1,10 @@
 import numpy
-import random
 import pygame
 
 from zombpyg.core.player import Player
 from zombpyg.core.bullet import Bullet
 from zombpyg.core.sensor import Sensor
-from zombpyg.utils.surroundings import Color, get_movement_estimates
+from zombpyg.utils.surroundings import Color
 from zombpyg.utils.geometry import _valid_angle, get_angle_and_distance_to_point
 from zombpyg.core.weapons import Rifle
 from zombpyg.actions import (
@@ -31,7 +30,7 @@ class Terminator(Player, MoveableThing, RotatableThing, AttackingThing):
         super(Terminator, self).__init__(
             x, y, radius,
             u'terminator', Color.BLUE,
-            weapon,
+            weapon, rng=world.rng
         )
         
         self.minimum_rotation_angle = 5
@@ -75,9 +74,7 @@ class Terminator(Player, MoveableThing, RotatableThing, AttackingThing):
                 self.attack_target = detected_target
                 action = AttackAction(self)
         else:
-            distance_forward, has_gap_ahead, gap_ahead_width, gap_ahead_left_angle, gap_ahead_right_angle, angle_left_gap, angle_right_gap, surroundings = get_movement_estimates(
-                self.get_position(), self.r, self.orientation, self.world.walls, self.vision_distance
-            )
+            distance_forward, has_gap_ahead, gap_ahead_width, gap_ahead_left_angle, gap_ahead_right_angle, angle_left_gap, angle_right_gap, surroundings = self.get_movement_estimates()
             if has_gap_ahead and (gap_ahead_width >= 3 * self.r):
                 distweight = min(max(int(distance_forward/self.r) - 2, 0), 5)
                 leftrotweight = 1 if gap_ahead_left_angle < -self.minimum_rotation_angle else 0
@@ -91,7 +88,7 @@ class Terminator(Player, MoveableThing, RotatableThing, AttackingThing):
                     RotateAction(self, self.orientation_actions[1]),
                     RotateAction(self, self.orientation_actions[2])
                 ]
-                action = random.choices(
+                action = self.world.rng.choices(
                     action_choices,
                     weights=[distweight, backweight, leftrotweight, noactionweight, rightrotweight],
                     k=1
@@ -105,7 +102,7 @@ class Terminator(Player, MoveableThing, RotatableThing, AttackingThing):
                     RotateAction(self, self.orientation_actions[0]),
                     RotateAction(self, self.orientation_actions[2])
                 ]
-                action = random.choices(
+                action = self.world.rng.choices(
                     action_choices, weights=[angle_right_gap, numpy.abs(angle_left_gap)], k=1
                 )[0]
 
@@ -149,27 +146,18 @@ class Terminator(Player, MoveableThing, RotatableThing, AttackingThing):
         self.weapon.use(self)
 
     def seek_target(self):
-        targets = [zombie for zombie in self.world.zombies if zombie.life > 0]
+        targets = self.world.fighter_hash.query_cone(
+            self.get_position(), self.orientation, self.vision_distance, self.peripheral_vision_angle
+        )
         minimum_distance_to_target = self.vision_distance * 2.0
         detected_angle = None
         detected_target = None
         
-        for target in targets:
-            angle, distance, _ = get_angle_and_distance_to_point(self.get_position(), self.orientation, target.get_position())
-            if distance >= self.vision_distance + target.r:
-                continue
-
-            rectified_angle = numpy.rad2deg(numpy.arctan2(target.r, distance))
-            if angle < -self.peripheral_vision_angle-rectified_angle or angle > self.peripheral_vision_angle+rectified_angle:
+        for target, angle, distance in targets:
+            if target.fighter_type != 'zombie':
                 continue
             
-            wall_point = None
-            for wall in self.world.walls:
-                wall_point = wall.collide(self.get_position(), target.get_position())
-                if wall_point is not None:
-                    # There's a wall between the (positions of the) terminator and target
-                    break
-            if wall_point is None:
+            if self.world.has_line_of_sight(self.get_position(), target.get_position()):
                 # no wall found betwen terminator and target
                 if distance < minimum_distance_to_target:
                     minimum_distance_to_target = distance
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+import os
+import numpy
+from zombpyg.core.fighter_table import FighterTable
+
+
+# The file starts with a header, followed by a block for each tick.  Each block starts with
+# a TICK record, with the tick, the time of the world and the number of each of the other
+# records of the block, followed by a FIGHTER record for each living fighter, a BULLET
+# record for each bullet and an EVENT record for each event logged by the world during the
+# tick.  Positions are stored to the pixel, which is exact for the fighters.
+HEADER_DTYPE = numpy.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("w", "<u4"),
+    ("h", "<u4"),
+    ("step_time_delta", "<f8"),
+])
+TICK_DTYPE = numpy.dtype([
+    ("tick", "<u4"),
+    ("t", "<f8"),
+    ("n_fighters", "<u2"),
+    ("n_bullets", "<u2"),
+    ("n_events", "<u2"),
+])
+FIGHTER_DTYPE = numpy.dtype([
+    # The fighter id, unique within an episode
+    ("id", "<u2"),
+    # The fighter type (see FighterTable.TYPE_CODES)
+    ("code", "u1"),
+    ("x", "<i2"),
+    ("y", "<i2"),
+    # Degrees, rounded
+    ("orientation", "<i2"),
+    ("life", "<i2"),
+])
+BULLET_DTYPE = numpy.dtype([
+    ("x", "<i2"),
+    ("y", "<i2"),
+    # Degrees, rounded
+    ("orientation", "<i2"),
+    # The time remaining
+    ("life", "<f4"),
+])
+EVENT_DTYPE = numpy.dtype([
+    ("code", "u1"),
+    # The id of the fighter concerned, if any
+    ("id", "<u2"),
+    ("x", "<i2"),
+    ("y", "<i2"),
+])
+MAGIC = b"ZPGEPREC"
+VERSION = 2
+# The fighter ids are stored in 16 bits
+MAX_FIGHTER_ID = 0xFFFF
+
+EVENT_CODES = {"died": 1}
+FIGHTER_TYPES = {code: fighter_type for fighter_type, code in FighterTable.TYPE_CODES.items()}
+
+
+class EpisodeRecorder(object):
+    """Appends the state of a world to a binary log after each step (see World.set_recorder).
+
+       The records of a tick are built with numpy from the world's fighter table and
+       written in a single call to a buffered file, so recording adds little to a step.
+    """
+    def __init__(self, path, world, buffer_size=1 << 20):
+        self.path = path
+        self.file = open(path, "wb", buffering=buffer_size)
+        header = numpy.zeros((), dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["w"], header["h"] = world.w, world.h
+        header["step_time_delta"] = world.step_time_delta
+        self.file.write(header.tobytes())
+        self.tick = 0
+        self.fighter_ids = {}
+        # Only the events logged after the recording starts are recorded
+        self.event_count = len(world.events)
+
+    def get_fighter_id(self, fighter):
+        fighter_id = self.fighter_ids.get(fighter)
+        if fighter_id is None:
+            fighter_id = len(self.fighter_ids)
+            if fighter_id > MAX_FIGHTER_ID:
+                raise ValueError(f"Recordings hold at most {MAX_FIGHTER_ID + 1} fighters per episode")
+            self.fighter_ids[fighter] = fighter_id
+        return fighter_id
+
+    def record(self, world):
+        """Write the block of the current state of the world as the next tick."""
+        table = world.fighters
+        rows = table.get_living_rows()
+        bullets = world.bullets
+        # The events list may have been shortened by restoring a snapshot
+        self.event_count = min(self.event_count, len(world.events))
+        events = world.events[self.event_count:]
+        self.event_count = len(world.events)
+
+        tick = numpy.zeros((), dtype=TICK_DTYPE)
+        tick["tick"] = self.tick
+        tick["t"] = world.t
+        tick["n_fighters"], tick["n_bullets"], tick["n_events"] = len(rows), len(bullets), len(events)
+
+        fighters = numpy.zeros((len(rows),), dtype=FIGHTER_DTYPE)
+        fighters["id"] = [self.get_fighter_id(fighter) for fighter in table.get_fighters(rows)]
+        fighters["code"] = table.type_code[rows]
+        fighters["x"] = table.x[rows]
+        fighters["y"] = table.y[rows]
+        fighters["orientation"] = numpy.rint(table.orientation[rows])
+        fighters["life"] = numpy.rint(table.life[rows])
+
+        bullet_records = numpy.zeros((len(bullets),), dtype=BULLET_DTYPE)
+        if bullets:
+            locations = numpy.array([bullet.current_location for bullet in bullets], dtype=float)
+            directions = numpy.array([bullet.direction for bullet in bullets], dtype=float)
+            bullet_records["x"] = numpy.rint(locations[:, 0])
+            bullet_records["y"] = numpy.rint(locations[:, 1])
+            orientations = numpy.rad2deg(numpy.arctan2(directions[:, 0], -directions[:, 1]))
+            bullet_records["orientation"] = numpy.rint(orientations)
+            bullet_records["life"] = [bullet.time_remaining for bullet in bullets]
+
+        event_records = numpy.zeros((len(events),), dtype=EVENT_DTYPE)
+        for idx, (_, thing, message) in enumerate(events):
+            event_records["code"][idx] = EVENT_CODES.get(message, 0)
+            if hasattr(thing, "fighter_table"):
+                event_records["id"][idx] = self.get_fighter_id(thing)
+            event_records["x"][idx], event_records["y"][idx] = numpy.rint(thing.get_position())
+
+        self.file.write(b"".join((
+            tick.tobytes(), fighters.tobytes(), bullet_records.tobytes(), event_records.tobytes()
+        )))
+        self.tick += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+class EpisodeReader(object):
+    """Reads a log written by EpisodeRecorder, memory-mapping the records rather than loading them.
+
+       The blocks of the ticks are indexed when the log is opened, by walking their TICK
+       records, so the records of any tick are found without reading the others.
+    """
+    def __init__(self, path):
+        self.path = path
+        header_bytes = numpy.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if (len(header_bytes) == 0) or (header_bytes[0]["magic"] != MAGIC):
+            raise ValueError(f"{path} is not an episode recording")
+        header = header_bytes[0]
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported recording version {header['version']} in {path}")
+        self.w = int(header["w"])
+        self.h = int(header["h"])
+        self.step_time_delta = float(header["step_time_delta"])
+
+        size = os.path.getsize(path) - HEADER_DTYPE.itemsize
+        if size > 0:
+            self.data = numpy.memmap(path, dtype=numpy.uint8, mode="r", offset=HEADER_DTYPE.itemsize, shape=(size,))
+        else:
+            self.data = numpy.zeros((0,), dtype=numpy.uint8)
+        # The offsets of the blocks, a partially written block at the end of the file being ignored
+        offsets = []
+        offset = 0
+        while offset + TICK_DTYPE.itemsize <= size:
+            tick = self.data[offset:offset + TICK_DTYPE.itemsize].view(TICK_DTYPE)[0]
+            end = offset + TICK_DTYPE.itemsize + (
+                int(tick["n_fighters"]) * FIGHTER_DTYPE.itemsize
+                + int(tick["n_bullets"]) * BULLET_DTYPE.itemsize
+                + int(tick["n_events"]) * EVENT_DTYPE.itemsize
+            )
+            if end > size:
+                break
+            offsets.append(offset)
+            offset = end
+        self.offsets = numpy.array(offsets, dtype=numpy.int64)
+        self.n_ticks = len(offsets)
+
+    def __len__(self):
+        return self.n_ticks
+
+    def get_tick(self, tick):
+        """The TICK record of the tick."""
+        if (tick < 0) or (tick >= self.n_ticks):
+            raise IndexError(f"Tick {tick} is out of range, the recording has {self.n_ticks} ticks")
+        offset = int(self.offsets[tick])
+        return self.data[offset:offset + TICK_DTYPE.itemsize].view(TICK_DTYPE)[0]
+
+    def __get_records__(self, tick, kind):
+        """The records of the tick of the given kind (0 for fighters, 1 for bullets, 2 for events),
+           as a read-only structured array.
+        """
+        header = self.get_tick(tick)
+        counts = (int(header["n_fighters"]), int(header["n_bullets"]), int(header["n_events"]))
+        dtypes = (FIGHTER_DTYPE, BULLET_DTYPE, EVENT_DTYPE)
+        start = int(self.offsets[tick]) + TICK_DTYPE.itemsize
+        for count, dtype in zip(counts[:kind], dtypes[:kind]):
+            start += count * dtype.itemsize
+        return self.data[start:start + counts[kind] * dtypes[kind].itemsize].view(dtypes[kind])
+
+    def get_time(self, tick):
+        return float(self.get_tick(tick)["t"])
+
+    def get_fighters(self, tick):
+        return self.__get_records__(tick, 0)
+
+    def get_bullets(self, tick):
+        return self.__get_records__(tick, 1)
+
+    def get_events(self, tick):
+        return self.__get_records__(tick, 2)
+
+    def close(self):
+        self.data = None
@@ -6,6 +6,8 @@ from .safehouse import SafeHouseRules
 
 
 class RulesFactory(object):
+    RULES_IDS = ("survival", "safehouse", "extermination", "evacuation")
+
     @staticmethod
     def get_default(world):
         return SurvivalRules(world)
@@ -1,5 +1,7 @@
 import numpy
 
+from zombpyg.utils.intersection import intersect_segments, point_on_segment
+
 
 def _valid_angle(angle):
     if angle > 180:
@@ -13,96 +15,21 @@ def calculate_distance(position, point):
     dy = point[1] - position[1]
     return numpy.sqrt(dx ** 2 + dy ** 2)
 
-# The methods 
-# _valid_angle, 
-# calculateGradient, and 
-# calculateYAxisIntersect
-# were taken (and renamed) from 
+# The method _valid_angle was taken from
 # https://github.com/PacktPublishing/Python-Reinforcement-Learning-Projects/tree/master/Chapter03/demo
-
-# Calc the gradient 'm' of a line between p1 and p2
-def calculate_gradient(p1, p2):
-    # Ensure that the line is not vertical
-    if (p1[0] != p2[0]):
-        m = (p1[1] - p2[1]) / (p1[0] - p2[0])
-        return m
-    else:
-        return None
- 
-# Calc the point 'b' where line crosses the Y axis
-def calculate_yaxis_intersect(p, m):
-    return p[1] - (m * p[0])
- 
-# Calc the point where two infinitely long lines (p1 to p2 and p3 to p4) intersect.
-# Handle parallel lines and vertical lines (the later has infinate 'm').
-# Returns a point tuple of points like this ((x,y),...)  or None
-# In non parallel cases the tuple will contain just one point.
-# For parallel lines that lay on top of one another the tuple will contain
-# all four points of the two lines
-def get_intersect_point(p1, p2, p3, p4):
-    m1 = calculate_gradient(p1, p2)
-    m2 = calculate_gradient(p3, p4)
-      
-    # See if the the lines are parallel
-    if (m1 != m2):
-        # See if either line is vertical
-        if (m1 is not None and m2 is not None):
-            # Neither line vertical           
-            b1 = calculate_yaxis_intersect(p1, m1)
-            b2 = calculate_yaxis_intersect(p3, m2)   
-            x = (b2 - b1) / (m1 - m2)       
-            y = (m1 * x) + b1           
-        else:
-            # Line 1 is vertical so use line 2's values
-            if (m1 is None):
-                b2 = calculate_yaxis_intersect(p3, m2)   
-                x = p1[0]
-                y = (m2 * x) + b2
-            # Line 2 is vertical so use line 1's values               
-            elif (m2 is None):
-                b1 = calculate_yaxis_intersect(p1, m1)
-                x = p3[0]
-                y = (m1 * x) + b1           
-            else:
-                assert False
-               
-        return ((x,y),)
-    else:
-        # Parallel lines with same 'b' value must be the same line so they intersect
-        # everywhere in this case we return the start and end points of both lines
-        # the calculateIntersectPoint method will sort out which of these points
-        # lays on both line segments
-        b1, b2 = None, None # vertical lines have no b value
-        if m1 is not None:
-            b1 = calculate_yaxis_intersect(p1, m1)
-           
-        if m2 is not None:   
-            b2 = calculate_yaxis_intersect(p3, m2)
-       
-        # If these parallel lines lay on one another   
-        if b1 == b2:
-            return p1,p2,p3,p4
-        else:
-            return None
  
 # For line segments (ie not infinitely long lines) the intersect point
 # may not lay on both lines.
-#   
-# We use a simple calculation to determine where the intersection 
-# point for the lines falls relative to each segment.  
-# If an intersection point falls on both line segments, the point is 
-# returned, otherwise None is returned.  
+#
+# The intersection of the segments is computed with cross products (see
+# zombpyg.utils.intersection), which needs no special cases for vertical or
+# parallel segments.  If the segments meet, the intersection point is
+# returned (computed along the second segment), otherwise None is returned.
 def calculate_intersect_point(p1, p2, p3, p4):
-    p = get_intersect_point(p1, p2, p3, p4)
-    if p is not None:
-        for point in p:
-            l1 = calculate_parameter_of_point_on_segment(p1, p2, point)
-            l2 = calculate_parameter_of_point_on_segment(p3, p4, point)
-            if (0 <= l1) and (l1 <= 1) and (0 <= l2) and (l2 <= 1):
-                return point
-        return None            
-    else:
+    parameters = intersect_segments(p1, p2, p3, p4)
+    if parameters is None:
         return None
+    return point_on_segment(p3, p4, parameters[1])
 
 def calculate_parameter_of_point_on_segment(start, end, pt):
     if start[0] != end[0]:
@@ -167,6 +94,22 @@ def rotate_vector(orientation_vector, angle):
     ])
     return numpy.matmul(rotmat, orientation_vector)
 
+def get_distances_to_path(start, end, xs, ys):
+    """Vectorized get_nearest_point_and_distance_to_path, returning the distances only."""
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    dd = dx ** 2 + dy ** 2
+    if dd > 0:
+        a = numpy.clip(((xs - start[0]) * dx + (ys - start[1]) * dy) / dd, 0.0, 1.0)
+    else:
+        a = numpy.zeros_like(xs)
+    return numpy.sqrt((xs - start[0] - a * dx) ** 2 + (ys - start[1] - a * dy) ** 2)
+
+def get_angles_to_points(position, orientation, xs, ys):
+    """Vectorized get_angle_and_distance_to_point, returning the angles only."""
+    angles = numpy.rad2deg(numpy.arctan2(xs - position[0], -(ys - position[1]))) - orientation
+    return numpy.where(angles > 180, angles - 360, numpy.where(angles <= -180, angles + 360, angles))
+
 def get_angle_and_distance_to_point(position, orientation, point):
     dx = point[0] - position[0]
     dy = point[1] - position[1]
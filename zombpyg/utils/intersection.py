@@ -0,0 +1,140 @@
+import numpy
+
+
+# Segment intersection using cross products, which needs no slopes, so no special
+# cases for vertical lines.  The segments p1 to p2 and p3 to p4 meet where
+#
+#     p1 + t * (p2 - p1) = p3 + u * (p4 - p3)
+#
+# for t and u in [0, 1].  When the segments are collinear and overlap, the
+# intersection is taken to be the first point of the first segment lying on the
+# second one.  The parameters (t, u) of the intersection are returned directly, so
+# the point can be computed along either segment (see point_on_segment).
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+def intersect_segments(p1, p2, p3, p4):
+    """The parameters (t, u) of the intersection of the segments p1 to p2 and p3 to p4, or None."""
+    rx, ry = p2[0] - p1[0], p2[1] - p1[1]
+    sx, sy = p4[0] - p3[0], p4[1] - p3[1]
+    qpx, qpy = p3[0] - p1[0], p3[1] - p1[1]
+    denom = _cross(rx, ry, sx, sy)
+    qp_cross_s = _cross(qpx, qpy, sx, sy)
+    qp_cross_r = _cross(qpx, qpy, rx, ry)
+    if denom != 0:
+        t = qp_cross_s / denom
+        u = qp_cross_r / denom
+        if (0 <= t <= 1) and (0 <= u <= 1):
+            return t, u
+        return None
+
+    # Parallel segments, which only meet if collinear
+    if (qp_cross_r != 0) or (qp_cross_s != 0):
+        return None
+    rr = rx * rx + ry * ry
+    ss = sx * sx + sy * sy
+    if rr == 0:
+        # The first segment is a point
+        if ss == 0:
+            return (0.0, 0.0) if (qpx == 0) and (qpy == 0) else None
+        u = -(qpx * sx + qpy * sy) / ss
+        return (0.0, u) if 0 <= u <= 1 else None
+    t0 = (qpx * rx + qpy * ry) / rr
+    t1 = t0 + (sx * rx + sy * ry) / rr
+    if (max(t0, t1) < 0) or (min(t0, t1) > 1):
+        return None
+    t = max(min(t0, t1), 0.0)
+    u = ((t * rx - qpx) * sx + (t * ry - qpy) * sy) / ss if ss > 0 else 0.0
+    return t, u
+
+def intersect_ray_segment(origin, direction, p3, p4):
+    """The parameters (t, u) of the first intersection of the ray origin + t * direction
+       (for t >= 0) with the segment p3 to p4, or None.
+    """
+    rx, ry = direction
+    sx, sy = p4[0] - p3[0], p4[1] - p3[1]
+    qpx, qpy = p3[0] - origin[0], p3[1] - origin[1]
+    denom = _cross(rx, ry, sx, sy)
+    if denom != 0:
+        t = _cross(qpx, qpy, sx, sy) / denom
+        u = _cross(qpx, qpy, rx, ry) / denom
+        if (t >= 0) and (0 <= u <= 1):
+            return t, u
+        return None
+    rr = rx * rx + ry * ry
+    if (rr == 0) or (_cross(qpx, qpy, rx, ry) != 0):
+        return None
+    # Collinear, so the segment is met at its nearest end ahead of the origin, if any
+    t0 = (qpx * rx + qpy * ry) / rr
+    t1 = t0 + (sx * rx + sy * ry) / rr
+    if max(t0, t1) < 0:
+        return None
+    t = max(min(t0, t1), 0.0)
+    ss = sx * sx + sy * sy
+    u = ((t * rx - qpx) * sx + (t * ry - qpy) * sy) / ss if ss > 0 else 0.0
+    return t, u
+
+def point_on_segment(start, end, parameter):
+    return (
+        start[0] + parameter * (end[0] - start[0]),
+        start[1] + parameter * (end[1] - start[1])
+    )
+
+# Batched versions of the above, taking arrays of points with shape (..., 2), which are
+# broadcast against each other.  They return the parameters t and u along with a mask
+# indicating which pairs of segments meet (t and u are meaningless elsewhere).
+
+def __intersect_batch__(p1, r, p3, s, t_max):
+    qp = p3 - p1
+    denom = _cross(r[..., 0], r[..., 1], s[..., 0], s[..., 1])
+    qp_cross_s = _cross(qp[..., 0], qp[..., 1], s[..., 0], s[..., 1])
+    qp_cross_r = _cross(qp[..., 0], qp[..., 1], r[..., 0], r[..., 1])
+
+    parallel = (denom == 0)
+    safe_denom = numpy.where(parallel, 1.0, denom)
+    t = qp_cross_s / safe_denom
+    u = qp_cross_r / safe_denom
+    hits = (~parallel) & (t >= 0.0) & (u >= 0.0) & (u <= 1.0)
+    if t_max is not None:
+        hits &= (t <= t_max)
+
+    collinear = parallel & (qp_cross_r == 0) & (qp_cross_s == 0)
+    if numpy.any(collinear):
+        rr = numpy.sum(r * r, axis=-1)
+        ss = numpy.sum(s * s, axis=-1)
+        safe_rr = numpy.where(rr == 0, 1.0, rr)
+        safe_ss = numpy.where(ss == 0, 1.0, ss)
+        # The first point of the first segment (or ray) lying on the second segment
+        t0 = numpy.sum(qp * r, axis=-1) / safe_rr
+        t1 = t0 + numpy.sum(s * r, axis=-1) / safe_rr
+        overlaps = (rr > 0) & (numpy.maximum(t0, t1) >= 0.0)
+        if t_max is not None:
+            overlaps &= (numpy.minimum(t0, t1) <= t_max)
+        collinear_t = numpy.where(rr > 0, numpy.maximum(numpy.minimum(t0, t1), 0.0), 0.0)
+        collinear_u = ((collinear_t[..., None] * r - qp) * s).sum(axis=-1) / safe_ss
+        if t_max is not None:
+            # A first segment that is a point meets the second segment if it lies on it
+            overlaps |= (rr == 0) & numpy.where(
+                ss > 0, (collinear_u >= 0.0) & (collinear_u <= 1.0), (qp[..., 0] == 0) & (qp[..., 1] == 0)
+            )
+        overlaps &= collinear
+        t = numpy.where(overlaps, collinear_t, t)
+        u = numpy.where(overlaps, collinear_u, u)
+        hits = hits | overlaps
+    return t, u, hits
+
+def intersect_segments_batch(p1, p2, p3, p4):
+    """Batched intersect_segments."""
+    p1 = numpy.asarray(p1, dtype=float)
+    p3 = numpy.asarray(p3, dtype=float)
+    r = numpy.asarray(p2, dtype=float) - p1
+    s = numpy.asarray(p4, dtype=float) - p3
+    return __intersect_batch__(p1, r, p3, s, 1.0)
+
+def intersect_rays_segments_batch(origins, directions, p3, p4):
+    """Batched intersect_ray_segment."""
+    origins = numpy.asarray(origins, dtype=float)
+    p3 = numpy.asarray(p3, dtype=float)
+    s = numpy.asarray(p4, dtype=float) - p3
+    return __intersect_batch__(origins, numpy.asarray(directions, dtype=float), p3, s, None)
@@ -0,0 +1,192 @@
+import numpy
+from gymnasium.spaces.box import Box
+
+from zombpyg.utils.raycast import cast_rays
+from zombpyg.map.objective import ObjectiveLocation
+
+
+# The following computes, for every agent and every sensor, the distance to the nearest
+# circular entity (resource, fighter, checkpoint) seen by the sensor.  As in the per-agent
+# methods of Agent (e.g. Agent.detect_zombies), an entity is seen by a sensor if the sensor's
+# angle lies within the angle the entity subtends, and the entity is closer than the sensor
+# length plus the entity's radius.
+#
+# The agent positions have shape (n_agents, 2), the orientations (n_agents,), the sensor
+# angles and lengths (n_agents, n_sensors), the entity positions (n_entities, 2) and the
+# entity radii (n_entities,).  The optional exclude mask of shape (n_agents, n_entities)
+# identifies entities an agent shouldn't see (i.e., itself).
+#
+# Returns the distances, with shape (n_agents, n_sensors) and numpy.inf where nothing is seen.
+def get_sector_distances(
+    agent_positions, orientations, sensor_angles, sensor_lengths,
+    entity_positions, entity_radii, exclude=None
+):
+    n_agents, n_sensors = sensor_angles.shape
+    nearest = numpy.full((n_agents, n_sensors), numpy.inf)
+    if len(entity_radii) == 0:
+        return nearest
+
+    dx = entity_positions[None, :, 0] - agent_positions[:, None, 0]
+    dy = entity_positions[None, :, 1] - agent_positions[:, None, 1]
+    distances = numpy.sqrt(dx ** 2 + dy ** 2)
+    # Only the pairs within the longest sensor of the agent are considered further
+    near = distances < sensor_lengths.max(axis=1)[:, None] + entity_radii[None, :]
+    if exclude is not None:
+        near &= ~exclude
+    agent_idx, entity_idx = numpy.nonzero(near)
+    if len(agent_idx) == 0:
+        return nearest
+
+    distances = distances[agent_idx, entity_idx]
+    radii = entity_radii[entity_idx]
+    angles = numpy.rad2deg(numpy.arctan2(dx[agent_idx, entity_idx], -dy[agent_idx, entity_idx])) - orientations[agent_idx]
+    angles = numpy.where(angles > 180, angles - 360, numpy.where(angles <= -180, angles + 360, angles))
+    rectified_angles = numpy.rad2deg(numpy.arctan2(radii, distances))
+
+    pair_sensor_angles = sensor_angles[agent_idx]
+    seen = (
+        (pair_sensor_angles >= (angles - rectified_angles)[:, None]) &
+        (pair_sensor_angles <= (angles + rectified_angles)[:, None]) &
+        (distances[:, None] < sensor_lengths[agent_idx] + radii[:, None])
+    )
+    numpy.minimum.at(nearest, agent_idx, numpy.where(seen, distances[:, None], numpy.inf))
+    return nearest
+
+def get_circular_things_arrays(things):
+    positions = numpy.array([thing.get_position() for thing in things], dtype=float).reshape((-1, 2))
+    radii = numpy.array([thing.r for thing in things], dtype=float)
+    return positions, radii
+
+def get_objective_distances(agents, objectives, ray_starts, ray_ends):
+    """Distances along each sensor to the nearest objective, with shape (n_agents, n_sensors)."""
+    n_agents, n_sensors = ray_starts.shape[:2]
+    nearest = numpy.full((n_agents, n_sensors), numpy.inf)
+    # Rectangular objectives are intersected with the sensors as their four edges,
+    # while any other objectives are left to the sensors themselves.
+    rectangles = [objective for objective in objectives if isinstance(objective, ObjectiveLocation)]
+    others = [objective for objective in objectives if not isinstance(objective, ObjectiveLocation)]
+    if rectangles:
+        corners = numpy.array([
+            [
+                (objective.left, objective.top),
+                (objective.left, objective.top + objective.height),
+                (objective.left + objective.width, objective.top + objective.height),
+                (objective.left + objective.width, objective.top),
+            ]
+            for objective in rectangles
+        ], dtype=float)
+        edge_starts = corners.reshape((-1, 2))
+        edge_ends = numpy.roll(corners, -1, axis=1).reshape((-1, 2))
+        distances, _, _ = cast_rays(
+            ray_starts.reshape((-1, 2)), ray_ends.reshape((-1, 2)), edge_starts, edge_ends
+        )
+        nearest = distances.reshape((n_agents, n_sensors))
+    if others:
+        for i, agent in enumerate(agents):
+            for j, sensor in enumerate(agent.sensors):
+                nearest[i, j] = min(nearest[i, j], sensor.detect_objective(others))
+
+    # Agents inside an objective are at distance 0 from it along all their sensors
+    for i, agent in enumerate(agents):
+        if any([objective.contains(agent.get_position()) for objective in objectives]):
+            nearest[i, :] = 0
+    return nearest
+
+# The following computes the sensor feedback (see Agent.sensor_feedback) of all the agents
+# at once, returning an array of shape (n_agents, n_sensors, 8).  All the agents must have
+# the same number of sensors.
+def compute_sensor_feedbacks(agents, world, thres=2):
+    n_agents = len(agents)
+    if n_agents == 0:
+        return numpy.zeros((0, 0, 8), dtype="float32")
+    n_sensors = len(agents[0].sensors)
+
+    agent_positions = numpy.array([agent.get_position() for agent in agents], dtype=float)
+    orientations = numpy.array([agent.orientation for agent in agents], dtype=float)
+    sensor_angles = numpy.stack([agent.sensor_angles for agent in agents])
+    sensor_lengths = numpy.stack([agent.sensor_lengths for agent in agents])
+    ray_ends = numpy.stack([agent.sensor_ray_ends for agent in agents])
+    ray_starts = numpy.broadcast_to(agent_positions[:, None, :], ray_ends.shape)
+
+    distances = numpy.full((n_agents, n_sensors, 7), numpy.inf)
+    sector_args = (agent_positions, orientations, sensor_angles, sensor_lengths)
+
+    # resources
+    resources = world.get_resources()
+    for column, resource_type in enumerate(("ammo", "medical")):
+        positions, radii = get_circular_things_arrays(
+            [resource for resource in resources if resource.resource_type == resource_type]
+        )
+        distances[:, :, column] = get_sector_distances(*sector_args, positions, radii)
+
+    # zombies, and players other than the agent itself
+    fighters = world.fighters
+    for column, fighter_types in ((2, ('zombie',)), (3, ('agent', 'player'))):
+        rows = fighters.get_living_rows(fighter_types=fighter_types)
+        positions = numpy.stack((fighters.x[rows], fighters.y[rows]), axis=1)
+        exclude = numpy.array([
+            (agent.fighter_table is fighters) & (rows == agent.fighter_row) for agent in agents
+        ]).reshape((n_agents, len(rows)))
+        distances[:, :, column] = get_sector_distances(
+            *sector_args, positions, fighters.radius[rows], exclude=exclude
+        )
+
+    # objectives and checkpoints
+    distances[:, :, 4] = get_objective_distances(agents, world.get_objectives(), ray_starts, ray_ends)
+    positions, radii = get_circular_things_arrays(world.get_checkpoints())
+    distances[:, :, 5] = get_sector_distances(*sector_args, positions, radii)
+
+    # walls, with a wall at distance 0 treated as no wall (see Sensor.detect_wall)
+    wall_distances = numpy.stack([agent.sensor_wall_distances for agent in agents])
+    distances[:, :, 6] = numpy.where(wall_distances == 0, numpy.inf, wall_distances)
+
+    feedbacks = numpy.empty((n_agents, n_sensors, 8), dtype="float32")
+    feedbacks[:, :, :7] = numpy.minimum(thres, distances / sensor_lengths[:, :, None])
+    # Things beyond a wall can't be seen
+    hidden = feedbacks[:, :, :6] > feedbacks[:, :, 6:7]
+    feedbacks[:, :, :6][hidden] = thres
+
+    # state
+    feedbacks[:, :, 7] = 0
+    for i, agent in enumerate(agents):
+        feedbacks[i, 0, 7] = agent.life / agent.MAX_LIFE
+        feedbacks[i, 1, 7] = agent.healing_capacity / agent.MAX_LIFE
+        if agent.weapon is not None:
+            feedbacks[i, 2, 7] = agent.weapon.get_weapon_id() / 64.0 # else keep 0
+        if agent.weapon is not None and agent.weapon.is_firearm:
+            feedbacks[i, 3, 7] = agent.weapon.ammo / agent.weapon.max_ammo
+    return feedbacks
+
+# The observations can be encoded with fewer bytes than float32.  All the features of the
+# sensor feedback lie in [0, FEEDBACK_MAX] (the distances are capped at the default thres of
+# compute_sensor_feedbacks), so uint8 encodes them as fixed-point numbers in steps of
+# FEEDBACK_MAX / 255, while float16 keeps about three significant digits.
+OBSERVATION_ENCODINGS = ("float32", "float16", "uint8")
+FEEDBACK_MAX = 2.0
+UINT8_SCALE = 255 / FEEDBACK_MAX
+
+def check_observation_encoding(encoding):
+    if encoding not in OBSERVATION_ENCODINGS:
+        raise ValueError(f"Observation encoding {encoding} is not valid, must be one of {', '.join(OBSERVATION_ENCODINGS)}")
+
+def get_observation_space(shape, encoding="float32"):
+    """The Box of the observations of the given shape in the encoding."""
+    check_observation_encoding(encoding)
+    if encoding == "uint8":
+        return Box(low=0, high=255, shape=shape, dtype=numpy.uint8)
+    elif encoding == "float16":
+        return Box(low=0.0, high=FEEDBACK_MAX, shape=shape, dtype=numpy.float16)
+    # The bounds of the float32 observations are kept as they have always been declared
+    return Box(low=0.0, high=400.0, shape=shape, dtype=numpy.float32)
+
+def encode_observations(feedbacks, encoding="float32"):
+    """The feedbacks in the encoding, which are returned as is if already float32 and encoded so."""
+    if encoding == "uint8":
+        return numpy.rint(numpy.clip(feedbacks, 0.0, FEEDBACK_MAX) * UINT8_SCALE).astype(numpy.uint8)
+    return numpy.asarray(feedbacks).astype(encoding, copy=False)
+
+def decode_observations(observations):
+    """Float32 observations from observations in any of the encodings."""
+    if observations.dtype == numpy.uint8:
+        return observations.astype(numpy.float32) / numpy.float32(UINT8_SCALE)
+    return observations.astype(numpy.float32, copy=False)
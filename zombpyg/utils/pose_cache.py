@@ -0,0 +1,88 @@
+import numpy
+from collections import OrderedDict
+
+
+class PoseCache(object):
+    """A bounded cache of values computed from the walls of a map, keyed by pose.
+
+       Fighters move in integer steps and rotate by a few fixed angles, so they
+       revisit the same poses often, both within and across episodes on a map.
+       The same value is handed to every lookup of a key, so the numpy arrays
+       in the values (or in tuples of values) are made read-only when cached.
+       When the cache is full, the least recently used entry ('lru') or the
+       oldest entry ('fifo') is evicted.  A maxsize of None means no bound,
+       and a maxsize of 0 disables the cache.
+    """
+    EVICTION_POLICIES = ('lru', 'fifo')
+
+    def __init__(self, maxsize=4096, eviction='lru'):
+        self.entries = OrderedDict()
+        self.eviction = 'lru'
+        self.reset_stats()
+        self.configure(maxsize, eviction=eviction)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def configure(self, maxsize, eviction=None):
+        """Change the size and (optionally) the eviction policy, evicting entries if the cache is now too large."""
+        if (maxsize is not None) and (maxsize < 0):
+            raise ValueError(f"The maximum size of a PoseCache must be non-negative or None, not {maxsize}")
+        self.maxsize = maxsize
+        if eviction is not None:
+            if eviction not in PoseCache.EVICTION_POLICIES:
+                raise ValueError(f"The eviction policy of a PoseCache must be in {PoseCache.EVICTION_POLICIES}")
+            self.eviction = eviction
+        self.__evict__()
+
+    def __evict__(self):
+        if self.maxsize is None:
+            return
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        """The value cached for the key, or None."""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.eviction == 'lru':
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return
+        for item in (value if isinstance(value, tuple) else (value,)):
+            if isinstance(item, numpy.ndarray):
+                item.setflags(write=False)
+        self.entries[key] = value
+        if self.eviction == 'lru':
+            self.entries.move_to_end(key)
+        self.__evict__()
+
+    def clear(self):
+        self.entries.clear()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def get_stats(self):
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "eviction": self.eviction,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.get_hit_rate(),
+        }
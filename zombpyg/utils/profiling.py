@@ -0,0 +1,52 @@
+import time
+
+
+class StepProfiler(object):
+    """Accumulates the wall-clock time and call count of each phase of World.step, along
+       with counters of the work done (ray casts, wall tests, collision checks, ...).
+
+       Profiling is opt-in: the world's profiler is None unless enabled, and the
+       instrumented code only checks for None, so it costs close to nothing when disabled.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.steps = 0
+        self.phase_times = {}
+        self.phase_calls = {}
+        self.counters = {}
+
+    def start(self):
+        return time.perf_counter()
+
+    def record(self, phase, start):
+        """Add the time since start to the phase, and return the current time as the start of the next phase."""
+        now = time.perf_counter()
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + (now - start)
+        self.phase_calls[phase] = self.phase_calls.get(phase, 0) + 1
+        return now
+
+    def count(self, counter, n=1):
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def end_step(self):
+        self.steps += 1
+
+    def get_stats(self):
+        total = sum(self.phase_times.values())
+        phases = {}
+        for phase, phase_time in self.phase_times.items():
+            calls = self.phase_calls[phase]
+            phases[phase] = {
+                "total_sec": phase_time,
+                "calls": calls,
+                "mean_ms": 1000.0 * phase_time / calls,
+                "fraction": phase_time / total if total > 0 else 0.0,
+            }
+        return {
+            "steps": self.steps,
+            "total_sec": total,
+            "phases": phases,
+            "counters": dict(self.counters),
+        }
@@ -0,0 +1,48 @@
+import numpy
+
+from zombpyg.utils.intersection import intersect_segments_batch
+
+
+def get_wall_segments(walls):
+    """Stack the start and end points of the walls into two arrays of shape (n_walls, 2)."""
+    wall_starts = numpy.array([wall.start for wall in walls], dtype=float).reshape((-1, 2))
+    wall_ends = numpy.array([wall.end for wall in walls], dtype=float).reshape((-1, 2))
+    return wall_starts, wall_ends
+
+# The following intersects every ray (ray_starts[i] to ray_ends[i]) with every
+# wall segment (see intersect_segments_batch).  The collision points are computed
+# along the walls, so that points on axis-aligned walls lie exactly on the walls.
+#
+# As in Wall.collide, the collision points are truncated to integers, and the
+# distances are measured from the start of the ray to the truncated points.
+#
+# Returns the distances to the nearest wall (numpy.inf where there is no collision),
+# the corresponding collision points, and a mask indicating which rays hit a wall.
+def cast_rays(ray_starts, ray_ends, wall_starts, wall_ends):
+    ray_starts = numpy.asarray(ray_starts, dtype=float).reshape((-1, 2))
+    ray_ends = numpy.asarray(ray_ends, dtype=float).reshape((-1, 2))
+    n_rays = ray_starts.shape[0]
+    if (n_rays == 0) or (len(wall_starts) == 0):
+        return (
+            numpy.full((n_rays,), numpy.inf),
+            numpy.zeros((n_rays, 2)),
+            numpy.zeros((n_rays,), dtype=bool)
+        )
+
+    _, u, hits = intersect_segments_batch(
+        ray_starts[:, None, :], ray_ends[:, None, :], wall_starts[None, :, :], wall_ends[None, :, :]
+    )
+    points = numpy.trunc(wall_starts[None, :, :] + u[..., None] * (wall_ends - wall_starts)[None, :, :])
+    offsets = points - ray_starts[:, None, :]
+    distances = numpy.where(
+        hits,
+        numpy.sqrt(offsets[..., 0] ** 2 + offsets[..., 1] ** 2),
+        numpy.inf
+    )
+
+    nearest = numpy.argmin(distances, axis=1)
+    rows = numpy.arange(n_rays)
+    nearest_distances = distances[rows, nearest]
+    nearest_points = points[rows, nearest]
+    hit_mask = numpy.isfinite(nearest_distances)
+    return nearest_distances, nearest_points, hit_mask
@@ -0,0 +1,18 @@
+import random
+import numpy
+
+
+def make_rngs(seed=None):
+    """A random.Random and a numpy.random.Generator, both seeded from seed.
+
+       Without a seed, the seed is drawn from the global random module, so that
+       seeding the global generator still makes the games reproducible.
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    return random.Random(seed), numpy.random.default_rng(seed)
+
+def reseed(rng, np_rng, seed):
+    """Seed the generators made by make_rngs in place, so the objects holding them need not be updated."""
+    rng.seed(seed)
+    np_rng.bit_generator.state = numpy.random.default_rng(seed).bit_generator.state
@@ -0,0 +1,128 @@
+import numpy
+
+from zombpyg.utils.geometry import get_angle_and_distance_to_point
+
+
+class SpatialHash(object):
+    """A uniform grid of square cells used to find the (living) things near a point.
+
+       Each thing is registered in the cell containing its center, and the grid must
+       be told when a thing moves (see update).  Things are expected to provide
+       get_position, get_radius and life.
+    """
+    def __init__(self, cell_size=32):
+        self.cell_size = cell_size
+        # The cells map keys to dictionaries rather than sets so that the
+        # iteration order, and therefore the outcome of a game, doesn't depend on
+        # the memory addresses of the things.
+        self.cells = {}
+        self.thing_cells = {}
+        self.max_radius = 0
+
+    def __len__(self):
+        return len(self.thing_cells)
+
+    def __contains__(self, thing):
+        return thing in self.thing_cells
+
+    def get_cell(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def clear(self):
+        self.cells = {}
+        self.thing_cells = {}
+        self.max_radius = 0
+
+    def insert(self, thing):
+        key = self.get_cell(*thing.get_position())
+        self.cells.setdefault(key, {})[thing] = None
+        self.thing_cells[thing] = key
+        self.max_radius = max(self.max_radius, thing.get_radius())
+
+    def remove(self, thing):
+        key = self.thing_cells.pop(thing, None)
+        if key is not None:
+            cell = self.cells[key]
+            del cell[thing]
+            if not cell:
+                del self.cells[key]
+
+    def update(self, thing):
+        key = self.get_cell(*thing.get_position())
+        old_key = self.thing_cells.get(thing)
+        if old_key is None or old_key == key:
+            return
+        old_cell = self.cells[old_key]
+        del old_cell[thing]
+        if not old_cell:
+            del self.cells[old_key]
+        self.cells.setdefault(key, {})[thing] = None
+        self.thing_cells[thing] = key
+
+    def __things_in_cells__(self, keys, living=True):
+        things = []
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell is not None:
+                if living:
+                    things.extend(thing for thing in cell if thing.life > 0)
+                else:
+                    things.extend(cell)
+        return things
+
+    def query_box(self, left, top, right, bottom, living=True):
+        """Things (only the living ones if living) in the cells overlapping the box, expanded by the largest radius."""
+        i0, j0 = self.get_cell(left - self.max_radius, top - self.max_radius)
+        i1, j1 = self.get_cell(right + self.max_radius, bottom + self.max_radius)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            # Cheaper to go through the occupied cells
+            keys = [key for key in self.cells if (i0 <= key[0] <= i1) and (j0 <= key[1] <= j1)]
+        else:
+            keys = [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+        return self.__things_in_cells__(keys, living=living)
+
+    def query_radius(self, point, radius, include_radius=True, exclude=None):
+        """Living things with center closer to point than radius (plus their own radius if include_radius)."""
+        x, y = point
+        found = []
+        for thing in self.query_box(x - radius, y - radius, x + radius, y + radius):
+            if thing is exclude:
+                continue
+            tx, ty = thing.get_position()
+            limit = radius + thing.get_radius() if include_radius else radius
+            if (tx - x) ** 2 + (ty - y) ** 2 < limit ** 2:
+                found.append(thing)
+        return found
+
+    def query_cone(self, point, orientation, radius, half_angle, include_radius=True, exclude=None):
+        """Living things in the cone of the given half angle about orientation.
+
+           The angular bounds are widened by the angle the thing subtends, and the
+           things are returned along with their angle and distance from point.
+        """
+        found = []
+        for thing in self.query_radius(point, radius, include_radius=include_radius, exclude=exclude):
+            angle, distance, _ = get_angle_and_distance_to_point(point, orientation, thing.get_position())
+            rectified_angle = numpy.rad2deg(numpy.arctan2(thing.get_radius(), distance))
+            if (angle >= -half_angle - rectified_angle) and (angle <= half_angle + rectified_angle):
+                found.append((thing, angle, distance))
+        return found
+
+    def query_segment(self, start, end, margin=0.0):
+        """Living things in the cells that pass within margin (plus the largest radius) of the segment."""
+        left, right = min(start[0], end[0]), max(start[0], end[0])
+        top, bottom = min(start[1], end[1]), max(start[1], end[1])
+        i0, j0 = self.get_cell(left - margin - self.max_radius, top - margin - self.max_radius)
+        i1, j1 = self.get_cell(right + margin + self.max_radius, bottom + margin + self.max_radius)
+        keys = [key for key in self.cells if (i0 <= key[0] <= i1) and (j0 <= key[1] <= j1)]
+        if len(keys) > 1:
+            # Discard the cells that are too far from the segment
+            centers = (numpy.array(keys, dtype=float) + 0.5) * self.cell_size
+            d = numpy.array(end, dtype=float) - numpy.array(start, dtype=float)
+            dd = numpy.inner(d, d)
+            offsets = centers - numpy.array(start, dtype=float)
+            a = numpy.clip(offsets @ d / dd, 0.0, 1.0) if dd > 0 else numpy.zeros(len(keys))
+            distances = numpy.linalg.norm(offsets - a[:, None] * d, axis=1)
+            reach = margin + self.max_radius + self.cell_size * numpy.sqrt(0.5)
+            keys = [key for key, distance in zip(keys, distances) if distance <= reach]
+        return self.__things_in_cells__(keys)
@@ -1,16 +1,13 @@
+import math
 import numpy
 from pygame import Rect
-from operator import itemgetter
 import itertools
 
 from zombpyg.utils.geometry import (
     _valid_angle, 
-    get_intersect_point,
-    get_nearest_point_and_distance_to_path,
-    get_extreme_points_on_segment_intersecting_circle,
     rotate_vector,
-    get_angle_and_distance_to_point,
 )
+from zombpyg.utils.intersection import intersect_ray_segment, point_on_segment
 
 
 class Color:
@@ -25,343 +22,243 @@ class Color:
     WHITE = (255, 255, 255)
     BACKGROUND = BLACK
 
-class VisibleWallSegment(object):
-    def __init__(
-        self, 
-        left_angle, left_distance, left_point,
-        right_angle, right_distance, right_point,
-        nearest_point_on_segment, 
-        is_nearest_point_to_line
-    ):
-        self.left_angle = left_angle
-        self.left_distance = left_distance 
-        self.left_point = left_point
-        self.right_angle = right_angle
-        self.right_distance = right_distance
-        self.right_point = right_point
-        self.nearest_point_on_segment = nearest_point_on_segment
-        self.is_nearest_point_to_line = is_nearest_point_to_line
+# The walls seen within obstacle_distance of a fighter, as angular intervals.
+#
+# The angles are in degrees relative to the orientation of the fighter, positive to
+# the right, and only the parts of the walls within 90 degrees of the orientation
+# are kept.  The points are the ends of the visible parts of the walls, on the
+# circle of radius obstacle_distance, or where the walls cross the sides of the
+# field of view.  There are only a few walls around a fighter, so the intervals
+# are computed wall by wall with floats, which is faster than with numpy arrays
+# (but with numpy's arctan2, for the same angles as get_angle_and_distance_to_point).
+#
+# Returns the lists (left_angles, left_points, right_angles, right_points,
+# nearest_points, is_nearest_point_to_line) of the intervals, in the order of the
+# walls, where nearest_points are the points of the walls nearest to the position,
+# and is_nearest_point_to_line tells whether they lie within the walls rather than
+# at their ends.
+def get_visible_wall_intervals(position, orientation, walls, obstacle_distance):
+    px, py = position
+    intervals = ([], [], [], [], [], [])
+    left_angles, left_points, right_angles, right_points, nearest_points, is_nearest_point_to_line = intervals
+    orientation_vector = None
+    for wall in walls:
+        (sx, sy), (ex, ey) = wall.start, wall.end
+        dx, dy = ex - sx, ey - sy
+        norm2 = math.sqrt(dx * dx + dy * dy) ** 2
+        if norm2 == 0:
+            continue
+        # The nearest point of the wall (see get_nearest_point_and_distance_to_path)
+        a = ((px - sx) * dx + (py - sy) * dy) / norm2
+        if a < 0:
+            nearest_point, on_line = (sx, sy), False
+        elif a > 1:
+            nearest_point, on_line = (ex, ey), False
+        else:
+            nearest_point, on_line = (sx + a * dx, sy + a * dy), True
+        if not math.sqrt((px - nearest_point[0]) ** 2 + (py - nearest_point[1]) ** 2) < obstacle_distance:
+            continue
+
+        # The ends of the part of the wall within the circle (see get_extreme_points_on_segment_intersecting_circle)
+        ox, oy = sx - px, sy - py
+        b = 2.0 * (dx * ox + dy * oy)
+        c = math.sqrt(ox * ox + oy * oy) ** 2 - obstacle_distance ** 2
+        discriminant = b ** 2 - 4 * norm2 * c
+        if discriminant > 0.0:
+            root = math.sqrt(discriminant)
+            lmin = max((-b - root) / (2 * norm2), 0.0)
+            lmax = min((-b + root) / (2 * norm2), 1.0)
+            ends = ((sx + lmin * dx, sy + lmin * dy), (sx + lmax * dx, sy + lmax * dy))
+        elif discriminant == 0.0:
+            ends = ((sx + (-b / (2 * norm2)) * dx, sy + (-b / (2 * norm2)) * dy),)
+        else:
+            continue
+        # By angle (see get_angle_and_distance_to_point), then by distance
+        ends = sorted(
+            (_valid_angle(float(numpy.rad2deg(numpy.arctan2(x - px, -(y - py)))) - orientation), math.sqrt((x - px) ** 2 + (y - py) ** 2), (x, y))
+            for x, y in ends
+        )
+        if len(ends) == 1:
+            left_angle, _, left_point = ends[0]
+            if not (-90 <= left_angle <= 90):
+                continue
+            right_angle, right_point = left_angle, left_point
+        else:
+            (left_angle, _, left_point), (right_angle, _, right_point) = ends
+            # Intervals of more than 180 degrees go the other way round, through the back
+            if right_angle - left_angle > 180:
+                left_angle, right_angle = right_angle, left_angle + 360.0
+                left_point, right_point = right_point, left_point
+            # The interval is clipped to the field of view [-90, 90], or [270, 360] through the back
+            if max(left_angle, -90) <= min(right_angle, 90):
+                lower_bound, upper_bound = -90, 90
+            elif max(left_angle, 270) <= min(right_angle, 360):
+                lower_bound, upper_bound = 270, 360
+            else:
+                continue
+            if (left_angle < lower_bound) or (upper_bound < right_angle):
+                if orientation_vector is None:
+                    orientation_vector = (
+                        numpy.sin(numpy.deg2rad(orientation)),
+                        -numpy.cos(numpy.deg2rad(orientation))
+                    )
+                if left_angle < lower_bound:
+                    left_angle, left_point = get_clipped_end(position, orientation_vector, wall, lower_bound, left_angle, left_point)
+                else:
+                    left_angle = _valid_angle(left_angle)
+                if upper_bound < right_angle:
+                    right_angle, right_point = get_clipped_end(position, orientation_vector, wall, upper_bound, right_angle, right_point)
+                else:
+                    right_angle = _valid_angle(right_angle)
+            else:
+                left_angle, right_angle = _valid_angle(left_angle), _valid_angle(right_angle)
+            if left_angle == right_angle:
+                right_point = left_point
 
-    def __repr__(self):
-        return ("VisibleWallSegment("
-               f"left_angle={self.left_angle}, "
-               f"left_distance={self.left_distance}, "
-               f"left_point={self.left_point}, "
-               f"right_angle={self.right_angle}, "
-               f"right_distance={self.right_distance}, "
-               f"right_point={self.right_point}, "
-               f"nearest_point_on_segment={self.nearest_point_on_segment}, "
-               f"is_nearest_point_to_line={self.is_nearest_point_to_line}"
-               ")")
+        left_angles.append(left_angle)
+        left_points.append(left_point)
+        right_angles.append(right_angle)
+        right_points.append(right_point)
+        nearest_points.append(nearest_point)
+        is_nearest_point_to_line.append(on_line)
+    return intervals
 
-    def __simple_move_distance_to_point__(self, center, radius, wallpoint):
-        dx = wallpoint[0] - center[0]
-        dy = wallpoint[1] - center[1]
-        distance = numpy.sqrt(dx ** 2 + dy ** 2)
-        return max(distance - radius, 0)
+# The end of an interval moved to where the wall crosses the side of the field of view at bound,
+# found by casting a ray from position along that side.  Angles are measured clockwise on screen
+# while rotate_vector turns the other way, hence the rotation by -bound.
+def get_clipped_end(position, orientation_vector, wall, bound, angle, point):
+    visend = tuple(numpy.array(position) + rotate_vector(orientation_vector, numpy.deg2rad(-bound)))
+    parameters = intersect_ray_segment(position, (visend[0] - position[0], visend[1] - position[1]), wall.start, wall.end)
+    if parameters is None:
+        return angle, point
+    return _valid_angle(bound), point_on_segment(position, visend, parameters[0])
 
-    def simple_maximum_move_distance(self, center, radius, orientation, default_max_distance):
-        if self.is_nearest_point_to_line:
-            orientation_vector = (
-                numpy.sin(numpy.deg2rad(orientation)),
-                -numpy.cos(numpy.deg2rad(orientation))
-            )
-            dx = self.nearest_point_on_segment[0] - center[0]
-            dy = self.nearest_point_on_segment[1] - center[1]
-            distance2 = dx ** 2 + dy ** 2
-            distance = numpy.sqrt(distance2)
-            a = numpy.inner(
-                numpy.array(orientation_vector),
-                numpy.array((dx, dy))
-            )
-            if a > 0:
-                maxmove = (distance2 - distance * radius) / a
-                return max(maxmove, 0.0)
-            else:
-                return default_max_distance
-        else:
-            distances=[default_max_distance]
-            if (self.left_angle > -90) and (self.left_angle < 90):
-                distances.append(
-                    self.__simple_move_distance_to_point__(center, radius, self.left_point)
-                )
-            if (self.right_angle > -90) and (self.right_angle < 90):
-                distances.append(
-                    self.__simple_move_distance_to_point__(center, radius, self.right_point)
-                )
-            return min(distances)
+# The gaps are found with a sweep over the intervals sorted once by angle.  Going
+# right from the interval ahead, the sweep takes in the intervals starting before
+# the current angle, and moves to the largest right angle among them, until the
+# intervals taken in end before the current angle.  The next interval then starts
+# after a gap, and the sweep stops there if the gap is wide enough.
+# Ties between angles go to the first interval, in the order of the walls.
 
-    def contains_angle(self, angle):
-        return (self.left_angle <= angle) and (angle <= self.right_angle)
-    
-    def contains_angle_in_interior(self, angle):
-        return (self.left_angle < angle) and (angle < self.right_angle)
- 
 # Find the gap to the right
-def get_angle_to_gap_on_right(target_gap_width, surroundings):
-    # Start with the minimum right-endpoint angle that is >= 0.0
-    right_angle, right_point = next(
-        iter(sorted(
-            map(
-                lambda vws: (vws.right_angle, vws.right_point),
-                filter(
-                    lambda vws: vws.right_angle >= 0.0,
-                    surroundings
-                )
-            ),
-            key=itemgetter(0),
-            reverse=False
-        )),
-        (0.0, None)
-    )
+def get_angle_to_gap_on_right(target_gap_width, left_angles, left_points, right_angles, right_points):
+    n = len(left_angles)
+    # Start with the minimum right angle that is >= 0.0
+    start = [idx for idx in range(n) if right_angles[idx] >= 0.0]
+    if start:
+        idx = min(start, key=right_angles.__getitem__)
+        right_angle, right_point = right_angles[idx], right_points[idx]
+    else:
+        right_angle, right_point = 0.0, None
+    order = sorted(range(n), key=left_angles.__getitem__)
+    k = 0
+    # The interval with the maximum right angle among those in order[:k]
+    widest = None
     while right_angle < 90.0:
-        while any([vws.contains_angle(right_angle) and (vws.right_angle > right_angle) for vws in surroundings]):
-            # adjust right endpoint
-            # Get the maximum right endpoint of intervals containing right_angle.
-            right_angle, right_point = next(
-                iter(sorted(
-                    map(
-                        lambda vws: (vws.right_angle, vws.right_point),
-                        filter(
-                            lambda vws: vws.contains_angle(right_angle) and (vws.right_angle > right_angle),
-                            surroundings
-                        )
-                    ),
-                    key=itemgetter(0),
-                    reverse=True
-                )),
-                (right_angle, right_point) # this should not be needed
-            )
-        
+        while True:
+            while (k < n) and (left_angles[order[k]] <= right_angle):
+                idx = order[k]
+                if (widest is None) or (right_angles[idx] > right_angles[widest]) or (
+                    (right_angles[idx] == right_angles[widest]) and (idx < widest)
+                ):
+                    widest = idx
+                k += 1
+            if (widest is None) or (right_angles[widest] <= right_angle):
+                break
+            right_angle, right_point = right_angles[widest], right_points[widest]
+
         if right_angle >= 90.0:
             return 90.0
-            
-        # Find the next interval to the right (higher left angle)
-        next_vws = next(
-            iter(sorted(
-                filter(
-                    lambda vws: vws.left_angle > right_angle,
-                    surroundings
-                ),
-                key=lambda vws: vws.left_angle,
-                reverse=False
-            )),
-            None
-        )
-
-        if next_vws is None:
+        # The next interval to the right (higher left angle)
+        if k == n:
             return right_angle
-        else:
-            gap_width = numpy.linalg.norm(
-                numpy.array(right_point) - numpy.array(next_vws.left_point)
-            )
-            # if gap_width > some specified value, break
-            if gap_width > target_gap_width:
-                return right_angle
-            else:
-                # keep going
-                right_angle = next_vws.right_angle
-                right_point = next_vws.right_point
+        idx = order[k]
+        gap_width = math.hypot(right_point[0] - left_points[idx][0], right_point[1] - left_points[idx][1])
+        if gap_width > target_gap_width:
+            return right_angle
+        right_angle, right_point = right_angles[idx], right_points[idx]
 
     return min(right_angle, 90.0)
 
 # Find the gap to the left
-def get_angle_to_gap_on_left(target_gap_width, surroundings):
-    # Start with the maximum left-endpoint angle that is <= 0.0
-    left_angle, left_point = next(
-        iter(sorted(
-            map(
-                lambda vws: (vws.left_angle, vws.left_point),
-                filter(
-                    lambda vws: vws.left_angle <= 0.0,
-                    surroundings
-                )
-            ),
-            key=itemgetter(0),
-            reverse=True
-        )),
-        (0.0, None)
-    )
+def get_angle_to_gap_on_left(target_gap_width, left_angles, left_points, right_angles, right_points):
+    n = len(left_angles)
+    # Start with the maximum left angle that is <= 0.0
+    start = [idx for idx in range(n) if left_angles[idx] <= 0.0]
+    if start:
+        idx = max(start, key=left_angles.__getitem__)
+        left_angle, left_point = left_angles[idx], left_points[idx]
+    else:
+        left_angle, left_point = 0.0, None
+    order = sorted(range(n), key=lambda idx: -right_angles[idx])
+    k = 0
+    # The interval with the minimum left angle among those in order[:k]
+    widest = None
     while left_angle > -90.0:
-        while any([vws.contains_angle(left_angle) and (vws.left_angle < left_angle) for vws in surroundings]):
-            # adjust left endpoint
-            # Get the minimum left endpoint of intervals containing left_angle.
-            left_angle, left_point = next(
-                iter(sorted(
-                    map(
-                        lambda vws: (vws.left_angle, vws.left_point),
-                        filter(
-                            lambda vws: vws.contains_angle(left_angle) and (vws.left_angle < left_angle),
-                            surroundings
-                        )
-                    ),
-                    key=itemgetter(0),
-                    reverse=False
-                )),
-                (left_angle, left_point) # this should not be needed
-            )
-        
+        while True:
+            while (k < n) and (right_angles[order[k]] >= left_angle):
+                idx = order[k]
+                if (widest is None) or (left_angles[idx] < left_angles[widest]) or (
+                    (left_angles[idx] == left_angles[widest]) and (idx < widest)
+                ):
+                    widest = idx
+                k += 1
+            if (widest is None) or (left_angles[widest] >= left_angle):
+                break
+            left_angle, left_point = left_angles[widest], left_points[widest]
+
         if left_angle <= -90.0:
             return -90.0
-            
-        # Find the next interval to the left (lower right-endpoint angle)
-        next_vws = next(
-            iter(sorted(
-                filter(
-                    lambda vws: vws.right_angle < left_angle,
-                    surroundings
-                ),
-                key=lambda vws: vws.right_angle,
-                reverse=True
-            )),
-            None
-        )
-
-        if next_vws is None:
+        # The next interval to the left (lower right angle)
+        if k == n:
             return left_angle
-        else:
-            gap_width = numpy.linalg.norm(
-                numpy.array(left_point) - numpy.array(next_vws.right_point)
-            )
-            # if gap_width > some specified value, break
-            if gap_width > target_gap_width:
-                return left_angle
-            else:
-                # keep going
-                left_angle = next_vws.left_angle
-                left_point = next_vws.left_point
+        idx = order[k]
+        gap_width = math.hypot(left_point[0] - right_points[idx][0], left_point[1] - right_points[idx][1])
+        if gap_width > target_gap_width:
+            return left_angle
+        left_angle, left_point = left_angles[idx], left_points[idx]
 
     return max(left_angle, -90.0)
 
-# The following assumes the visible points have already been 
-# processed and that the visible region is between 
-# (the angles defined in)
-# lower_visible_point and upper_visible_point.
-# Also, this interval should intersect the interval 
-# [lower_bound, upper_bound].
-def identify_visible_point_extremes_in_subinterval(
-    lower_visible_point, upper_visible_point, 
-    lower_bound, upper_bound,
-    cpt, is_nearest_point_to_line,
-    position, orientation_vector, wall
-):
-    lower_angle, lower_distance, lower_point = lower_visible_point
-    upper_angle, upper_distance, upper_point = upper_visible_point
-
-    if lower_angle < lower_bound:
-        lower_bound_rad = numpy.deg2rad(lower_bound)
-        visend = tuple(numpy.array(position) + rotate_vector(orientation_vector, lower_bound_rad))
-        adj_intersection_points = get_intersect_point(position, visend, wall.start, wall.end)
-        if adj_intersection_points is not None: 
-            adj_lower_point = adj_intersection_points[0]
-            # This should be the case
-            lower_angle = _valid_angle(lower_bound)
-            dx = adj_lower_point[0] - position[0]
-            dy = adj_lower_point[1] - position[1]
-            lower_distance = numpy.sqrt(dx ** 2 + dy ** 2)
-            lower_point = adj_lower_point
-    else:
-        # adjust lower angle as it might be outside [-180, 180)
-        lower_angle = _valid_angle(lower_angle)
-
-
-    if upper_bound < upper_angle:
-        upper_bound_rad = numpy.deg2rad(upper_bound)
-        visend = tuple(numpy.array(position) + rotate_vector(orientation_vector, upper_bound_rad))
-        adj_intersection_points = get_intersect_point(position, visend, wall.start, wall.end)
-        if adj_intersection_points is not None: 
-            adj_upper_point = adj_intersection_points[0]
-            # This should be the case
-            dx = adj_upper_point[0] - position[0]
-            dy = adj_upper_point[1] - position[1]
-            upper_angle = _valid_angle(upper_bound)
-            upper_distance = numpy.sqrt(dx ** 2 + dy ** 2)
-            upper_point = adj_upper_point
-    else:
-        # adjust upper angle as it might be outside [-180, 180)
-        upper_angle = _valid_angle(upper_angle)
-
-    if lower_angle == upper_angle:
-        return VisibleWallSegment(
-                lower_angle,
-                lower_distance,
-                lower_point,
-                lower_angle,
-                lower_distance,
-                lower_point,
-                cpt,
-                is_nearest_point_to_line 
-            )
-    else:
-        return VisibleWallSegment(
-                lower_angle,
-                lower_distance,
-                lower_point,
-                upper_angle,
-                upper_distance,
-                upper_point,
-                cpt,
-                is_nearest_point_to_line 
-            )
-
-def identify_visible_point_extremes(visiblepts, cpt, is_nearest_point_to_line, position, orientation_vector, wall):
-    # visiblepts are expected to be ordered by angle
-    if len(visiblepts) == 2:
-        left_angle, left_distance, left_point = visiblepts[0]
-        right_angle, right_distance, right_point = visiblepts[1]
-        if right_angle - left_angle > 180:
-            left_angle, right_angle = right_angle, (left_angle + 360.0)
-            left_distance, right_distance = right_distance, left_distance
-            left_point, right_point = right_point, left_point
-
-        if max(left_angle, -90) <= min(right_angle, 90):
-            return identify_visible_point_extremes_in_subinterval(
-                (left_angle, left_distance, left_point), (right_angle, right_distance, right_point),
-                -90, 90, 
-                cpt, is_nearest_point_to_line, position, orientation_vector, wall
-            )
-        elif max(left_angle, 270) <= min(right_angle, 360):
-            return identify_visible_point_extremes_in_subinterval(
-                (left_angle, left_distance, left_point), (right_angle, right_distance, right_point),
-                270, 360,
-                cpt, is_nearest_point_to_line, position, orientation_vector, wall
-            )
-        else:
-            return None
-    elif len(visiblepts) == 1:
-        left_angle, left_distance, left_point = visiblepts[0]
-        if -90 <= left_angle <= 90:
-            return VisibleWallSegment(
-                    left_angle,
-                    left_distance,
-                    left_point,
-                    left_angle,
-                    left_distance,
-                    left_point,
-                    cpt,
-                    is_nearest_point_to_line 
-                )
-        else:
-            return None
-
 def get_movement_estimates(position, radius, orientation, walls, obstacle_distance):
-    surroundings = []
+    """How far a fighter can move forward, and where the gaps between the walls around it are.
+
+       Returns (distance_forward, has_gap_ahead, gap_ahead_width, gap_ahead_left_angle,
+       gap_ahead_right_angle, angle_left_gap, angle_right_gap, intervals), where intervals
+       are the visible walls (see get_visible_wall_intervals).
+    """
+    intervals = get_visible_wall_intervals(position, orientation, walls, obstacle_distance)
+    left_angles, left_points, right_angles, right_points, nearest_points, is_nearest_point_to_line = intervals
     orientation_vector = (
         numpy.sin(numpy.deg2rad(orientation)),
         -numpy.cos(numpy.deg2rad(orientation))
     )
-    for wall in walls:
-        cpt, dist, is_nearest_point_to_line = get_nearest_point_and_distance_to_path(wall.start, wall.end, position)
-        if dist < obstacle_distance:
-            wallpts = list(get_extreme_points_on_segment_intersecting_circle(wall.start, wall.end, position, obstacle_distance))
-            wallpts = list(filter(lambda pt: pt is not None, wallpts))
-            visiblepts = list(map(lambda wallpt: get_angle_and_distance_to_point(position, orientation, wallpt), wallpts))
-            visiblepts = sorted(visiblepts, key=itemgetter(0, 1))
-            vwso = identify_visible_point_extremes(visiblepts, cpt, is_nearest_point_to_line, position, orientation_vector, wall)
-            if vwso is not None:
-                surroundings.append(vwso)
-    distanceForward = min(list(map(lambda vws: vws.simple_maximum_move_distance(position, radius, orientation, obstacle_distance), surroundings)), default=obstacle_distance)
-    hasGapAhead = not any(map(lambda vws: vws.contains_angle(0.0), surroundings))
+
+    # The distance to each wall along the orientation, from its nearest point when it lies
+    # within the wall, else from the ends of the interval in front
+    distanceForward = None
+    for idx, on_line in enumerate(is_nearest_point_to_line):
+        if on_line:
+            dx = nearest_points[idx][0] - position[0]
+            dy = nearest_points[idx][1] - position[1]
+            distance2 = dx ** 2 + dy ** 2
+            a = orientation_vector[0] * dx + orientation_vector[1] * dy
+            if a > 0:
+                move = max((distance2 - math.sqrt(distance2) * radius) / a, 0.0)
+            else:
+                move = obstacle_distance
+        else:
+            move = obstacle_distance
+            for angle, point in ((left_angles[idx], left_points[idx]), (right_angles[idx], right_points[idx])):
+                if (angle > -90) and (angle < 90):
+                    move = min(move, max(math.sqrt((point[0] - position[0]) ** 2 + (point[1] - position[1]) ** 2) - radius, 0))
+        if (distanceForward is None) or (move < distanceForward):
+            distanceForward = move
+    if distanceForward is None:
+        distanceForward = obstacle_distance
+
+    n = len(left_angles)
+    hasGapAhead = not any((left_angles[idx] <= 0.0) and (0.0 <= right_angles[idx]) for idx in range(n))
     gapAheadWidth = 0
     gapAheadLeftAngle = None
     gapAheadRightAngle = None
@@ -374,38 +271,23 @@ def get_movement_estimates(position, radius, orientation, walls, obstacle_distan
             -right_vector[0],
             -right_vector[1]
         )
-        extreme_right = (90.0, tuple(obstacle_distance*numpy.array(right_vector)))
-        extreme_left = (-90.0, tuple(obstacle_distance*numpy.array(left_vector)))
-        gapAheadLeft = next(
-            iter(sorted(
-                filter(
-                    lambda tpl: tpl[0] < 0.0,
-                    map(lambda vws: (vws.right_angle, vws.right_point), surroundings)
-                ), 
-                key=itemgetter(0),
-                reverse=True
-            )),
-            extreme_left
-        )
-        gapAheadRight = next(
-            iter(sorted(
-                filter(
-                    lambda tpl: tpl[0] > 0.0,
-                    map(lambda vws: (vws.left_angle, vws.left_point), surroundings)
-                ),
-                key=itemgetter(0),
-                reverse=False
-            )),
-            extreme_right
-        )
-        gapAheadLeftAngle = gapAheadLeft[0]
-        gapAheadRightAngle = gapAheadRight[0]
-        gapAheadWidth = numpy.linalg.norm(
-            numpy.array(gapAheadLeft[1]) - numpy.array(gapAheadRight[1])
-        )
+        # The nearest ends of the intervals on both sides, else the sides of the field of view
+        on_left = [idx for idx in range(n) if right_angles[idx] < 0.0]
+        if on_left:
+            idx = max(on_left, key=right_angles.__getitem__)
+            gapAheadLeftAngle, gapAheadLeftPoint = right_angles[idx], right_points[idx]
+        else:
+            gapAheadLeftAngle, gapAheadLeftPoint = -90.0, obstacle_distance * numpy.array(left_vector)
+        on_right = [idx for idx in range(n) if left_angles[idx] > 0.0]
+        if on_right:
+            idx = min(on_right, key=left_angles.__getitem__)
+            gapAheadRightAngle, gapAheadRightPoint = left_angles[idx], left_points[idx]
+        else:
+            gapAheadRightAngle, gapAheadRightPoint = 90.0, obstacle_distance * numpy.array(right_vector)
+        gapAheadWidth = numpy.linalg.norm(numpy.array(gapAheadLeftPoint) - numpy.array(gapAheadRightPoint))
 
     target_gap_width = 3 * radius
-    angle_left_gap = get_angle_to_gap_on_left(target_gap_width, surroundings)
-    angle_right_gap = get_angle_to_gap_on_right(target_gap_width, surroundings)
+    angle_left_gap = get_angle_to_gap_on_left(target_gap_width, left_angles, left_points, right_angles, right_points)
+    angle_right_gap = get_angle_to_gap_on_right(target_gap_width, left_angles, left_points, right_angles, right_points)
 
-    return distanceForward, hasGapAhead, gapAheadWidth, gapAheadLeftAngle, gapAheadRightAngle, angle_left_gap, angle_right_gap, surroundings
+    return distanceForward, hasGapAhead, gapAheadWidth, gapAheadLeftAngle, gapAheadRightAngle, angle_left_gap, angle_right_gap, intervals
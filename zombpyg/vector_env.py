@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+import numpy
+from gymnasium.spaces.discrete import Discrete
+from gymnasium.vector import VectorEnv, AutoresetMode
+from gymnasium.vector.utils import batch_space
+from zombpyg.game import Game
+from zombpyg.agent import AgentActions
+from zombpyg.utils.observations import get_observation_space, encode_observations
+
+
+class VectorZombpygEnv(VectorEnv):
+    """N games played in lockstep in the same process, each with a single agent.
+
+    The actions are given as an array of shape (N,), and the observations, rewards,
+    terminations and truncations are returned stacked, so that a batched policy
+    takes a single inference call per step.  Finished games are reset within the
+    same step (see gymnasium's AutoresetMode.SAME_STEP), with the last observation
+    and info of the finished episodes under "final_obs" and "final_info" in the infos.
+    """
+    metadata = {
+        'render_modes': [],
+        'autoreset_mode': AutoresetMode.SAME_STEP,
+    }
+
+    def __init__(
+        self,
+        num_envs=1,
+        world_config={
+            "tag": "SingleMap",
+            "parameters": {
+                "map_id": "demo",
+                "w": 640,
+                "h": 480,
+                "initial_zombies": 0,
+                "minimum_zombies": 0
+            }
+        },
+        rules_id="survival",
+        agent_weapon="rifle",
+        player_specs="",
+        render_mode=None,
+        fps=50,
+        agent_reward_configuration={},
+        friendly_fire_guard=False,
+        verbose=False,
+        visibility_cell_size=None,
+        visibility_cache_dir=None,
+        profile=False,
+        max_episode_steps=None,
+        frame_skip=1,
+        observation_encoding="float32"
+    ):
+        if num_envs < 1:
+            raise ValueError(f"The number of environments must be positive, not {num_envs}")
+        if render_mode is not None:
+            raise ValueError(f"In vectorized environment, render_mode {render_mode} is not valid, must be None")
+        self.render_mode = render_mode
+        self.num_envs = num_envs
+        # Episodes are truncated after max_episode_steps steps, as with gymnasium's TimeLimit
+        self.max_episode_steps = max_episode_steps
+        self.episode_steps = numpy.zeros((num_envs,), dtype=int)
+        # Each action is repeated for frame_skip world steps (see Game.play_actions)
+        self.frame_skip = frame_skip
+
+        self.games = [
+            Game(
+                world_config,
+                rules_id=rules_id,
+                agent_ids=[0],
+                agent_weapons=[agent_weapon],
+                player_specs=player_specs,
+                enable_rendering=False,
+                fps=fps,
+                # Game adjusts the reward configuration, so each game gets its own copy
+                agent_reward_configuration=dict(agent_reward_configuration),
+                friendly_fire_guard=friendly_fire_guard,
+                verbose=verbose,
+                visibility_cell_size=visibility_cell_size,
+                visibility_cache_dir=visibility_cache_dir,
+                profile=profile,
+            )
+            for _ in range(num_envs)
+        ]
+
+        self.single_action_space = Discrete(AgentActions.get_actions_n())
+        # The observations are float32, or float16 or uint8 to save memory (see encode_observations)
+        self.observation_encoding = observation_encoding
+        self.single_observation_space = get_observation_space(self.games[0].get_feedback_size(), observation_encoding)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        # Preallocated buffers for the stacked results of a step
+        self.observations = numpy.zeros(self.observation_space.shape, dtype=self.observation_space.dtype)
+        self.rewards = numpy.zeros((num_envs,), dtype=numpy.float64)
+        self.terminations = numpy.zeros((num_envs,), dtype=bool)
+        self.truncations = numpy.zeros((num_envs,), dtype=bool)
+
+    def reset(self, seed=None, options=None):
+        """Reset all the games, or only those selected by the boolean array options["reset_mask"]."""
+        super().reset(seed=seed)
+        reset_mask = None if options is None else options.get("reset_mask")
+        for idx, game in enumerate(self.games):
+            if (reset_mask is None) or reset_mask[idx]:
+                # Each game gets its own seed, as with gymnasium's vector environments
+                game.reset(seed=None if seed is None else seed + idx)
+                self.episode_steps[idx] = 0
+                self.observations[idx] = encode_observations(game.get_current_feedback(), self.observation_encoding)
+        return self.observations.copy(), {}
+
+    def step(self, actions):
+        actions = numpy.asarray(actions)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(f"Expected actions of shape {(self.num_envs,)}, not {actions.shape}")
+
+        infos = {}
+        for idx, (game, action_id) in enumerate(zip(self.games, actions.tolist())):
+            reward, observation, done, truncated = game.play_action(action_id, num_frames=self.frame_skip)
+            observation = encode_observations(observation, self.observation_encoding)
+            self.episode_steps[idx] += 1
+            if (self.max_episode_steps is not None) and (self.episode_steps[idx] >= self.max_episode_steps):
+                truncated = True
+            self.rewards[idx] = reward
+            self.terminations[idx] = done
+            self.truncations[idx] = truncated
+            if done or truncated:
+                game.reset()
+                self.episode_steps[idx] = 0
+                infos = self._add_info(infos, {"final_obs": observation, "final_info": {}}, idx)
+                observation = encode_observations(game.get_current_feedback(), self.observation_encoding)
+            self.observations[idx] = observation
+
+        return (
+            self.observations.copy(), self.rewards.copy(),
+            self.terminations.copy(), self.truncations.copy(), infos
+        )
+
+    def get_step_stats(self):
+        """The step stats (see Game.get_step_stats) of each game, or None if not profiling."""
+        if self.games[0].profiler is None:
+            return None
+        return [game.get_step_stats() for game in self.games]
+
+    def close_extras(self, **kwargs):
+        for game in self.games:
+            game.close()
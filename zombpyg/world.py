@@ -1,19 +1,163 @@
-import random
 import numpy
 import pygame
 
 from zombpyg.utils.geometry import _valid_angle, calculate_distance
 from zombpyg.utils.surroundings import Color
+from zombpyg.utils.spatial_hash import SpatialHash
+from zombpyg.utils.observations import compute_sensor_feedbacks
+from zombpyg.utils.seeding import make_rngs
+from zombpyg.core.fighter_table import FighterTable
 from zombpyg.core.wall import Wall
 from zombpyg.agent import Agent
-from zombpyg.core.zombie import Zombie
+from zombpyg.core.zombie import Zombie, seek_targets
+from zombpyg.map.flow_field import FlowField
+from zombpyg.core.bullet import step_bullets
 from zombpyg.core.weapons import Rifle
 from zombpyg.players.terminator import Terminator
 
 
+class WorldSnapshot(object):
+    """The mutable state of a world, as taken by World.snapshot.
+
+       The attributes of the things (fighters, their weapons, sensors and dead
+       decorations, bullets, resources, checkpoints, decorations and the flow field) are kept as
+       shallow copies of their __dict__, keyed by the things themselves, while the
+       state of the fighters is kept as copies of the used rows of the fighter table.
+       The map data (walls, wall grid, sensor cache, objectives) is shared, and never copied.
+    """
+    def __init__(self, world):
+        self.t = world.t
+        self.step_count = world.step_count
+        self.deaths = world.deaths
+        self.zombie_deaths = world.zombie_deaths
+        self.player_deaths = world.player_deaths
+        self.events = list(world.events)
+        self.agents = list(world.agents)
+        self.players = list(world.players)
+        self.zombies = list(world.zombies)
+        self.bullets = list(world.bullets)
+        self.decorations = list(world.decorations)
+        self.resources = dict(world.resources)
+
+        table = world.fighters
+        n_rows = table.n_rows
+        self.n_rows = n_rows
+        self.free_rows = list(table.free_rows)
+        self.table_columns = {
+            name: getattr(table, name)[:n_rows].copy()
+            for name in ('x', 'y', 'radius', 'orientation', 'life', 'type_code', 'active', 'fighters')
+        }
+
+        fighter_hash = world.fighter_hash
+        self.hash_cells = {key: dict(cell) for key, cell in fighter_hash.cells.items()}
+        self.hash_thing_cells = dict(fighter_hash.thing_cells)
+        self.hash_max_radius = fighter_hash.max_radius
+
+        self.states = {}
+        # Fighters removed from the world keep their state in a table of their own
+        self.removed_fighter_rows = []
+        for fighter in self.agents + self.players + self.zombies:
+            self.__save__(fighter)
+            self.__save__(fighter.weapon)
+            self.__save__(fighter.dead_decoration)
+            for sensor in getattr(fighter, "sensors", []):
+                self.__save__(sensor)
+            if fighter.fighter_table is not table:
+                self.removed_fighter_rows.append(
+                    (
+                        fighter, fighter.fighter_table, fighter.fighter_row,
+                        fighter.x, fighter.y, fighter.r, fighter.orientation, fighter.life
+                    )
+                )
+        for thing in self.bullets + self.decorations + list(self.resources.values()):
+            self.__save__(thing)
+        self.__save__(world.flow_field)
+        self.checkpoints = [
+            (checkpoint, dict(checkpoint.__dict__), list(checkpoint.fighters_checked_in))
+            for checkpoint in world.checkpoints
+        ]
+
+        self.rng_state = world.rng.getstate()
+        self.np_rng_state = world.np_rng.bit_generator.state
+
+    def __save__(self, thing):
+        if thing is not None:
+            self.states[thing] = dict(thing.__dict__)
+
+    def restore(self, world):
+        world.t = self.t
+        world.step_count = self.step_count
+        world.deaths = self.deaths
+        world.zombie_deaths = self.zombie_deaths
+        world.player_deaths = self.player_deaths
+        world.events = list(self.events)
+        world.agents = list(self.agents)
+        world.players = list(self.players)
+        world.zombies = list(self.zombies)
+        world.bullets = list(self.bullets)
+        world.decorations = list(self.decorations)
+        world.resources = dict(self.resources)
+
+        for thing, state in self.states.items():
+            thing.__dict__.update(state)
+        for checkpoint, state, fighters_checked_in in self.checkpoints:
+            checkpoint.__dict__.update(state)
+            # The list is mutated in place by the checkpoint, so it gets a fresh copy
+            checkpoint.fighters_checked_in = list(fighters_checked_in)
+
+        # The table only ever grows, so the saved rows always fit
+        table = world.fighters
+        for name, column in self.table_columns.items():
+            array = getattr(table, name)
+            array[:self.n_rows] = column
+            if name == 'active':
+                array[self.n_rows:] = False
+            elif name == 'fighters':
+                array[self.n_rows:] = None
+        table.n_rows = self.n_rows
+        table.free_rows = list(self.free_rows)
+        for fighter, fighter_table, row, x, y, r, orientation, life in self.removed_fighter_rows:
+            fighter_table.x[row] = x
+            fighter_table.y[row] = y
+            fighter_table.radius[row] = r
+            fighter_table.orientation[row] = orientation
+            fighter_table.life[row] = life
+            fighter_table.active[row] = True
+            fighter_table.fighters[row] = fighter
+
+        # The cells are copied rather than rebuilt, to keep the iteration order of the fighters
+        fighter_hash = world.fighter_hash
+        fighter_hash.cells = {key: dict(cell) for key, cell in self.hash_cells.items()}
+        fighter_hash.thing_cells = dict(self.hash_thing_cells)
+        fighter_hash.max_radius = self.hash_max_radius
+
+        world.rng.setstate(self.rng_state)
+        world.np_rng.bit_generator.state = self.np_rng_state
+
+
+# The level of detail bands are pairs (distance, interval), with which the zombies at least
+# distance away from every living agent and player only step every interval steps, with
+# their moves scaled by interval (see World.schedule_zombie_steps).  The zombies nearer
+# than the first band, or within vision distance of an agent or player, step every step.
+def check_lod_bands(lod_bands):
+    """The bands as a tuple of (distance, interval) pairs sorted by distance, or None without bands."""
+    if lod_bands is None:
+        return None
+    bands = tuple(sorted((distance, interval) for distance, interval in lod_bands))
+    for distance, interval in bands:
+        if distance < 0:
+            raise ValueError(f"The distances of the level of detail bands must not be negative, not {distance}")
+        if (interval != int(interval)) or (interval < 1):
+            raise ValueError(f"The intervals of the level of detail bands must be positive integers, not {interval}")
+    return tuple((float(distance), int(interval)) for distance, interval in bands)
+
+
 class World(object):
     """World where the game is played"""
-    def __init__(self, map, step_time_delta):
+    def __init__(
+        self, map, step_time_delta, fighter_cell_size=32, rng=None, np_rng=None, batched_zombie_targeting=False,
+        horde_mode=False, flow_field_interval=5, lod_bands=None
+    ):
         self.size = map.size
         self.w = self.size[0]
         self.h = self.size[1]
@@ -21,6 +165,10 @@ class World(object):
         
         self.resources = {}
         self.walls = map.walls
+        self.wall_grid = map.wall_grid
+        self.sensor_cache = map.sensor_cache
+        self.movement_cache = map.movement_cache
+        self.visibility = map.visibility
         self.objectives = map.objectives
         self.decorations = []
         self.checkpoints = map.checkpoints if map.checkpoints is not None else []
@@ -28,8 +176,26 @@ class World(object):
         self.players = []
         self.zombies = []
         self.bullets = []
+        self.fighter_hash = SpatialHash(fighter_cell_size)
+        self.fighters = FighterTable(spatial_hash=self.fighter_hash)
+        # Per-phase timing of the steps, when enabled (see StepProfiler)
+        self.profiler = None
+        # Logs the state of the world after each step, when enabled (see EpisodeRecorder)
+        self.recorder = None
+        # Whether the targets of all the zombies are sought at once (see seek_zombie_targets)
+        self.batched_zombie_targeting = batched_zombie_targeting
+        # In horde mode, the zombies seeing no player follow a flow field towards the nearest one
+        self.flow_field = FlowField(map.wall_grid, map.size, update_interval=flow_field_interval) if horde_mode else None
+        # The zombies far from the living agents and players step less often (see schedule_zombie_steps)
+        self.lod_bands = check_lod_bands(lod_bands)
+        # All the randomness of the world is drawn from these generators, usually owned by the game
+        if (rng is None) or (np_rng is None):
+            rng, np_rng = make_rngs()
+        self.rng = rng
+        self.np_rng = np_rng
 
         self.t = 0
+        self.step_count = 0
         self.events = []
         self.deaths = 0
         self.zombie_deaths = 0
@@ -37,6 +203,9 @@ class World(object):
     
     def reset(self):
         self.t = 0
+        self.step_count = 0
+        if self.flow_field is not None:
+            self.flow_field.steps_until_update = 0
         self.resources = {}
         self.decorations = []
         for checkpoint in self.checkpoints:
@@ -45,7 +214,18 @@ class World(object):
         self.players = []
         self.zombies = []
         self.bullets = []
+        for fighter in self.fighters.get_fighters(self.fighters.get_rows()):
+            self.remove_fighter(fighter)
+        self.fighter_hash.clear()
     
+    def snapshot(self):
+        """Save the mutable state of the world, along with the state of the random generators."""
+        return WorldSnapshot(self)
+
+    def restore(self, snapshot):
+        """Bring the world back to a snapshot, which can be restored any number of times."""
+        snapshot.restore(self)
+
     def update_step_time_delta(self, new_time_delta):
         self.step_time_delta = new_time_delta
 
@@ -71,62 +251,122 @@ class World(object):
         """Log an event."""
         self.events.append((self.t, thing, message))
 
-    def step(self, action_ids):
-        """Forward one instant of time."""
+    def step(self, action_ids, compute_feedback=True):
+        """Forward one instant of time, returning the sensor feedbacks if compute_feedback, else None."""
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.start()
         self.t += self.step_time_delta
+        self.step_count += 1
         
-        for bullet in self.bullets:
-            bullet.next_step()
+        step_bullets(self.bullets, self)
+        if profiler is not None:
+            start = profiler.record("bullets", start)
 
         actions = self.get_agent_actions(action_ids)
-        random.shuffle(actions)
+        self.rng.shuffle(actions)
         self.execute_agent_actions(actions)
+        if profiler is not None:
+            start = profiler.record("agent_actions", start)
         self.execute_fighter_actions()
+        if profiler is not None:
+            start = profiler.record("fighter_actions", start)
 
         # process resources and checkpoints
         for robot in self.agents:
             robot.consume_nearby_resource()
             robot.check_in_to_nearby_checkpoints()
+        if profiler is not None:
+            start = profiler.record("resources_and_checkpoints", start)
             
-        feedbacks = [agent.sensor_feedback() for agent in self.agents]
+        feedbacks = self.get_sensor_feedbacks() if compute_feedback else None
+        if profiler is not None:
+            start = profiler.record("observations", start)
         
         self.clean_dead_things()
+        if profiler is not None:
+            start = profiler.record("cleanup", start)
+
+        if self.recorder is not None:
+            self.recorder.record(self)
+            if profiler is not None:
+                profiler.record("recording", start)
+        if profiler is not None:
+            profiler.end_step()
 
         return feedbacks
 
+    def set_profiler(self, profiler):
+        """Set the StepProfiler accumulating the timings of the steps, or None to disable profiling."""
+        self.profiler = profiler
+
+    def set_recorder(self, recorder):
+        """Set the EpisodeRecorder logging the state of the world after each step, or None to stop recording."""
+        self.recorder = recorder
+
+    def get_step_stats(self):
+        """The timings and counters accumulated by the profiler, or None if profiling is disabled."""
+        if self.profiler is None:
+            return None
+        return self.profiler.get_stats()
+
+    def get_sensor_feedbacks(self, agents=None):
+        """The (flattened) sensor feedback of each agent, computed for all the agents at once."""
+        return list(self.get_sensor_feedback_array(agents))
+
+    def get_sensor_feedback_array(self, agents=None):
+        """The flattened sensor feedbacks of the agents, as an array with a row per agent."""
+        if agents is None:
+            agents = self.agents
+        feedbacks = compute_sensor_feedbacks(agents, self)
+        return feedbacks.reshape((len(agents), -1))
+
     def collide_with_walls(self, x0, y0, x1, y1):
-        flag = False
-        for wall in self.walls:
-            point = wall.collide((x0, y0), (x1, y1))
-            if point is not None:
-                flag = True
-                break
-        return flag
+        if self.profiler is not None:
+            self.profiler.count("wall_collision_checks")
+        return self.wall_grid.segment_collides((x0, y0), (x1, y1))
     
+    def has_line_of_sight(self, start, end):
+        """Whether no wall stands between start and end, looked up in the map's visibility table when it has one."""
+        if self.visibility is not None:
+            visible = self.visibility.lookup(start, end)
+            if visible is not None:
+                return visible
+        return not self.wall_grid.segment_collides(start, end)
+
     def overlaps_with_fighters(self, point, radius):
-        for fighter in (self.zombies + self.players + self.agents):
-            if calculate_distance(point, fighter.get_position()) < (radius + fighter.get_radius()):
-                return True
-        return False
+        if self.profiler is not None:
+            self.profiler.count("fighter_collision_checks")
+        return self.fighters.any_within_radius(point, radius)
     
     def fighter_collides_with_others(self, this_fighter, new_point):
+        if self.profiler is not None:
+            self.profiler.count("fighter_collision_checks")
         radius = this_fighter.get_radius()
-        other_fighters = [
-            zombie for zombie in self.zombies if zombie.life > 0
-        ] + [
-            player for player in self.players if player.life > 0
-        ] + [
-            agent for agent in self.agents if agent.life > 0
-        ]
-        for other_fighter in other_fighters:
-            if this_fighter != other_fighter:
-                if calculate_distance(new_point, other_fighter.get_position()) < (radius + other_fighter.get_radius()):
-                    return True
-        return False
+        return self.fighters.any_within_radius(new_point, radius, exclude=this_fighter)
+
+    def add_fighter(self, fighter):
+        """Move the fighter's state into the fighter table, and register the fighter with the
+           spatial hash, which is then updated as the fighter moves.
+        """
+        self.fighters.attach(fighter)
+        fighter.spatial_hash = self.fighter_hash
+        self.fighter_hash.insert(fighter)
+
+    def remove_fighter(self, fighter):
+        """Move the fighter's state out of the fighter table, so the fighter can still be inspected."""
+        fighter.spatial_hash = None
+        self.fighter_hash.remove(fighter)
+        FighterTable(capacity=1).attach(fighter)
+
+    def get_fighters_near(self, point, distance):
+        """The living fighters that might be within the given distance of point."""
+        x, y = point
+        return self.fighter_hash.query_box(x - distance, y - distance, x + distance, y + distance)
     
     def generate_resources(self, resource_spawns):
         for resource_spawn in resource_spawns:
-            resource = resource_spawn.spawn_resource()
+            resource = resource_spawn.spawn_resource(self.np_rng)
             position = resource.get_position()
             if self.resources.get(position, None) is None:
                 self.resources[position] = resource
@@ -137,10 +377,10 @@ class World(object):
             del self.resources[(x, y)]
 
     def generate_agent(self, agent_builder, agent_id, weapon_id, spawns, max_attempts=0):
-        spawn = random.choices(spawns, k=1)[0]
+        spawn = self.rng.choices(spawns, k=1)[0]
         attempts = 0
         while (max_attempts <= 0) or (attempts < max_attempts):
-            x, y = spawn.get_spawn_location()
+            x, y = spawn.get_spawn_location(self.np_rng)
             radius = agent_builder.radius * 2
             
             if self.collide_with_walls(x-radius, y-radius, x+radius, y+radius):
@@ -154,9 +394,9 @@ class World(object):
                 attempts += 1
                 continue
 
-            self.agents.append(
-                agent_builder.build(agent_id, x, y, weapon_id, self)
-            )
+            agent = agent_builder.build(agent_id, x, y, weapon_id, self)
+            self.agents.append(agent)
+            self.add_fighter(agent)
             break
 
         if (max_attempts > 0) and (attempts >= max_attempts):
@@ -164,10 +404,10 @@ class World(object):
 
         
     def generate_player(self, player_builder, spawns, max_attempts=3):
-        spawn = random.choices(spawns, k=1)[0]
+        spawn = self.rng.choices(spawns, k=1)[0]
         attempts = 0
         while attempts < max_attempts:
-            x, y = spawn.get_spawn_location()
+            x, y = spawn.get_spawn_location(self.np_rng)
             radius = player_builder.radius * 2
             
             if self.collide_with_walls(x-radius, y-radius, x+radius, y+radius):
@@ -181,17 +421,17 @@ class World(object):
                 attempts += 1
                 continue
 
-            self.players.append(
-                player_builder.create_player(x, y, self)
-            )
+            player = player_builder.create_player(x, y, self)
+            self.players.append(player)
+            self.add_fighter(player)
             break
 
     def generate_zombie(self, zombie_builder, spawns, max_attempts=3):
-        spawn = random.choices(spawns, k=1)[0]
+        spawn = self.rng.choices(spawns, k=1)[0]
         attempts = 0
         while attempts < max_attempts:
-            x, y = spawn.get_spawn_location()
-            orientation = _valid_angle(random.uniform(-180.0, 180.0))
+            x, y = spawn.get_spawn_location(self.np_rng)
+            orientation = _valid_angle(self.rng.uniform(-180.0, 180.0))
             radius = zombie_builder.radius * 2
             
             if self.collide_with_walls(x-radius, y-radius, x+radius, y+radius):
@@ -205,9 +445,9 @@ class World(object):
                 attempts += 1
                 continue
 
-            self.zombies.append(
-                zombie_builder.create_zombie(x, y, orientation, self)
-            )
+            zombie = zombie_builder.create_zombie(x, y, orientation, self)
+            self.zombies.append(zombie)
+            self.add_fighter(zombie)
             break
 
     def add_bullet(self, bullet):
@@ -226,11 +466,69 @@ class World(object):
         for action in actions:
             action.execute_action()
     
+    def seek_zombie_targets(self, zombies=None):
+        """Seek the targets of all the zombies (or of the given ones) in one pass, to be used by their
+           next steps (see seek_targets).
+
+           The targets are sought from the positions at the start of the fighters' turn, so the
+           players moving before a zombie acts in the same step aren't seen where they moved to.
+        """
+        seek_targets(self.zombies if zombies is None else zombies, self)
+
+    def schedule_zombie_steps(self):
+        """Set the step scale of the living zombies stepping in this turn, by their distance to the
+           nearest living agent or player (see lod_bands), and return the set of those which don't.
+           The zombies with a living agent or player within their vision distance step every step,
+           as they may chase and attack it.
+
+           A zombie in a band with interval n steps when the step count plus its row in the fighter
+           table is a multiple of n, so that the zombies of the band are spread over the steps.
+        """
+        zombies = [zombie for zombie in self.zombies if zombie.life > 0]
+        if len(zombies) == 0:
+            return set()
+        table = self.fighters
+        rows = numpy.array([zombie.fighter_row for zombie in zombies], dtype=int)
+        target_rows = table.get_living_rows(fighter_types=('agent', 'player'))
+        if len(target_rows) > 0:
+            target_distances = numpy.sqrt(
+                (table.x[rows][:, None] - table.x[target_rows][None, :]) ** 2
+                + (table.y[rows][:, None] - table.y[target_rows][None, :]) ** 2
+            )
+            distances = numpy.min(target_distances, axis=1)
+            # The zombies seeing a target (see Zombie.seek_target) interact with it, whatever the bands
+            vision_distances = numpy.array([zombie.vision_distance for zombie in zombies], dtype=float)
+            in_sight = numpy.any(
+                target_distances < vision_distances[:, None] + table.radius[target_rows][None, :], axis=1
+            )
+        else:
+            distances = numpy.full((len(zombies),), numpy.inf)
+            in_sight = numpy.zeros((len(zombies),), dtype=bool)
+        intervals = numpy.ones((len(zombies),), dtype=int)
+        for distance, interval in self.lod_bands:
+            intervals[distances >= distance] = interval
+        intervals[in_sight] = 1
+        stepping = ((self.step_count + rows) % intervals) == 0
+        skipped = set()
+        for zombie, interval, steps in zip(zombies, intervals.tolist(), stepping.tolist()):
+            if steps:
+                zombie.step_scale = interval
+            else:
+                skipped.add(zombie)
+        return skipped
+
     def execute_fighter_actions(self):
+        skipped = self.schedule_zombie_steps() if self.lod_bands is not None else set()
+        if skipped and (self.profiler is not None):
+            self.profiler.count("lod_skipped_steps", len(skipped))
+        if self.batched_zombie_targeting:
+            self.seek_zombie_targets([zombie for zombie in self.zombies if zombie not in skipped])
+        if self.flow_field is not None:
+            self.flow_field.step([fighter.get_position() for fighter in self.agents + self.players if fighter.life > 0])
         fighters = self.players + self.zombies
-        random.shuffle(fighters)
+        self.rng.shuffle(fighters)
         for fighter in fighters:
-            if fighter.life > 0:
+            if (fighter.life > 0) and (fighter not in skipped):
                 fighter.next_step()
 
     def clean_dead_things(self):
@@ -239,6 +537,7 @@ class World(object):
         self.hide_visited_checkpoints()
         self.clean_dead_zombies()
         self.clean_dead_players()
+        self.clean_dead_agents()
         self.decorations = [decoration for decoration in self.decorations if decoration.life > 0]
     
     def clean_dead_resource(self):
@@ -261,6 +560,7 @@ class World(object):
         dead_zombies = [zombie for zombie in self.zombies if zombie.life <= 0]
         self.zombies = [zombie for zombie in self.zombies if zombie.life > 0]
         for thing in dead_zombies:
+            self.remove_fighter(thing)
             if thing.dead_decoration is not None:
                 x, y = thing.get_position()
                 thing.dead_decoration.set_position(x, y)
@@ -275,6 +575,7 @@ class World(object):
         dead_players = [player for player in self.players if player.life <= 0]
         self.players = [player for player in self.players if player.life > 0]
         for thing in dead_players:
+            self.remove_fighter(thing)
             if thing.dead_decoration is not None:
                 x, y = thing.get_position()
                 thing.dead_decoration.set_position(x, y)
@@ -284,6 +585,12 @@ class World(object):
             self.player_deaths += 1
             self.deaths += 1
 
+    def clean_dead_agents(self):
+        """Dead agents are kept in the agents list, but are no longer tracked in the spatial hash."""
+        for agent in self.agents:
+            if (agent.life <= 0) and (agent in self.fighter_hash):
+                self.remove_fighter(agent)
+
     def draw(self, game):
         # Draw objects
         for objective in self.objectives: